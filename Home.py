@@ -1,6 +1,7 @@
 # Home.py — VIREO landing page (streamlined around your current script)
 import streamlit as st
 from pathlib import Path
+from vireo.assets import hero_uri, read_text
 
 st.set_page_config(page_title="VIREO", layout="wide")
 
@@ -9,9 +10,17 @@ HERO  = Path("assets/vireo_hero.png")   # full-bleed hero (preferred)
 LOGO  = Path("assets/VIREO.png")        # fallback bird/logo
 THEME = Path("assets/vireo_theme.css")  # optional modern theme
 
+# ---- Static assets: read once per process, not on every rerun ----
+@st.cache_resource
+def get_static_assets():
+    # theme CSS (optional) + pre-resized hero as a data URI (python -m vireo.assets)
+    return read_text(THEME), hero_uri(HERO)
+
+theme_css, hero_src = get_static_assets()
+
 # ---- Load optional theme CSS ----
-if THEME.exists():
-    st.markdown(f"<style>{THEME.read_text(encoding='utf-8')}</style>", unsafe_allow_html=True)
+if theme_css:
+    st.markdown(f"<style>{theme_css}</style>", unsafe_allow_html=True)
 
 # ---- Page CSS (keeps your look, tightens spacing) ----
 st.markdown(f"""
@@ -42,19 +51,18 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # ---- Hero (or fallback logo) ----
-if HERO.exists():
-    st.markdown("<div class='hero'>", unsafe_allow_html=True)
-    st.image(str(HERO), use_container_width=True)
-    st.markdown(
-        """
+hero_caption = """
         <div class='hero-caption'>
           <div class='brand'>VIREO</div>
           <div class='subtitle'>Translate my thought</div>
         </div>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+"""
+if hero_src:  # inlined: no Pillow/numpy, no per-rerun decode
+    st.markdown(f"<div class='hero'><img src='{hero_src}' alt='VIREO'>{hero_caption}</div>", unsafe_allow_html=True)
+elif HERO.exists():
+    st.markdown("<div class='hero'>", unsafe_allow_html=True)
+    st.image(str(HERO), use_container_width=True)
+    st.markdown(f"{hero_caption}</div>", unsafe_allow_html=True)
 elif LOGO.exists():
     st.markdown("<div class='center'>", unsafe_allow_html=True)
     st.image(str(LOGO), width=260)
@@ -0,0 +1,170 @@
+# bench/bench_app.py — drive simulated sessions through the Translate page with AppTest
+#
+#   python bench/bench_app.py --sessions 20 --concurrency 4 --translations 5
+#   python bench/bench_app.py --base-url http://127.0.0.1:8900/v1   # external mock / real endpoint
+#   python bench/bench_app.py --cassette .cache/bench.cassette --cassette-mode record
+#   python bench/bench_app.py --cassette .cache/bench.cassette --cassette-mode replay   # offline, reproducible
+#
+# Without --base-url an in-process vireo.mock_server is started, so no network or API
+# spend is involved. A replay run needs neither: every completion comes from the
+# cassette (with its recorded latency, or --replay-latency-ms) and a miss is an error. Each session: open page -> switch to API mode -> enter code ->
+# (pick style, type thought, Translate) x N. Reports rerun latency percentiles,
+# translate throughput and traced Python memory per session. Translate latency is
+# click -> line on the page, polled every 20 ms.
+#
+# AppTest is not thread-safe, so --concurrency runs sessions in worker processes
+# (like separate Streamlit workers sharing one upstream).
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from vireo.core import list_styles, load_modes  # noqa: E402
+from vireo.mock_server import MockConfig, start  # noqa: E402
+
+PAGE = ROOT / "pages" / "01_Translate_My_Thought.py"
+CODE = "BENCH-CODE"
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def make_app(base_url, args):
+    at = AppTest.from_file(str(PAGE), default_timeout=args.timeout)
+    at.secrets["openai"] = {"api_key": "bench", "base_url": base_url}
+    at.secrets["paywall"] = {"codes": [CODE]}
+    at.secrets["quota"] = {"per_code_burst": 10_000, "per_code_per_minute": 1e6, "global_burst": 10_000,
+                           "global_per_minute": 1e6, "daily_requests": 10**9, "daily_tokens": 10**12, "path": ""}
+    at.secrets["cache"] = {"path": ""}
+    # generated thoughts differ only in digits, which the near-duplicate index ignores
+    at.secrets["semantic"] = {"enabled": False}
+    if args.cassette:
+        at.secrets["cassette"] = {"path": args.cassette, "mode": args.cassette_mode,
+                                  "latency_scale": args.replay_latency_scale}
+        if args.replay_latency_ms is not None:
+            at.secrets["cassette"]["latency_ms"] = args.replay_latency_ms
+    return at
+
+
+def click_and_wait(at, button, timeout):
+    # the click only submits a background job; rerun (as the polling fragment would) until it lands
+    button.click().run()
+    deadline = time.monotonic() + timeout
+    while "translate_job" in at.session_state and not (at.success or at.error) and time.monotonic() < deadline:
+        time.sleep(0.02)
+        at.run()
+
+
+def drive_session(i, args, base_url, styles):
+    at = make_app(base_url, args)
+    reruns, translates, errors = [], [], 0
+
+    def step(action, bucket=reruns):
+        t0 = time.perf_counter()
+        action()
+        bucket.append(time.perf_counter() - t0)
+
+    step(lambda: at.run())
+    step(lambda: at.sidebar.radio[0].set_value("API (paid)").run())
+    step(lambda: at.sidebar.text_input[0].input(CODE).run())
+    if args.no_stream:
+        step(lambda: at.sidebar.checkbox[0].uncheck().run())
+    for j in range(args.translations):
+        style = styles[(i + j) % len(styles)]
+        thought = f"I feel stuck {j}" if args.repeat_thoughts else f"I feel stuck, session {i} try {j}"
+        step(lambda: at.selectbox[0].set_value(style).run())
+        step(lambda: at.text_area[0].input(thought).run())
+        button = next(b for b in at.button if b.label == "Translate")
+        step(lambda: click_and_wait(at, button, args.timeout), translates)
+        if at.exception or any("API error" in e.value for e in at.error):
+            errors += 1
+    return reruns, translates, errors, at
+
+
+def run_worker(session_ids, args, base_url):
+    # one process: warm up (imports, st.cache_resource), then drive its share of sessions
+    styles = list_styles(load_modes())
+    drive_session(-1, argparse.Namespace(**{**vars(args), "translations": 1}), base_url, styles)
+    tracemalloc.start()
+    mem_before = tracemalloc.get_traced_memory()[0]
+    reruns, translates, errors, apps = [], [], 0, []
+    for i in session_ids:
+        r, t, e, at = drive_session(i, args, base_url, styles)
+        reruns += r
+        translates += t
+        errors += e
+        apps.append(at)  # keep sessions alive so their state counts towards memory
+    mem_after, mem_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return reruns, translates, errors, mem_after - mem_before, mem_peak
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="AppTest load benchmark for the Translate page.")
+    p.add_argument("--sessions", type=int, default=10)
+    p.add_argument("--concurrency", type=int, default=1, help="worker processes driving sessions in parallel")
+    p.add_argument("--translations", type=int, default=3, help="Translate clicks per session")
+    p.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint (default: in-process mock)")
+    p.add_argument("--latency-ms", type=float, default=200, help="in-process mock median latency")
+    p.add_argument("--error-rate", type=float, default=0.0, help="in-process mock 500 rate")
+    p.add_argument("--repeat-thoughts", action="store_true", help="reuse thoughts across sessions (cache hits)")
+    p.add_argument("--no-stream", action="store_true", help="untick 'Stream tokens'")
+    p.add_argument("--timeout", type=float, default=60)
+    p.add_argument("--cassette", default=None, help="record/replay completions to/from this file")
+    p.add_argument("--cassette-mode", default="auto", choices=("record", "replay", "auto"))
+    p.add_argument("--replay-latency-ms", type=float, default=None, help="replay with this fixed latency")
+    p.add_argument("--replay-latency-scale", type=float, default=1.0, help="multiply recorded latencies")
+    p.add_argument("--json", default=None, help="also write results to this JSON file")
+    args = p.parse_args(argv)
+
+    base_url = args.base_url
+    if args.cassette and args.cassette_mode == "replay":
+        base_url = base_url or "http://127.0.0.1:9/v1"  # nothing listens there: a leak fails loudly
+    elif base_url is None:
+        _, base_url = start(MockConfig(latency_ms=args.latency_ms, sigma=0.4, token_delay_ms=5,
+                                       error_rate=args.error_rate, seed=1))
+    workers = max(1, min(args.concurrency, args.sessions))
+    shares = [list(range(args.sessions))[w::workers] for w in range(workers)]
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [run_worker(shares[0], args, base_url)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_worker, shares, [args] * workers, [base_url] * workers))
+    wall = time.perf_counter() - t0  # includes per-worker warm-up
+
+    reruns = [x for r in results for x in r[0]]
+    translates = [x for r in results for x in r[1]]
+    errors = sum(r[2] for r in results)
+    report = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "cassette": args.cassette_mode if args.cassette else None,
+        "translations": len(translates),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "translates_per_s": round(len(translates) / wall, 2),
+        "reruns_per_s": round((len(reruns) + len(translates)) / wall, 2),
+        "rerun_ms": {q: round(pct(reruns, v) * 1000, 1) for q, v in (("p50", .5), ("p95", .95), ("p99", .99))},
+        "translate_ms": {q: round(pct(translates, v) * 1000, 1) for q, v in (("p50", .5), ("p95", .95), ("p99", .99))},
+        "memory_per_session_kib": round(sum(r[3] for r in results) / args.sessions / 1024, 1),
+        "peak_traced_mib_per_worker": round(max(r[4] for r in results) / 2**20, 1),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0 if errors == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# bench/bench_candidates.py — n choices + local rerank vs re-asking until the line is valid
+#
+#   python bench/bench_candidates.py                              # in-process mock, 20% bad choices
+#   python bench/bench_candidates.py --invalid-rate 0.35 --n 4 --calls 200
+#   python bench/bench_candidates.py --base-url http://127.0.0.1:8900/v1 --api-key mock
+#
+# Both strategies stop at the first valid line (vireo.candidates.check) or after
+# --max-rounds round trips. "reask" sends n=1 each round, like a user clicking
+# Translate again; "candidates" sends n=--n and keeps the best choice.
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.candidates import Reranker, check  # noqa: E402
+from vireo.completions import complete_choices  # noqa: E402
+from vireo.core import build_messages, list_styles, load_modes  # noqa: E402
+from vireo.mock_server import MockConfig, start  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "thoughts.txt"
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def run_strategy(client, args, modes, pairs, n):
+    reranker = Reranker(n)
+
+    def one(pair):
+        style, thought = pair
+        messages = build_messages(modes, style, thought)
+        usage = []
+        t0 = time.perf_counter()
+        for rounds in range(1, args.max_rounds + 1):
+            lines = complete_choices(client, messages, args.model, 0.8, 60, n=n, on_usage=usage.append)
+            pick = reranker.pick(lines, thought)
+            if not pick.reasons:
+                break
+        return time.perf_counter() - t0, rounds, not pick.reasons, sum(u.completion_tokens for u in usage)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, pairs))
+    latencies = [r[0] for r in results]
+    return {
+        "n": n,
+        "latency_ms_p50": round(pct(latencies, 0.5) * 1000, 1),
+        "latency_ms_p95": round(pct(latencies, 0.95) * 1000, 1),
+        "latency_ms_mean": round(statistics.mean(latencies) * 1000, 1),
+        "round_trips_mean": round(statistics.mean(r[1] for r in results), 3),
+        "valid_pct": round(100 * sum(r[2] for r in results) / len(results), 1),
+        "completion_tokens_mean": round(statistics.mean(r[3] for r in results), 1),
+        "choice_reject_rate": round(reranker.stats()["reject_rate"], 3),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Multi-candidate reranking vs re-ask benchmark.")
+    p.add_argument("--n", type=int, default=3, help="choices per call for the candidates strategy")
+    p.add_argument("--calls", type=int, default=120, help="(style, thought) pairs per strategy")
+    p.add_argument("--max-rounds", type=int, default=3)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint (default: in-process mock)")
+    p.add_argument("--api-key", default="mock")
+    p.add_argument("--model", default="gpt-3.5-turbo")
+    p.add_argument("--latency-ms", type=float, default=300, help="in-process mock median latency")
+    p.add_argument("--invalid-rate", type=float, default=0.2, help="in-process mock share of bad choices")
+    p.add_argument("--seed", type=int, default=1)
+    args = p.parse_args(argv)
+
+    from openai import OpenAI
+
+    base_url = args.base_url
+    if base_url is None:
+        _, base_url = start(MockConfig(latency_ms=args.latency_ms, sigma=0.3, token_delay_ms=0,
+                                       invalid_rate=args.invalid_rate, seed=args.seed))
+    client = OpenAI(api_key=args.api_key, base_url=base_url, max_retries=0)
+
+    modes = load_modes()
+    thoughts = [t for t in CORPUS.read_text(encoding="utf-8").splitlines() if t.strip()]
+    rng = random.Random(args.seed)
+    pairs = [(rng.choice(list_styles(modes)), rng.choice(thoughts)) for _ in range(args.calls)]
+
+    # the validator itself must stay negligible next to a round trip
+    sample = [("Like tide over stone, the knot learns to soften.", t) for t in thoughts]
+    t0 = time.perf_counter()
+    for _ in range(20):
+        for line, thought in sample:
+            check(line, thought)
+    check_us = (time.perf_counter() - t0) / (20 * len(sample)) * 1e6
+
+    reask = run_strategy(client, args, modes, pairs, 1)
+    candidates = run_strategy(client, args, modes, pairs, args.n)
+    report = {
+        "calls": args.calls,
+        "invalid_rate": args.invalid_rate if args.base_url is None else None,
+        "check_us": round(check_us, 1),
+        "reask": reask,
+        "candidates": candidates,
+        "latency_saved_ms_mean": round(reask["latency_ms_mean"] - candidates["latency_ms_mean"], 1),
+        "round_trips_saved_pct": round(100 * (1 - candidates["round_trips_mean"] / reask["round_trips_mean"]), 1),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
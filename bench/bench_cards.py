@@ -0,0 +1,93 @@
+# bench/bench_cards.py — share-card render latency, cache hits and burst behaviour
+#
+#   python bench/bench_cards.py                       # 2 pool workers, burst of 48 distinct cards
+#   python bench/bench_cards.py --workers 4 --burst 200 --threads 32 --format webp
+#
+# Phases: cold (first card, includes pool start-up and preloading), warm renders,
+# disk hits for the same cards, then a burst of distinct cards from --threads
+# concurrent callers to show queueing (max_pending) and tail latency.
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.cards import CardRenderer  # noqa: E402
+from vireo.core import list_styles, load_modes  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "thoughts.txt"
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return (time.perf_counter() - t0) * 1000, out
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Share-card renderer benchmark.")
+    p.add_argument("--workers", type=int, default=2, help="render processes (0 = render in the calling thread)")
+    p.add_argument("--format", default="png", choices=("png", "webp"))
+    p.add_argument("--size", type=int, default=1080)
+    p.add_argument("--warm", type=int, default=20, help="distinct cards rendered one at a time")
+    p.add_argument("--burst", type=int, default=48, help="distinct cards requested at once")
+    p.add_argument("--threads", type=int, default=16, help="concurrent callers during the burst")
+    p.add_argument("--max-pending", type=int, default=16)
+    p.add_argument("--timeout", type=float, default=5.0)
+    args = p.parse_args(argv)
+
+    styles = list_styles(load_modes())
+    thoughts = [t for t in CORPUS.read_text(encoding="utf-8").splitlines() if t.strip()]
+    lines = [f"{t} — and still the river keeps its quiet promise ({i})" for i, t in enumerate(thoughts * 20)]
+    cache_dir = Path(tempfile.mkdtemp(prefix="vireo-cards-"))
+    try:
+        r = CardRenderer(cache_dir, size=args.size, fmt=args.format, workers=args.workers,
+                         max_pending=args.max_pending, timeout=args.timeout, styles=styles)
+        cold_ms, data = timed(r.get, lines[0], styles[0])
+        warm = [timed(r.get, lines[i], styles[i % len(styles)])[0] for i in range(1, args.warm + 1)]
+        hits = [timed(r.get, lines[i], styles[i % len(styles)])[0] for i in range(1, args.warm + 1)]
+
+        offset = args.warm + 1
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            t0 = time.perf_counter()
+            results = list(pool.map(lambda i: timed(r.get, lines[offset + i], styles[i % len(styles)]),
+                                    range(args.burst)))
+            burst_wall = time.perf_counter() - t0
+        served = [ms for ms, out in results if out is not None]
+        stats = r.stats()
+        report = {
+            "workers": args.workers,
+            "format": args.format,
+            "card_kib": round(len(data) / 1024, 1),
+            "cold_ms": round(cold_ms, 1),
+            "warm_render_ms_p50": round(pct(warm, 0.5), 1),
+            "warm_render_ms_p95": round(pct(warm, 0.95), 1),
+            "disk_hit_ms_p50": round(pct(hits, 0.5), 2),
+            "burst": {
+                "requests": args.burst,
+                "served": len(served),
+                "fell_back_to_text": args.burst - len(served),
+                "latency_ms_p50": round(pct(served, 0.5), 1),
+                "latency_ms_p95": round(pct(served, 0.95), 1),
+                "cards_per_s": round(len(served) / burst_wall, 1),
+            },
+            "renderer": stats,
+        }
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bench/bench_demo.py — compiled demo templates vs the old per-call f-string dict
+#
+#   python bench/bench_demo.py                    # bench/thoughts.txt × every style
+#   python bench/bench_demo.py --repeat 9 --scale 20
+#
+# "legacy" is demo_translate as it was before the templates moved into
+# poetic_modes.json (a fresh 22-entry dict of f-strings per call), kept here as the
+# baseline. The others render the same (thought, style) pairs through the registry:
+# one call per line (vireo.core.demo_translate and Snapshot.demo) and batched
+# (Snapshot.demo_many: one style for a whole batch, and the compare-all grid where
+# every thought is rendered in every style). Reports the best-of-N µs per line.
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.core import demo_translate  # noqa: E402
+from vireo.registry import StyleRegistry  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "thoughts.txt"
+
+
+def legacy_demo_translate(thought: str, style: str) -> str:
+    t = (thought or "this moment").strip()
+    samples = {
+        "Poetic": f"Like tide over stone, {t} learns to soften.",
+        "Stoic": f"{t.capitalize()} is opinion; choose the next right action.",
+        "Shakespearean": f"{t} weighs the hour; still, I answer dawn.",
+        "Deep": f"The root of {t} is asking to be seen.",
+        "Comic": f"{t}? You’re not broken—you’re buffering. Try a heart refresh.",
+        "Zen": f"{t} is a cloud; the sky remains.",
+        "Mystical": f"Within {t}, a hidden lantern waits for your name.",
+        "Mythic Mirror": f"You stand at the gate of {t}; the key is your true name.",
+        "Haiku": f"{t} in one breath— old knots loosening— spring finds a door",
+        "Lyrical": f"I hum through {t} till the melody turns me light.",
+        "Oracular": f"From {t}, a sign: choose the narrow way and become wide.",
+        "Surrealist": f"{t} grew feathers; the clock drank the sea.",
+        "Romantic": f"In {t}, the heart still hears a distant, faithful lighthouse.",
+        "Minimalist": f"{t}. Then—space.",
+        "Elegiac": f"I lay down the old name of {t} and listen for the quiet.",
+        "Epic/Grand": f"Across the ridge of {t}, your small step moves the mountain.",
+        "Satirical": f"{t}? Install fewer chaos-plugins.",
+        "Ecstatic (Rumi-style)": f"Beloved, even {t} is a doorway wearing your face.",
+        "Journal-style": f"Today felt like {t}. One truthful line eased it.",
+        "Rap/Spoken Word": f"{t} in my chest—ride the beat, let the walls confess.",
+        "Childlike": f"{t} feels big. I am bigger.",
+        "Cinematic": f"The room tightens with {t}; a window brightens—you exhale."
+    }
+    return samples.get(style, f"{t} turns toward light.")
+
+
+def best_us(fn, lines: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / lines * 1e6
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Demo-mode template rendering benchmark.")
+    p.add_argument("--repeat", type=int, default=7, help="timed passes (best is reported)")
+    p.add_argument("--scale", type=int, default=10, help="corpus copies per pass")
+    args = p.parse_args(argv)
+
+    snapshot = StyleRegistry().current()
+    styles = list(snapshot.names)
+    thoughts = [t for t in CORPUS.read_text(encoding="utf-8").splitlines() if t.strip()] * args.scale
+    # every thought in every style, as (thoughts, styles) columns
+    grid_thoughts = [t for t in thoughts for _ in styles]
+    grid_styles = styles * len(thoughts)
+    pairs = list(zip(grid_thoughts, grid_styles))
+    n = len(pairs)
+
+    def per_style(render):
+        def run():
+            for style in styles:
+                render(thoughts, style)
+        return run
+
+    cases = {
+        "legacy (dict per call)": lambda: [legacy_demo_translate(t, s) for t, s in pairs],
+        "core.demo_translate": lambda: [demo_translate(t, s) for t, s in pairs],
+        "Snapshot.demo": lambda: [snapshot.demo(t, s) for t, s in pairs],
+        "demo_many (one style per batch)": per_style(snapshot.demo_many),
+        "demo_many (compare-all grid)": lambda: snapshot.demo_many(grid_thoughts, grid_styles),
+    }
+    report = {"lines": n, "styles": len(styles), "variants": sum(len(s.demo) for s in snapshot.styles.values()),
+              "us_per_line": {}, "speedup_vs_legacy": {}}
+    for name, fn in cases.items():
+        fn()  # warm up
+        report["us_per_line"][name] = round(best_us(fn, n, args.repeat), 3)
+    baseline = report["us_per_line"]["legacy (dict per call)"]
+    for name, us in report["us_per_line"].items():
+        report["speedup_vs_legacy"][name] = round(baseline / us, 1)
+
+    # the batch path must agree with the one-line path
+    assert snapshot.demo_many(grid_thoughts, grid_styles) == [snapshot.demo(t, s) for t, s in pairs]
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
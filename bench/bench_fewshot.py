@@ -0,0 +1,105 @@
+# bench/bench_fewshot.py — prompt size and latency: all few-shot examples vs retrieved top-k
+#
+#   python bench/bench_fewshot.py                      # offline: estimated prompt tokens + selection time
+#   python bench/bench_fewshot.py --k 2 --token-budget 300
+#   python bench/bench_fewshot.py --base-url http://127.0.0.1:8900/v1 --api-key mock --calls 50
+#
+# Offline it compares estimated prompt tokens (vireo.fewshot.estimate_tokens) for every
+# (thought, style) pair of the corpus. With --base-url it also times real completion
+# calls in both modes and reports usage.prompt_tokens from the endpoint.
+#
+# "all examples" is today's whole pool (8 per style). The prompt before retrieval sent
+# each style's first 3 examples (BASELINE_EXAMPLES); the saving against that prompt is
+# the one a deployment sees, and is reported separately.
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.core import build_messages, get_style_block, list_styles, load_modes  # noqa: E402
+from vireo.fewshot import FewShotIndex, message_tokens  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "thoughts.txt"
+BASELINE_EXAMPLES = 3  # pool size per style before the pools grew for retrieval
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def live(args, modes, index, pairs):
+    from openai import OpenAI
+
+    client = OpenAI(api_key=args.api_key, base_url=args.base_url, max_retries=0)
+    out = {}
+    for label, pick in (("all_examples", lambda s, t: None), ("retrieved", index.select)):
+        latencies, prompt_tokens = [], []
+        for style, thought in pairs[: args.calls]:
+            messages = build_messages(modes, style, thought, pick(style, thought))
+            t0 = time.perf_counter()
+            resp = client.chat.completions.create(model=args.model, messages=messages,
+                                                  temperature=0.8, max_tokens=60)
+            latencies.append(time.perf_counter() - t0)
+            if resp.usage is not None:
+                prompt_tokens.append(resp.usage.prompt_tokens)
+        out[label] = {
+            "calls": len(latencies),
+            "latency_ms_p50": round(pct(latencies, 0.5) * 1000, 1),
+            "latency_ms_p95": round(pct(latencies, 0.95) * 1000, 1),
+            "usage_prompt_tokens_mean": round(statistics.mean(prompt_tokens), 1) if prompt_tokens else None,
+        }
+    return out
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Few-shot retrieval vs all-examples prompt benchmark.")
+    p.add_argument("--k", type=int, default=3)
+    p.add_argument("--token-budget", type=int, default=None)
+    p.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint for live timing")
+    p.add_argument("--api-key", default="mock")
+    p.add_argument("--model", default="gpt-3.5-turbo")
+    p.add_argument("--calls", type=int, default=30, help="live calls per mode")
+    args = p.parse_args(argv)
+
+    modes = load_modes()
+    index = FewShotIndex(modes, k=args.k, token_budget=args.token_budget)
+    thoughts = [t for t in CORPUS.read_text(encoding="utf-8").splitlines() if t.strip()]
+    styles = list_styles(modes)
+    pairs = [(s, t) for t in thoughts for s in styles]
+
+    full, baseline, picked, select_us = [], [], [], []
+    for style, thought in pairs:
+        full.append(message_tokens(build_messages(modes, style, thought)))
+        first = get_style_block(modes, style)[2][:BASELINE_EXAMPLES]
+        baseline.append(message_tokens(build_messages(modes, style, thought, first)))
+        t0 = time.perf_counter()
+        examples = index.select(style, thought)
+        select_us.append((time.perf_counter() - t0) * 1e6)
+        picked.append(message_tokens(build_messages(modes, style, thought, examples)))
+
+    report = {
+        "pairs": len(pairs),
+        "k": args.k,
+        "token_budget": args.token_budget,
+        "pool_size_mean": round(statistics.mean(index.pool_size(s) for s in styles), 1),
+        "prompt_tokens_all_examples": round(statistics.mean(full), 1),
+        "prompt_tokens_baseline": round(statistics.mean(baseline), 1),
+        "prompt_tokens_retrieved": round(statistics.mean(picked), 1),
+        "prompt_tokens_saved_vs_all_pct": round(100 * (1 - sum(picked) / sum(full)), 1),
+        "prompt_tokens_saved_vs_baseline_pct": round(100 * (1 - sum(picked) / sum(baseline)), 1),
+        "select_us_p50": round(pct(select_us, 0.5), 1),
+        "select_us_p99": round(pct(select_us, 0.99), 1),
+    }
+    if args.base_url:
+        report["live"] = live(args, modes, index, pairs)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# bench/bench_models.py — compare model profiles per style: latency, tokens, format compliance, cost
+#
+#   python bench/bench_models.py                                  # built-in profiles vs the in-process mock
+#   python bench/bench_models.py --secrets .streamlit/secrets.toml --markdown models.md
+#   python bench/bench_models.py --base-url https://api.openai.com/v1 --api-key sk-... --thoughts 10
+#
+# Runs the same fixed corpus (the first --thoughts lines of bench/thoughts.txt) through
+# every style with every profile (the built-ins plus [models.profiles.*] from --secrets),
+# one request per (profile, style, thought), and scores each line with
+# vireo.candidates.check — the app's own format rules (one line, 0–22 words, no
+# quotes, ...). The recommendation per style is the profile with the lowest p95 among
+# those at or above --min-compliance, cheaper first on a tie; paste it into
+# [models.styles]. The in-process mock gives each model its own latency and invalid
+# rate (--mock-model NAME:LATENCY_MS[:INVALID_RATE]), so the default run only checks
+# the harness; real numbers need --base-url.
+import argparse
+import json
+import statistics
+import sys
+import time
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.candidates import check  # noqa: E402
+from vireo.completions import complete_choices  # noqa: E402
+from vireo.core import build_messages, list_styles, load_modes  # noqa: E402
+from vireo.mock_server import MockConfig, parse_models, start  # noqa: E402
+from vireo.profiles import parse_profiles  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "thoughts.txt"
+MOCK_MODELS = ["gpt-3.5-turbo:450:0.04", "gpt-4o-mini:320:0.06"]
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def run_cell(client, profile, messages_by_thought, concurrency):
+    def one(item):
+        thought, messages = item
+        usage = []
+        t0 = time.perf_counter()
+        try:
+            lines = complete_choices(client, messages, profile.model, profile.temperature, profile.max_tokens,
+                                     on_usage=usage.append)
+        except Exception as e:
+            return time.perf_counter() - t0, None, (type(e).__name__,), usage
+        return time.perf_counter() - t0, lines[0], check(lines[0], thought), usage
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, messages_by_thought))
+    latencies = [r[0] for r in results]
+    prompt = sum(u.prompt_tokens for r in results for u in r[3])
+    completion = sum(u.completion_tokens for r in results for u in r[3])
+    reasons = {}
+    for r in results:
+        for reason in r[2]:
+            reasons[reason] = reasons.get(reason, 0) + 1
+    n = len(results)
+    return {
+        "model": profile.model,
+        "temperature": profile.temperature,
+        "max_tokens": profile.max_tokens,
+        "requests": n,
+        "latency_ms_p50": round(pct(latencies, 0.5) * 1000, 1),
+        "latency_ms_p95": round(pct(latencies, 0.95) * 1000, 1),
+        "latency_ms_p99": round(pct(latencies, 0.99) * 1000, 1),
+        "latency_ms_mean": round(statistics.mean(latencies) * 1000, 1),
+        "prompt_tokens_mean": round(prompt / n, 1),
+        "completion_tokens_mean": round(completion / n, 1),
+        "compliance": round(sum(1 for r in results if not r[2]) / n, 3),
+        "reasons": reasons,
+        "cost_usd_per_1k": round(profile.cost(prompt, completion) / n * 1000, 4),
+        "sample": next((r[1] for r in results if r[1] and not r[2]), None),
+    }
+
+
+def recommend(cells: dict, min_compliance: float) -> dict:
+    """cells: {profile: result} for one style -> {"profile", "why"}."""
+    ok = [(r["latency_ms_p95"], r["cost_usd_per_1k"], name) for name, r in cells.items()
+          if r["compliance"] >= min_compliance]
+    if ok:
+        p95, cost, name = min(ok)
+        return {"profile": name, "why": f"fastest p95 ({p95} ms) at compliance >= {min_compliance}"}
+    name = max(cells, key=lambda n: (cells[n]["compliance"], -cells[n]["latency_ms_p95"]))
+    return {"profile": None, "why": f"no profile reaches {min_compliance}; best compliance: {name} "
+                                    f"({cells[name]['compliance']})"}
+
+
+def markdown(report: dict) -> str:
+    out = ["# Model profiles per style\n",
+           f"{report['thoughts']} thoughts per style, endpoint: {report['endpoint']}, "
+           f"min compliance {report['min_compliance']}.\n",
+           "| style | profile | model | p50 ms | p95 ms | p99 ms | prompt tok | completion tok | compliance "
+           "| $ / 1k | |",
+           "|---|---|---|---:|---:|---:|---:|---:|---:|---:|---|"]
+    for style, cells in report["styles"].items():
+        pick = report["recommended"][style]["profile"]
+        for name, r in cells.items():
+            out.append(f"| {style} | {name} | {r['model']} | {r['latency_ms_p50']} | {r['latency_ms_p95']} "
+                       f"| {r['latency_ms_p99']} | {r['prompt_tokens_mean']} | {r['completion_tokens_mean']} "
+                       f"| {r['compliance']:.1%} | {r['cost_usd_per_1k']} | {'✅' if name == pick else ''} |")
+    out += ["", "```toml", "[models.styles]"]
+    out += [f'{json.dumps(style)} = "{r["profile"]}"' for style, r in report["recommended"].items() if r["profile"]]
+    out += ["```", ""]
+    return "\n".join(out)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Compare model profiles per style and recommend the fastest acceptable.")
+    p.add_argument("--secrets", default=None, help="secrets.toml whose [models.profiles] are added to the built-ins")
+    p.add_argument("--profile", action="append", default=[], help="only these profiles (repeatable)")
+    p.add_argument("--style", action="append", default=[], help="only these styles (repeatable)")
+    p.add_argument("--thoughts", type=int, default=20, help="corpus lines per style")
+    p.add_argument("--min-compliance", type=float, default=0.95)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--base-url", default=None, help="OpenAI-compatible endpoint (default: in-process mock)")
+    p.add_argument("--api-key", default="mock")
+    p.add_argument("--mock-model", action="append", default=None, metavar="NAME:LATENCY_MS[:INVALID_RATE]",
+                   help=f"in-process mock per-model behaviour (default: {' '.join(MOCK_MODELS)})")
+    p.add_argument("--mock-latency-ms", type=float, default=400, help="in-process mock latency for other models")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--json", default=None, help="write the full report here")
+    p.add_argument("--markdown", default=None, help="write a comparison table + [models.styles] suggestion here")
+    args = p.parse_args(argv)
+
+    from openai import OpenAI
+
+    table = {}
+    if args.secrets:
+        table = tomllib.loads(Path(args.secrets).read_text(encoding="utf-8")).get("models", {}).get("profiles", {})
+    profiles = parse_profiles(table)
+    if args.profile:
+        unknown = set(args.profile) - set(profiles)
+        if unknown:
+            p.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+        profiles = {name: profiles[name] for name in args.profile}
+
+    base_url = args.base_url
+    if base_url is None:
+        _, base_url = start(MockConfig(latency_ms=args.mock_latency_ms, sigma=0.3, token_delay_ms=0, seed=args.seed,
+                                       models=parse_models(args.mock_model or MOCK_MODELS)))
+    client = OpenAI(api_key=args.api_key, base_url=base_url, max_retries=0)
+
+    modes = load_modes()
+    styles = args.style or list_styles(modes)
+    thoughts = [t for t in CORPUS.read_text(encoding="utf-8").splitlines() if t.strip()][:args.thoughts]
+
+    report = {"endpoint": args.base_url or "in-process mock", "thoughts": len(thoughts),
+              "min_compliance": args.min_compliance, "styles": {}, "recommended": {}}
+    for style in styles:
+        items = [(t, build_messages(modes, style, t)) for t in thoughts]
+        cells = {name: run_cell(client, profile, items, args.concurrency) for name, profile in profiles.items()}
+        report["styles"][style] = cells
+        report["recommended"][style] = recommend(cells, args.min_compliance)
+        print(f"{style:>12}: " + ", ".join(f"{n} p95 {r['latency_ms_p95']} ms {r['compliance']:.0%}"
+                                           for n, r in cells.items())
+              + f" -> {report['recommended'][style]['profile']}", file=sys.stderr)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.markdown:
+        Path(args.markdown).write_text(markdown(report), encoding="utf-8")
+    print(json.dumps(report["recommended"], indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
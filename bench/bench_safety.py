@@ -0,0 +1,95 @@
+# bench/bench_safety.py — latency budget and smoke accuracy of the local crisis check
+#
+#   python bench/bench_safety.py                       # fails (exit 1) over --budget-us or on a misclassification
+#   python bench/bench_safety.py --budget-us 15 --samples 50000
+#
+# Times vireo.safety.Safety.check per call on bench/thoughts.txt, on long thoughts
+# (the corpus joined into ~500-character paragraphs) and on crisis phrasings, and
+# compares it with the obvious alternatives: a plain list scan (`phrase in text`),
+# one un-factored case-insensitive alternation, and handing the check to a thread
+# (what "running it alongside the request" would cost before doing any work).
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.safety import PATTERNS, PHRASES, Safety  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "thoughts.txt"
+
+# must fire
+CRISIS = [
+    "I want to kill myself", "i dont want to live anymore", "I don’t want to wake up tomorrow",
+    "I keep thinking about suicide", "I've been cutting myself again", "everyone would be better off without me",
+    "there's no reason to live", "I wish I was dead", "quiero morir", "je veux mourir", "ich will sterben",
+    "I took an overdose", "sometimes I want to end it all", "I feel suicidal tonight", "I want to hurt myself",
+]
+# must not fire
+BENIGN = [
+    "This workout is killing me", "I'm dead tired", "my phone died again", "I'm dying to see you",
+    "the deadline will kill me", "I could die of embarrassment", "I can't do this anymore",
+    "I want to diet before summer", "we ended the project", "I live for the weekend",
+]
+
+
+def per_call_us(fn, texts, samples: int) -> dict:
+    timer = time.perf_counter_ns
+    overhead = min(-(timer() - timer()) for _ in range(1000))  # cost of the timer pair itself
+    values = []
+    for i in range(samples):
+        text = texts[i % len(texts)]
+        t0 = timer()
+        fn(text)
+        values.append(max(0, timer() - t0 - overhead) / 1000)
+    values.sort()
+    return {"p50": round(values[len(values) // 2], 2), "p99": round(values[int(len(values) * 0.99)], 2),
+            "max": round(values[-1], 1), "mean": round(statistics.fmean(values), 2)}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Local safety check: per-call latency budget and smoke accuracy.")
+    p.add_argument("--samples", type=int, default=20000, help="timed calls per case")
+    p.add_argument("--budget-us", type=float, default=20.0, help="max p99 µs per check on corpus thoughts")
+    args = p.parse_args(argv)
+
+    safety = Safety()
+    thoughts = [t for t in CORPUS.read_text(encoding="utf-8").splitlines() if t.strip()]
+    paragraphs = [" ".join(thoughts[i:] + thoughts[:i])[:500] for i in range(0, len(thoughts), 3)]
+
+    phrases = [p.lower() for v in PHRASES.values() for p in v]
+    naive = re.compile("|".join([re.escape(p) for p in phrases] + [p for v in PATTERNS.values() for p in v]),
+                       re.IGNORECASE)
+    pool = ThreadPoolExecutor(max_workers=1)
+
+    cases = {
+        "safety.check (thoughts)": (safety.check, thoughts),
+        "safety.check (500-char paragraphs)": (safety.check, paragraphs),
+        "safety.check (crisis, early exit)": (safety.check, CRISIS),
+        "list scan `phrase in text` (thoughts)": (lambda t: any(p in t.lower() for p in phrases), thoughts),
+        "one flat IGNORECASE alternation (thoughts)": (naive.search, thoughts),
+        "thread handoff, no work (submit + result)": (lambda t: pool.submit(len, t).result(), thoughts),
+    }
+    report = {"phrases_and_patterns": safety.size, "pattern_chars": len(safety.pattern), "us_per_call": {}}
+    for name, (fn, texts) in cases.items():
+        report["us_per_call"][name] = per_call_us(fn, texts, args.samples)
+    pool.shutdown()
+
+    missed = [t for t in CRISIS if safety.check(t) is None]
+    false_pos = [t for t in BENIGN if safety.check(t) is not None]
+    false_pos += [t for t in thoughts if safety.check(t) is not None]
+    p99 = report["us_per_call"]["safety.check (thoughts)"]["p99"]
+    report["budget"] = {"p99_us": p99, "budget_us": args.budget_us, "ok": p99 <= args.budget_us}
+    report["accuracy"] = {"crisis_missed": missed, "false_positives": false_pos}
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["budget"]["ok"] and not missed and not false_pos else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+# bench/bench_server.py — requests/sec (and per CPU core) for the headless service
+#
+#   python bench/bench_server.py                          # all scenarios, in-process mock upstream
+#   python bench/bench_server.py --scenarios cached,batch --connections 32 --requests 4000
+#
+# Starts `python -m vireo.server` as a subprocess against a throwaway cache and the
+# mock upstream, then drives it from --connections keep-alive connections. Server
+# CPU time comes from /proc/<pid>/stat, so rps_per_core = requests / server CPU
+# seconds — independent of how many cores the load generator steals.
+#
+# Scenarios: demo (no upstream), cached (warm exact-cache hits), uncached (every
+# thought new, mock latency --latency-ms), batch (POST /v1/batch of --batch items).
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.core import list_styles, load_modes  # noqa: E402
+from vireo.mock_server import MockConfig, start  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "thoughts.txt"
+SCENARIOS = ("demo", "cached", "uncached", "batch")
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+def cpu_seconds(pid: int) -> float:
+    # utime + stime of the server process (fields 14 and 15 of /proc/<pid>/stat)
+    fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class Server:
+    def __init__(self, workdir: Path, base_url: str, demo: bool, args):
+        secrets = workdir / "secrets.toml"
+        secrets.write_text(
+            f'[openai]\napi_key = "mock"\nbase_url = "{base_url}"\n\n'
+            f'[cache]\npath = "{workdir / "cache.db"}"\n\n'
+            f'[semantic]\nenabled = false\n\n'
+            f'[candidates]\nn = {args.n}\n\n'
+            f'[server]\nmax_batch = {args.max_batch}\nmax_wait_ms = {args.max_wait_ms}\nworkers = {args.workers}\n',
+            encoding="utf-8",
+        )
+        cmd = [sys.executable, "-m", "vireo.server", "--port", "0", "--secrets", str(secrets)]
+        if demo:
+            cmd.append("--demo")
+        self.proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        banner = self.proc.stdout.readline()  # "vireo server on http://127.0.0.1:PORT (...)"
+        self.port = int(banner.split("http://", 1)[1].split(" ", 1)[0].rsplit(":", 1)[1])
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+
+def drive(port: int, bodies: list, path: str, connections: int):
+    """POST every body once, spread over keep-alive connections; returns (wall s, latencies, errors)."""
+    latencies, errors = [], []
+    payloads = [b.encode("utf-8") for b in bodies]  # bytes: http.client sends headers + body in one write
+    lock = threading.Lock()
+    cursor = iter(range(len(bodies)))
+
+    def worker():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine = []
+        while True:
+            with lock:
+                i = next(cursor, None)
+            if i is None:
+                break
+            t0 = time.perf_counter()
+            try:
+                conn.request("POST", path, body=payloads[i], headers={"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+            except (OSError, http.client.HTTPException) as e:
+                errors.append(type(e).__name__)
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            mine.append(time.perf_counter() - t0)
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=worker) for _ in range(connections)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - t0, latencies, errors
+
+
+def run(name, args, base_url, styles, thoughts):
+    workdir = Path(tempfile.mkdtemp(prefix="vireo-bench-server-"))
+    server = Server(workdir, base_url, name == "demo", args)
+    try:
+        def body(i, unique=False):
+            thought = thoughts[i % len(thoughts)] + (f" ({uuid.uuid4().hex[:6]})" if unique else "")
+            return {"thought": thought, "style": styles[i % len(styles)]}
+
+        path, per_request = "/v1/translate", 1
+        if name == "batch":
+            path, per_request = "/v1/batch", args.batch
+            bodies = [json.dumps({"items": [body(i * args.batch + j, unique=True) for j in range(args.batch)]})
+                      for i in range(max(1, args.requests // args.batch))]
+        else:
+            bodies = [json.dumps(body(i, unique=name == "uncached")) for i in range(args.requests)]
+        if name == "cached":
+            warm = [json.dumps(body(i)) for i in range(len(thoughts) * len(styles))]
+            drive(server.port, warm[:args.requests], path, args.connections)
+
+        cpu0 = cpu_seconds(server.proc.pid)
+        wall, latencies, errors = drive(server.port, bodies, path, args.connections)
+        cpu = cpu_seconds(server.proc.pid) - cpu0
+        translations = len(bodies) * per_request
+        return {
+            "requests": len(bodies),
+            "translations": translations,
+            "errors": len(errors),
+            "error_kinds": sorted(set(map(str, errors))),
+            "rps": round(len(bodies) / wall, 1),
+            "translations_per_s": round(translations / wall, 1),
+            "server_cpu_s": round(cpu, 2),
+            "rps_per_core": round(len(bodies) / cpu, 1) if cpu else None,
+            "latency_ms_p50": round(pct(latencies, 0.5) * 1000, 2),
+            "latency_ms_p95": round(pct(latencies, 0.95) * 1000, 2),
+        }
+    finally:
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Headless HTTP service load benchmark.")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS))
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--connections", type=int, default=16, help="concurrent keep-alive connections")
+    p.add_argument("--batch", type=int, default=16, help="items per /v1/batch request")
+    p.add_argument("--latency-ms", type=float, default=50, help="mock upstream median latency")
+    p.add_argument("--n", type=int, default=1, help="candidates per upstream call")
+    p.add_argument("--max-batch", type=int, default=32)
+    p.add_argument("--max-wait-ms", type=float, default=5)
+    p.add_argument("--workers", type=int, default=32, help="server upstream threads")
+    args = p.parse_args(argv)
+
+    _, base_url = start(MockConfig(latency_ms=args.latency_ms, sigma=0.2, token_delay_ms=0, seed=1))
+    styles = list_styles(load_modes())
+    thoughts = [t for t in CORPUS.read_text(encoding="utf-8").splitlines() if t.strip()]
+    report = {"cpus": os.cpu_count(), "connections": args.connections, "scenarios": {}}
+    for name in args.scenarios.split(","):
+        report["scenarios"][name] = run(name.strip(), args, base_url, styles, thoughts)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bench/bench_shared.py — quota checks from N worker processes against the shared state
+#
+#   python bench/bench_shared.py                               # SQLite + in-process mock Redis, 1/2/4 workers
+#   python bench/bench_shared.py --backend redis --redis-url redis://127.0.0.1:6379/0 --workers 1 2 4 8
+#
+# Every worker process runs QuotaManager.acquire + record_tokens (what one API-mode
+# Translate click costs) in a loop for --seconds, all on one access code, so every
+# write lands on the same counters — the worst case for contention. Each backend is
+# run write-through (flush_ms=0, read_ttl_ms=0: a round trip per call) and batched
+# (the [shared] defaults). Reports calls/s, the scaling factor against one worker
+# (linear = N) and checks that the shared request count equals the calls admitted.
+# Scaling is capped by the cores the workers get (cpu_count is in the report).
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vireo.quota import QuotaManager, hash_code  # noqa: E402
+from vireo.shared import shared_from_config  # noqa: E402
+
+CODE = "bench"
+MODES = {"write-through": {"flush_ms": 0, "read_ttl_ms": 0}, "batched": {"flush_ms": 200, "read_ttl_ms": 1000}}
+
+
+def worker(cfg, seconds, start, out):
+    state = shared_from_config(cfg)
+    quota = QuotaManager([CODE], per_code_per_minute=1e9, per_code_burst=10**9, global_per_minute=1e12,
+                         global_burst=10**9, daily_requests=10**12, daily_tokens=10**15, state=state)
+    start.wait()
+    calls = admitted = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if quota.acquire(CODE).allowed:
+            admitted += 1
+            quota.record_tokens(CODE, 40)
+        calls += 1
+    state.flush()
+    out.put((calls, admitted, state.stats()))
+    state.close()
+
+
+def run(cfg, workers, seconds):
+    ctx = mp.get_context("fork")
+    start, out = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(cfg, seconds, start, out)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    time.sleep(0.5)  # let every worker open its connection
+    start.set()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    calls = sum(r[0] for r in results)
+    admitted = sum(r[1] for r in results)
+    flushes = sum(r[2]["flushes"] for r in results)
+    state = shared_from_config(dict(cfg, flush_ms=0, read_ttl_ms=0))
+    shared = state.get(f"usage:{date.today().isoformat()}:{hash_code(CODE)}:r")
+    state.close()
+    return {
+        "workers": workers,
+        "calls_per_s": round(calls / seconds),
+        "calls_per_s_per_worker": round(calls / seconds / workers),
+        "backend_writes_per_s": round(flushes / seconds, 1) if cfg.get("flush_ms") else None,
+        "consistent": shared == admitted,
+    }, shared
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Shared-state quota checks: write-through vs batched, 1..N workers.")
+    p.add_argument("--backend", action="append", choices=("sqlite", "redis"), default=None,
+                   help="repeatable (default: both)")
+    p.add_argument("--redis-url", default=None, help="Redis-protocol server (default: in-process mock)")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--json", default=None)
+    args = p.parse_args(argv)
+
+    backends = args.backend or ["sqlite", "redis"]
+    redis_url = args.redis_url
+    if "redis" in backends and redis_url is None:
+        from vireo.mock_redis import start
+
+        _, redis_url = start()
+
+    report = {"cpu_count": os.cpu_count(), "seconds": args.seconds, "runs": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            for mode, timing in MODES.items():
+                rows, base = [], None
+                for i, n in enumerate(args.workers):
+                    prefix = f"bench{os.getpid()}-{backend}-{mode}-{i}:"  # fresh counters per run
+                    cfg = dict(timing, backend=backend, path=str(Path(tmp) / f"{backend}-{mode}-{i}.sqlite3"),
+                               url=redis_url, prefix=prefix)
+                    row, _ = run(cfg, n, args.seconds)
+                    base = base or row["calls_per_s"] / n
+                    row["scaling"] = round(row["calls_per_s"] / base, 2)
+                    rows.append(row)
+                    print(f"{backend:>6} {mode:>13} x{n}: {row['calls_per_s']:>8} calls/s "
+                          f"(x{row['scaling']} of 1 worker) consistent={row['consistent']}", file=sys.stderr)
+                report["runs"][f"{backend} {mode}"] = rows
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    ok = all(r["consistent"] for rows in report["runs"].values() for r in rows)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
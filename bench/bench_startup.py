@@ -0,0 +1,170 @@
+# bench/bench_startup.py — cold-start and rerun profile of Home.py and the pages
+#
+#   python bench/bench_startup.py                        # every script, 3 cold processes each
+#   python bench/bench_startup.py --scripts home,page --repeat 5 --reruns 20
+#
+# Every sample is a fresh interpreter (python -X importtime), like a scale-to-zero
+# instance taking its first request. It reports: process start to first rendered
+# run, the streamlit import, the first script run, the import time the script itself
+# added (and its slowest top-level packages), which heavy dependencies got loaded, and
+# warm rerun percentiles. The Translate page is also profiled after switching to API
+# mode (against an in-process mock), where the heavy imports are expected to happen.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = {
+    "home": ROOT / "Home.py",
+    "page": ROOT / "pages" / "01_Translate_My_Thought.py",
+    "legacy": ROOT / "translate_my_thought.py",
+}
+HEAVY = ("openai", "httpx", "PIL", "numpy")
+MARK = "vireo-bench-startup: script begins"
+CODE = "BENCH-CODE"
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+# -------------------------
+# Child: one cold process
+# -------------------------
+def child(script: str, api: bool, reruns: int):
+    started = time.perf_counter()
+    sys.path.insert(0, str(ROOT))
+    os.chdir(ROOT)  # Home.py resolves assets relative to the working directory
+    from streamlit.testing.v1 import AppTest
+    streamlit_ms = (time.perf_counter() - started) * 1000
+
+    base_url = None
+    if api:
+        from vireo.mock_server import MockConfig, start
+        _, base_url = start(MockConfig(latency_ms=1, sigma=0.1, token_delay_ms=0, seed=1))
+
+    at = AppTest.from_file(script, default_timeout=60)
+    at.secrets["openai"] = {"api_key": "bench", "base_url": base_url or "http://127.0.0.1:9/v1"}
+    at.secrets["paywall"] = {"codes": [CODE]}
+    at.secrets["cache"] = {"path": ""}
+    at.secrets["semantic"] = {"enabled": False}
+    at.secrets["quota"] = {"path": ""}
+
+    print(MARK, file=sys.stderr, flush=True)
+    t0 = time.perf_counter()
+    at.run()
+    first_ms = (time.perf_counter() - t0) * 1000
+    out = {"streamlit_ms": streamlit_ms, "first_run_ms": first_ms,
+           "ready_ms": (time.perf_counter() - started) * 1000,
+           "exceptions": [e.value for e in at.exception]}
+    out["heavy_after_first_run"] = [m for m in HEAVY if m in sys.modules]
+
+    if api:
+        t0 = time.perf_counter()
+        at.sidebar.radio[0].set_value("API (paid)").run()
+        at.sidebar.text_input[0].input(CODE).run()
+        out["api_switch_ms"] = (time.perf_counter() - t0) * 1000
+        out["heavy_after_api"] = [m for m in HEAVY if m in sys.modules]
+        out["exceptions"] += [e.value for e in at.exception]
+
+    samples = []
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - t0) * 1000)
+    out["rerun_ms"] = samples
+    print(json.dumps(out))
+
+
+# -------------------------
+# Parent: spawn, parse -X importtime, aggregate
+# -------------------------
+def script_imports(stderr: str) -> tuple:
+    """(total ms, [(package, ms)]) for top-level imports made after MARK."""
+    after = stderr.split(MARK, 1)[1] if MARK in stderr else ""
+    packages = {}
+    for line in after.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue  # nested import, counted in its parent's cumulative time
+        name = name.strip()
+        packages[name] = packages.get(name, 0) + int(cumulative) / 1000
+    top = sorted(packages.items(), key=lambda kv: -kv[1])
+    return sum(packages.values()), top
+
+
+def sample(script: Path, api: bool, reruns: int) -> dict:
+    cmd = [sys.executable, "-X", "importtime", __file__, "--child", str(script), "--reruns", str(reruns)]
+    if api:
+        cmd.append("--api")
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT, timeout=300)
+    wall_ms = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{script.name}: child failed\n{proc.stderr[-2000:]}")
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    out["process_ms"] = wall_ms
+    out["script_import_ms"], out["top_imports"] = script_imports(proc.stderr)
+    return out
+
+
+def summarize(samples: list) -> dict:
+    def median(key):
+        values = [s[key] for s in samples if key in s]
+        return round(statistics.median(values), 1) if values else None
+
+    reruns = [x for s in samples for x in s["rerun_ms"]]
+    last = samples[-1]
+    report = {
+        "process_ms": median("process_ms"),
+        "ready_ms": median("ready_ms"),
+        "streamlit_import_ms": median("streamlit_ms"),
+        "first_run_ms": median("first_run_ms"),
+        "script_import_ms": median("script_import_ms"),
+        "top_imports_ms": {name: round(ms, 1) for name, ms in last["top_imports"][:6]},
+        "heavy_after_first_run": last["heavy_after_first_run"],
+        "rerun_ms": {"p50": round(pct(reruns, 0.5), 1), "p95": round(pct(reruns, 0.95), 1)},
+        "exceptions": sorted({e for s in samples for e in s["exceptions"]}),
+    }
+    if "api_switch_ms" in last:
+        report["api_switch_ms"] = median("api_switch_ms")
+        report["heavy_after_api"] = last["heavy_after_api"]
+    return report
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Cold-start / rerun profiler for the Streamlit scripts.")
+    p.add_argument("--scripts", default=",".join(SCRIPTS), help=f"comma-separated: {', '.join(SCRIPTS)}")
+    p.add_argument("--repeat", type=int, default=3, help="cold processes per script (medians are reported)")
+    p.add_argument("--reruns", type=int, default=10, help="warm reruns per process")
+    p.add_argument("--json", default=None, help="also write results to this JSON file")
+    p.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    p.add_argument("--api", action="store_true", help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.api, args.reruns)
+        return 0
+
+    report = {}
+    for name in args.scripts.split(","):
+        name = name.strip()
+        report[name] = summarize([sample(SCRIPTS[name], False, args.reruns) for _ in range(args.repeat)])
+        if name == "page":
+            report["page (api)"] = summarize([sample(SCRIPTS[name], True, args.reruns) for _ in range(args.repeat)])
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
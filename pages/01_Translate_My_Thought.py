@@ -1,8 +1,23 @@
 import streamlit as st
-from openai import OpenAI
-import json, random, urllib.parse
+import random, time, urllib.parse, uuid
 from streamlit.components.v1 import html
 from pathlib import Path
+from vireo.cache import cache_from_config
+from vireo.candidates import reranker_from_config
+from vireo.cards import MIME, cards_from_config
+from vireo.fanout import fanout_from_config
+from vireo.history import history_from_config
+from vireo.jobs import QUEUED, QueueFullError, jobs_from_config
+from vireo.metrics import metrics_from_config
+from vireo.profiles import MAX_TOKENS, MODEL, TEMPERATURE, profiles_from_config  # default profile; per-style from [models]
+from vireo.quota import Charge, quota_from_config
+from vireo.registry import StyleRegistry
+from vireo.resilience import CLOSED, CircuitOpenError, resilience_from_config
+from vireo.safety import safety_from_config
+from vireo.shared import shared_from_config
+from vireo.singleflight import SingleFlight
+
+rerun_started = time.perf_counter()
 
 # -------------------------
 # Config
@@ -13,41 +28,222 @@ PAGE_TITLE = "Translate My Thought"
 # -------------------------
 # Data
 # -------------------------
-with open("poetic_modes.json", "r", encoding="utf-8") as f:
-    poetic_modes = json.load(f)
-
-# Build style list (exclude _meta)
-style_names = [k for k in poetic_modes.keys() if k != "_meta"]
-
-# Helper to pull prompt/desc and examples for a style
-def get_style_block(modes, name):
-    block = modes[name]
-    if isinstance(block, dict):
-        prompt = block.get("prompt", "")
-        examples = block.get("examples", [])
-    else:
-        prompt = str(block)
-        examples = []
-    desc = prompt.split(".")[0].strip() if prompt else ""
-    return prompt, desc, examples
-
-# Build messages with system prefix + style prompt + few-shots + user
-def build_messages(modes, style_name, user_text):
-    sys_prefix = modes["_meta"]["system_prefix"]
-    style_prompt, _, examples = get_style_block(modes, style_name)
-
-    msgs = [
-        {"role": "system", "content": sys_prefix},
-        {"role": "system", "content": style_prompt},
-    ]
-    for ex in examples:
-        t = ex.get("thought", "").strip()
-        l = ex.get("line", "").strip()
-        if t and l:
-            msgs.append({"role": "user", "content": t})
-            msgs.append({"role": "assistant", "content": l})
-    msgs.append({"role": "user", "content": user_text.strip()})
-    return msgs
+# Parsed + validated once per process; edits to poetic_modes.json go live on the next rerun
+@st.cache_resource
+def get_style_registry():
+    return StyleRegistry()
+
+style_registry = get_style_registry()
+styles_snapshot = style_registry.current()
+style_names = list(styles_snapshot.names)
+
+# -------------------------
+# Metrics (stage timings, token usage; optional /metrics endpoint + JSONL log)
+# -------------------------
+@st.cache_resource
+def get_metrics():
+    try:
+        cfg = st.secrets["metrics"]
+    except Exception:
+        cfg = {}
+    return metrics_from_config(cfg)
+
+metrics = get_metrics()
+
+# -------------------------
+# Translation cache (one per process; SQLite tier shared across workers)
+# -------------------------
+@st.cache_resource
+def get_translation_cache():
+    try:
+        cfg = st.secrets["cache"]
+    except Exception:
+        cfg = {}
+    return cache_from_config(cfg)
+
+translation_cache = get_translation_cache()
+
+# The getters below are only reached on the API path, so they import their heavy
+# dependencies (numpy, httpx/openai) themselves instead of at the top of the page.
+
+# Near-duplicate thoughts ("I feel stuck" ~ "feeling so stuck lately") served from past lines
+@st.cache_resource
+def get_semantic_index():
+    from vireo.semantic import semantic_from_config
+    try:
+        cfg = st.secrets["semantic"]
+    except Exception:
+        cfg = {}
+    return semantic_from_config(cfg)
+
+# One pooled OpenAI client per (api key, base url) for the whole process
+@st.cache_resource
+def get_client_registry():
+    from vireo.clients import registry_from_config
+    try:
+        cfg = st.secrets["openai_pool"]
+    except Exception:
+        cfg = {}
+    return registry_from_config(cfg)
+
+# Record/replay of completions for reproducible offline runs (None unless [cassette] is set)
+@st.cache_resource
+def get_cassette():
+    from vireo.cassette import cassette_from_config
+    try:
+        cfg = st.secrets["cassette"]
+    except Exception:
+        cfg = {}
+    return cassette_from_config(cfg)
+
+# Timeouts / retries / hedging / circuit breaker, one per upstream base url
+@st.cache_resource
+def get_resilience(base_url: str):
+    try:
+        cfg = st.secrets["resilience"]
+    except Exception:
+        cfg = {}
+    return resilience_from_config(cfg)
+
+# State every worker process shares (usage counters, recent lines): SQLite WAL or Redis,
+# writes batched in the background, reads cached for a moment
+@st.cache_resource
+def get_shared_state():
+    try:
+        cfg = st.secrets["shared"]
+    except Exception:
+        cfg = {}
+    return shared_from_config(cfg)
+
+shared_state = get_shared_state()
+
+# Hashed access codes + per-code/global token buckets + daily usage (shared across workers)
+@st.cache_resource
+def get_quota(codes: tuple):
+    try:
+        cfg = st.secrets["quota"]
+    except Exception:
+        cfg = {}
+    return quota_from_config(codes, cfg, state=shared_state)
+
+# Identical in-flight requests from any session share one upstream call
+@st.cache_resource
+def get_single_flight():
+    return SingleFlight()
+
+single_flight = get_single_flight()
+
+# n choices per call, checked locally against the one-line format; best one wins
+@st.cache_resource
+def get_reranker():
+    try:
+        cfg = st.secrets["candidates"]
+    except Exception:
+        cfg = {}
+    return reranker_from_config(cfg)
+
+reranker = get_reranker()
+
+# Local crisis / self-harm check (a few µs, no network): a hit gets a supportive line
+# and help resources instead of a translation, in Demo and API mode alike
+@st.cache_resource
+def get_safety():
+    try:
+        cfg = st.secrets["safety"]
+    except Exception:
+        cfg = {}
+    return safety_from_config(cfg)
+
+safety = get_safety()
+
+# Model + sampling per style (bench/bench_models.py picks them); one profile without [models]
+@st.cache_resource
+def get_profiles():
+    try:
+        cfg = st.secrets["models"]
+    except Exception:
+        cfg = {}
+    return profiles_from_config(cfg, MODEL, TEMPERATURE, MAX_TOKENS)
+
+profiles = get_profiles()
+
+# Cache -> near-duplicates -> single-flight -> upstream, shared with vireo.server
+# (k most relevant few-shot examples per request, rebuilt when the registry reloads)
+@st.cache_resource(max_entries=4)
+def get_translator(api_key: str, base_url: str):
+    from vireo.translator import Translator
+    try:
+        cfg = st.secrets["fewshot"]
+    except Exception:
+        cfg = {}
+    client = get_client_registry().get(api_key, base_url)
+    cassette = get_cassette()
+    if cassette is not None:
+        client = cassette.wrap(client)
+    return Translator(
+        style_registry, translation_cache,
+        client=client, resilience=get_resilience(base_url or ""),
+        model=MODEL, temperature=TEMPERATURE, max_tokens=MAX_TOKENS,
+        semantic=get_semantic_index(), reranker=reranker, single_flight=single_flight, metrics=metrics,
+        fewshot_cfg=cfg, safety=safety, profiles=profiles,
+    )
+
+# Translations run here, off the script thread; the page only keeps a job id
+@st.cache_resource
+def get_job_queue():
+    try:
+        cfg = st.secrets["jobs"]
+    except Exception:
+        cfg = {}
+    return jobs_from_config(cfg, observe=metrics.observe)
+
+job_queue = get_job_queue()
+
+# Share-card images: rendered in a small process pool, cached on disk by content hash
+@st.cache_resource
+def get_card_renderer():
+    try:
+        cfg = st.secrets["cards"]
+    except Exception:
+        cfg = {}
+    return cards_from_config(cfg, styles=style_names)
+
+# Shared pool for "Compare all styles" (global concurrency cap per process)
+@st.cache_resource
+def get_fanout():
+    try:
+        cfg = st.secrets["fanout"]
+    except Exception:
+        cfg = {}
+    return fanout_from_config(cfg)
+
+# Recent lines per session in one bounded store per process (a cache over the shared
+# state, when there is one); session_state only keeps the id
+@st.cache_resource
+def get_history():
+    try:
+        cfg = st.secrets["history"]
+    except Exception:
+        cfg = {}
+    return history_from_config(cfg, shared=shared_state)
+
+history = get_history()
+try:
+    resume_history = bool(st.secrets["history"].get("resume", False))
+except Exception:
+    resume_history = False
+if "history_id" not in st.session_state:
+    # resume: the id rides in the URL (?h=), so a reconnect that lands on another worker
+    # finds the same lines; anyone with that URL sees them too, hence opt-in
+    st.session_state.history_id = (resume_history and shared_state is not None
+                                   and st.query_params.get("h")) or uuid.uuid4().hex
+history_id = st.session_state.history_id
+if resume_history and shared_state is not None and st.query_params.get("h") != history_id:
+    st.query_params["h"] = history_id
+
+def remember(thought: str, style: str, line: str):
+    if history is not None and line:
+        history.add(history_id, thought, style, line)
 
 # -------------------------
 # Page / Theme
@@ -80,10 +276,14 @@ st.markdown(f"""
     </style>
 """, unsafe_allow_html=True)
 
-# Load modern theme CSS from /assets (works when running inside /pages)
-css_path = Path(__file__).parent.parent / "assets" / "vireo_theme.css"
-if css_path.exists():
-    theme_css = css_path.read_text(encoding="utf-8")
+# Load modern theme CSS from /assets (works when running inside /pages); read once per process
+@st.cache_resource
+def get_theme_css():
+    css_path = Path(__file__).parent.parent / "assets" / "vireo_theme.css"
+    return css_path.read_text(encoding="utf-8") if css_path.exists() else None
+
+theme_css = get_theme_css()
+if theme_css is not None:
     st.markdown(f"<style>{theme_css}</style>", unsafe_allow_html=True)
 else:
     st.warning("⚠️ Theme CSS not found at assets/vireo_theme.css")
@@ -108,7 +308,13 @@ try:
 except Exception:
     checkout_url = None
 
+stream_tokens = False
+resilience = None
+translator = None
+quota = None
+access_code = ""
 if mode == "API (paid)":
+    secrets_started = time.perf_counter()
     valid_codes = []
     try:
         cfg = st.secrets["paywall"]
@@ -128,8 +334,15 @@ if mode == "API (paid)":
         api_key = st.secrets["openai"]["api_key"]
     except Exception:
         api_key = None
+    base_url = None
+    try:
+        base_url = st.secrets["openai"].get("base_url", None)
+    except Exception:
+        base_url = None
+    metrics.observe("vireo_stage_seconds", time.perf_counter() - secrets_started, stage="secrets")
 
-    code_ok = (access_code.strip() in valid_codes) if valid_codes else False
+    quota = get_quota(tuple(valid_codes))
+    code_ok = quota.is_valid(access_code)
     api_ok  = api_key is not None and len(api_key.strip()) > 0
 
     if not code_ok or not api_ok:
@@ -138,21 +351,111 @@ if mode == "API (paid)":
             st.sidebar.markdown("<span class='error-pill'>Invalid or missing access code</span>", unsafe_allow_html=True)
         if not api_ok:
             st.sidebar.markdown("<span class='error-pill'>Missing OpenAI API key</span>", unsafe_allow_html=True)
-        client = None
         demo_mode = True
     else:
-        st.markdown(f"<div class='status-pill'>API mode</div>", unsafe_allow_html=True)
-        client = OpenAI(api_key=api_key)
+        resilience = get_resilience(base_url or "")
+        circuit = resilience.breaker.state
+        pill = "API mode" if circuit == CLOSED else f"API mode · circuit {circuit}"
+        st.markdown(f"<div class='status-pill'>{pill}</div>", unsafe_allow_html=True)
+        translator = get_translator(api_key.strip(), base_url)
         demo_mode = False
+        # st.write_stream needs Streamlit ≥ 1.31
+        stream_tokens = hasattr(st, "write_stream") and st.sidebar.checkbox("Stream tokens", value=True)
+        left = quota.remaining(access_code)
+        st.sidebar.caption(
+            f"Today: {left['requests_left']}/{left['daily_requests']} translations · "
+            f"{left['tokens_left']:,}/{left['daily_tokens']:,} tokens left"
+        )
+
+    if style_registry.last_error:
+        st.sidebar.markdown("<span class='error-pill'>poetic_modes.json edit rejected</span>", unsafe_allow_html=True)
+        st.sidebar.caption(style_registry.last_error)
+
+    with st.sidebar.expander("Cache"):
+        cs = translation_cache.stats()
+        st.caption(
+            f"Hit rate {cs['hit_rate']:.0%} · memory hits {cs['memory_hits']} · "
+            f"disk hits {cs['disk_hits']} · misses {cs['misses']}"
+        )
+        st.caption(f"Entries: {cs['memory_entries']} in memory, {cs.get('disk_entries', 0)} on disk")
+        semantic_index = get_semantic_index()
+        if semantic_index is not None:
+            ss = semantic_index.stats()
+            p50 = "n/a" if ss["lookup_us_p50"] is None else f"{ss['lookup_us_p50']:.0f} µs"
+            st.caption(
+                f"Near-duplicate hits {ss['hits']}/{ss['lookups']} ({ss['hit_rate']:.0%}) · lookup p50 {p50} · "
+                f"{ss['size']:,} thoughts indexed ({ss['index_bytes'] / 2**20:.1f} MiB)"
+            )
+        if shared_state is not None:
+            sh = shared_state.stats()
+            st.caption(
+                f"Shared state ({sh['backend']}): {sh['writes']} writes in {sh['flushes']} flushes "
+                f"({sh['ops_per_flush']} per flush) · {sh['pending']} pending · "
+                f"read hit rate {sh['read_hit_rate']:.0%} · {sh['errors']} errors"
+            )
+        sf = single_flight.stats()
+        st.caption(f"Coalesced {sf['coalesced']} of {sf['calls'] + sf['coalesced']} upstream requests · {sf['in_flight']} in flight")
+        card_renderer = get_card_renderer()
+        if card_renderer is not None:
+            ks = card_renderer.stats()
+            p95 = "n/a" if ks["render_ms_p95"] is None else f"{ks['render_ms_p95']} ms"
+            st.caption(
+                f"Share cards: {ks['hits']} served from disk · {ks['renders']} rendered (p95 {p95}) · "
+                f"{ks['rejected']} rejected · {ks['timeouts']} timed out"
+            )
+
+    if resilience is not None:
+        with st.sidebar.expander("Upstream health"):
+            rs = resilience.stats()
+            p95 = "n/a" if rs["p95_ms"] is None else f"{rs['p95_ms']} ms"
+            st.caption(
+                f"Circuit {rs['state']} · p95 {p95} · {rs['calls']} calls · {rs['retries']} retries · "
+                f"{rs['failures']} failures · {rs['short_circuits']} short-circuited · "
+                f"{rs['hedges']} hedged ({rs['hedge_wins']} won)"
+            )
+            if reranker is not None:
+                ks = reranker.stats()
+                reasons = ", ".join(f"{k} {v}" for k, v in sorted(ks["reasons"].items(), key=lambda kv: -kv[1]))
+                st.caption(
+                    f"Candidates: {ks['n']} per call · {ks['reject_rate']:.0%} rejected"
+                    f"{f' ({reasons})' if reasons else ''} · {ks['none_valid']} with no valid choice · "
+                    f"{ks['reasks_avoided']} re-asks avoided (~{ks['saved_seconds']:.1f} s saved)"
+                )
+
+    with st.sidebar.expander("Connection pool"):
+        pools = get_client_registry().stats()
+        if not pools:
+            st.caption("No client yet.")
+        for p in pools:
+            conns = "n/a" if p["open_connections"] is None else f"{p['open_connections']} open / {p['idle_connections']} idle"
+            st.caption(
+                f"{p['base_url']} · key …{p['key'][-4:]} · {p['requests']} requests · "
+                f"{p['active']} active (peak {p['peak_active']}) · {conns} of {p['max_connections']} · "
+                f"{p['upstream_errors']} upstream errors"
+            )
+        cassette = get_cassette()
+        if cassette is not None:
+            cs = cassette.stats()
+            st.caption(
+                f"Cassette ({cs['mode']}): {cs['hits']} replayed · {cs['misses']} missed · {cs['recorded']} recorded · "
+                f"{cs['recordings']} recordings of {cs['requests']} requests ({cs['bytes'] / 1024:.0f} KiB)"
+            )
+
+    with st.sidebar.expander("Job queue"):
+        js = job_queue.stats()
+        wait_p95 = "n/a" if js["wait_ms_p95"] is None else f"{js['wait_ms_p95']} ms"
+        st.caption(
+            f"{js['queued']} queued · {js['running']}/{js['max_workers']} running · wait p95 {wait_p95} · "
+            f"{js['done']} done · {js['failed']} failed · {js['cancelled']} cancelled · {js['rejected']} rejected (queue full)"
+        )
 else:
     st.markdown(f"<div class='status-pill'>Demo mode</div>", unsafe_allow_html=True)
-    client = None
     demo_mode = True
 
 # -------------------------
 # Style picker (Surprise + Dropdown)
 # -------------------------
-if "style_select" not in st.session_state:
+if st.session_state.get("style_select") not in style_names:  # first run, or style removed by a reload
     st.session_state.style_select = style_names[0]
 
 col1, col2 = st.columns([1, 3])
@@ -163,7 +466,7 @@ with col1:
 with col2:
     selected_style = st.selectbox("Poetic Style", style_names, key="style_select")
 
-style_prompt, style_desc, _ = get_style_block(poetic_modes, selected_style)
+style_desc = styles_snapshot.styles[selected_style].description
 if style_desc:
     st.markdown(f"<p style='color:{VIREO_GREEN}; font-style:italic;'>“{style_desc}.”</p>", unsafe_allow_html=True)
 
@@ -172,37 +475,6 @@ if style_desc:
 # -------------------------
 user_input = st.text_area("Your thought:", placeholder="e.g. 'I feel stuck and overwhelmed.'", height=100)
 
-# -------------------------
-# Demo translator (no API)
-# -------------------------
-def demo_translate(thought: str, style: str) -> str:
-    t = (thought or "this moment").strip()
-    samples = {
-        "Poetic": f"Like tide over stone, {t} learns to soften.",
-        "Stoic": f"{t.capitalize()} is opinion; choose the next right action.",
-        "Shakespearean": f"{t} weighs the hour; still, I answer dawn.",
-        "Deep": f"The root of {t} is asking to be seen.",
-        "Comic": f"{t}? You’re not broken—you’re buffering. Try a heart refresh.",
-        "Zen": f"{t} is a cloud; the sky remains.",
-        "Mystical": f"Within {t}, a hidden lantern waits for your name.",
-        "Mythic Mirror": f"You stand at the gate of {t}; the key is your true name.",
-        "Haiku": f"{t} in one breath— old knots loosening— spring finds a door",
-        "Lyrical": f"I hum through {t} till the melody turns me light.",
-        "Oracular": f"From {t}, a sign: choose the narrow way and become wide.",
-        "Surrealist": f"{t} grew feathers; the clock drank the sea.",
-        "Romantic": f"In {t}, the heart still hears a distant, faithful lighthouse.",
-        "Minimalist": f"{t}. Then—space.",
-        "Elegiac": f"I lay down the old name of {t} and listen for the quiet.",
-        "Epic/Grand": f"Across the ridge of {t}, your small step moves the mountain.",
-        "Satirical": f"{t}? Install fewer chaos-plugins.",
-        "Ecstatic (Rumi-style)": f"Beloved, even {t} is a doorway wearing your face.",
-        "Journal-style": f"Today felt like {t}. One truthful line eased it.",
-        "Rap/Spoken Word": f"{t} in my chest—ride the beat, let the walls confess.",
-        "Childlike": f"{t} feels big. I am bigger.",
-        "Cinematic": f"The room tightens with {t}; a window brightens—you exhale."
-    }
-    return samples.get(style, f"{t} turns toward light.")
-
 # -------------------------
 # Copy-to-clipboard (no deps)
 # -------------------------
@@ -219,37 +491,243 @@ def copy_button(text: str, label: str = "📋 Copy line"):
 # -------------------------
 # Translate
 # -------------------------
+# Runs on fan-out / job threads, so no st.* calls here. on_usage is the Charge's
+# record(): upstream answers (and their tokens) count against the access code.
+# Returns (line, safe); safe is False when the safety check swapped in the supportive line.
+def translate_line(style: str, thought: str, on_usage=None) -> tuple:
+    if demo_mode:
+        return styles_snapshot.demo(thought, style), True
+    return translator.translate_vetted(style, thought, on_usage=on_usage)
+
+# Job bodies run on the job queue's threads: no st.* calls, results go on the job
+def single_job(style: str, thought: str, stream: bool, on_usage=None):
+    def run(job):
+        if not stream:
+            line, safe = translate_line(style, thought, on_usage)
+            return {"line": line, "safety": not safe}
+
+        def show(text):
+            job.partial = text
+
+        out = translator.stream(style, thought, on_usage=on_usage, on_text=show)
+        if out["safety"]:
+            return {"line": out["line"], "safety": True}  # the check tripped mid-stream
+        if out["ttft"] is None:
+            return {"line": out["line"]}  # cached, or another session was already fetching it
+        return {"line": out["line"],
+                "caption": f"First token in {out['ttft'] * 1000:.0f} ms · full line in {out['total'] * 1000:.0f} ms"}
+    return run
+
+def compare_job(fanout, thought: str, on_usage=None):
+    flagged = set()  # styles whose line is the supportive one
+
+    def line_for(style, thought):
+        line, safe = translate_line(style, thought, on_usage)
+        if not safe:
+            flagged.add(style)
+        return line
+
+    def run(job):
+        job.partial = {}
+        results = fanout.run(line_for, style_names, thought)
+        for style, line, err, seconds in results:
+            if job.cancelled:
+                results.close()  # waits for calls in flight: the Charge settles after their usage
+                break
+            job.partial = {**job.partial, style: (line, err, seconds)}
+        return {"lines": job.partial, "safety": flagged}
+    return run
+
+def render_grid(results: dict, thought: str):
+    grid = st.columns(3)
+    for i, name in enumerate(style_names):
+        if name not in results:
+            grid[i % 3].caption(f"{name} …")
+            continue
+        line, err, seconds = results[name]
+        note = ""
+        if err is not None:
+            line = styles_snapshot.demo(thought, name)
+            note = " · demo fallback"
+        grid[i % 3].markdown(f"**{name}** · {seconds * 1000:.0f} ms{note}\n\n{line}")
+
+def render_pending(active: dict, job):
+    waited = time.monotonic() - job.submitted_at
+    status = "Queued" if job.status == QUEUED else "Translating"
+    if active["compare"]:
+        st.markdown("### 🌸 Your Lines:")
+        st.caption(f"{status} … {waited:.1f} s")
+        render_grid(job.partial or {}, active["thought"])
+    elif job.partial:
+        st.markdown("### 🌸 Your Line:")
+        st.markdown(job.partial + " ▌")
+    else:
+        st.caption(f"{status} … {waited:.1f} s")
+
+# Finished job -> page; returns the line to share (None: nothing to share or remember)
+def render_finished(active: dict, job):
+    style, thought = active["style"], active["thought"]
+    if active["compare"]:
+        st.markdown("### 🌸 Your Lines:")
+        results = job.result or {"lines": {}, "safety": set()}
+        render_grid(results["lines"], thought)
+        if results["safety"]:
+            st.info(safety.resources)
+            if style in results["safety"]:
+                return None
+        line, err, _ = results["lines"].get(style, (None, None, 0))
+        return line if err is None else styles_snapshot.demo(thought, style)
+    if isinstance(job.error, CircuitOpenError):
+        st.info("The translation service is recovering — here is a Demo line meanwhile.")
+        line = styles_snapshot.demo(thought, style)
+        st.success(line)
+        return line
+    if job.error is not None:
+        st.error(f"API error: {job.error}")
+        st.info("Falling back to Demo.")
+        line = styles_snapshot.demo(thought, style)
+        st.success(line)
+        return line
+    st.markdown("### 🌸 Your Line:")
+    st.success(job.result["line"])
+    if job.result.get("safety"):
+        st.info(safety.resources)
+        return None  # the supportive line: no share links, card or history entry
+    if job.result.get("caption"):
+        st.caption(job.result["caption"])
+    return job.result["line"]
+
+# Reruns only itself while the job runs; hands over to a full run once it is finished
+def poll_translation():
+    active = st.session_state.get("translate_job")
+    job = job_queue.get(active["id"]) if active else None
+    if job is None or not job.pending:
+        st.rerun()
+    render_pending(active, job)
+
+if hasattr(st, "fragment"):  # Streamlit ≥ 1.37
+    poll_translation = st.fragment(run_every=0.3)(poll_translation)
+
+compare_all = st.checkbox("🪞 Compare all styles", help="Translate this thought in every style at once")
+
+# Editing the thought (or switching style) makes a pending line stale: cancel it
+active = st.session_state.get("translate_job")
+if active is not None and (active["thought"] != user_input
+                           or (not active["compare"] and active["style"] != selected_style)):
+    job_queue.cancel(active["id"])
+    del st.session_state["translate_job"]
+    active = None
+
 poetic_response = None
+charge = None
 if st.button("Translate"):
+    if active is not None:
+        job_queue.cancel(active["id"])
+        del st.session_state["translate_job"]
+        active = None
+    verdict = safety.check(user_input) if safety is not None else None
+    if not demo_mode and user_input.strip() and verdict is None:
+        n = len(style_names) if compare_all else 1
+        decision = quota.acquire(access_code, n)
+        if decision.allowed:
+            charge = Charge(quota, access_code, n)  # settled when the job is over
+        else:
+            wait = f" (try again in {decision.retry_after:.0f}s)" if decision.retry_after >= 1 else ""
+            st.info(f"{decision.reason.capitalize()}{wait} — here is a Demo line meanwhile.")
+            demo_mode = True
     if not user_input.strip():
         st.warning("Please enter a thought to translate.")
-    else:
-        if demo_mode:
-            poetic_response = demo_translate(user_input, selected_style)
+    elif verdict is not None:
+        # never reaches the model or the quota, and gets no share links
+        metrics.inc("vireo_safety_overrides_total", stage="input", category=verdict.category, style=selected_style)
+        st.markdown("### 💚 You are not alone")
+        st.success(safety.supportive(user_input))
+        st.info(safety.resources)
+    elif demo_mode:
+        poetic_response = styles_snapshot.demo(user_input, selected_style)
+        remember(user_input, selected_style, poetic_response)
+        if compare_all:
+            st.markdown("### 🌿 Your Lines (Demo):")
+            lines = styles_snapshot.demo_many([user_input] * len(style_names), style_names)
+            render_grid({name: (line, None, 0.0) for name, line in zip(style_names, lines)}, user_input)
+        else:
             st.markdown("### 🌿 Your Line (Demo):")
             st.success(poetic_response)
+    else:
+        on_usage = charge.record if charge is not None else None
+        if compare_all:
+            fn = compare_job(get_fanout(), user_input, on_usage)
         else:
-            try:
-                messages = build_messages(poetic_modes, selected_style, user_input)
-                resp = client.chat.completions.create(
-                    model="gpt-3.5-turbo",  # or "gpt-4o-mini"
-                    messages=messages,
-                    temperature=0.8,
-                    max_tokens=60
-                )
-                poetic_response = resp.choices[0].message.content.strip()
-                st.markdown("### 🌸 Your Line:")
-                st.success(poetic_response)
-            except Exception as e:
-                st.error(f"API error: {e}")
-                st.info("Falling back to Demo.")
-                poetic_response = demo_translate(user_input, selected_style)
-                st.success(poetic_response)
+            fn = single_job(selected_style, user_input, stream_tokens, on_usage)
+        try:
+            job_id = job_queue.submit(fn, label="compare" if compare_all else "single")
+        except QueueFullError as e:
+            if charge is not None:
+                charge.settle()  # never queued: nothing was used
+            st.info(f"{e} — here is a Demo line meanwhile.")
+            poetic_response = styles_snapshot.demo(user_input, selected_style)
+            remember(user_input, selected_style, poetic_response)
+            st.success(poetic_response)
+        else:
+            if charge is not None:
+                # also runs for jobs cancelled before they started
+                job_queue.get(job_id).future.add_done_callback(lambda _, c=charge: c.settle())
+            active = st.session_state["translate_job"] = {
+                "id": job_id, "style": selected_style, "thought": user_input, "compare": compare_all,
+            }
+
+if active is not None:
+    job = job_queue.get(active["id"])
+    if job is None:  # forgotten after keep_seconds
+        del st.session_state["translate_job"]
+    elif job.pending and hasattr(st, "fragment"):
+        poll_translation()
+    else:
+        if job.pending:
+            job.future.result()  # no fragments on this Streamlit: wait like a plain call
+        poetic_response = render_finished(active, job)
+        if not active.get("remembered"):  # finished jobs re-render on every run; record once
+            remember(active["thought"], active["style"], poetic_response)
+            active["remembered"] = True
+
+# -------------------------
+# History (re-share / export)
+# -------------------------
+share_style = selected_style
+if history is not None:
+    past = history.recent(history_id)
+    if past:
+        reshared = None
+        with st.expander(f"🕰️ Your recent lines ({len(past)})"):
+            for i, entry in enumerate(past):
+                left, right = st.columns([5, 1])
+                left.markdown(f"**{entry.style}** · {entry.line}")
+                left.caption(f"“{entry.thought}” · {time.strftime('%H:%M', time.localtime(entry.at))}")
+                if right.button("↗ Share", key=f"reshare_{i}", help="Share this line again"):
+                    reshared = entry
+            exp_jsonl, exp_csv, clear = st.columns(3)
+            exp_jsonl.download_button("⬇️ JSONL", history.export(history_id, "jsonl"),
+                                      file_name="vireo-history.jsonl", mime="application/x-ndjson")
+            exp_csv.download_button("⬇️ CSV", history.export(history_id, "csv"),
+                                    file_name="vireo-history.csv", mime="text/csv")
+            if clear.button("🗑️ Clear"):
+                history.clear(history_id)
+                st.rerun()
+            mine, hs = history.session_stats(history_id), history.stats()
+            st.caption(
+                f"This session: {mine['entries']} lines · {mine['bytes'] / 1024:.1f} KiB · "
+                f"this worker: {hs['sessions']} sessions · {hs['bytes'] / 2**20:.1f}/{hs['max_bytes'] / 2**20:.0f} MiB "
+                f"({hs['evicted_sessions']} idle sessions evicted)"
+            )
+        if reshared is not None:
+            poetic_response, share_style = reshared.line, reshared.style
+            st.success(poetic_response)
 
 # -------------------------
 # Share (auto-append #VIREO)
 # -------------------------
 if poetic_response:
+    share_started = time.perf_counter()
     st.markdown("#### Share")
     share_text = f"{poetic_response}  #VIREO"
     copy_button(share_text)
@@ -271,13 +749,41 @@ if poetic_response:
         <a class="share-btn" href="{mailto}" target="_blank">Email</a>
         <a class="share-btn" href="{fb}" target="_blank">Facebook</a>
         <a class="share-btn" href="{threads}" target="_blank">Threads</a>
-        <a class="share-btn" href="{instagram}" target="_blank" title="Copy first, then paste into Instagram">Instagram</a>
+        <a class="share-btn" href="{instagram}" target="_blank" title="Download the image card (or copy the line), then post it">Instagram</a>
         """,
         unsafe_allow_html=True
     )
 
+    card_renderer = get_card_renderer()
+    if card_renderer is not None:
+        with metrics.span("share_card", style=share_style):
+            card = card_renderer.get(poetic_response, share_style)
+        if card is not None:  # None: renderer busy, the text links above still work
+            st.image(card, width=360)
+            st.download_button(
+                "🖼️ Download image card", card,
+                file_name=f"vireo-{card_renderer.key(poetic_response, share_style)[:10]}.{card_renderer.fmt}",
+                mime=MIME[card_renderer.fmt],
+            )
+    metrics.observe("vireo_stage_seconds", time.perf_counter() - share_started, stage="render_share")
+
 # -------------------------
 # Footer
 # -------------------------
 st.markdown("---")
 st.markdown(f"<div style='color:{VIREO_GREEN};'>Made with 🌱 by VIREO</div>", unsafe_allow_html=True)
+
+metrics.observe("vireo_stage_seconds", time.perf_counter() - rerun_started, stage="rerun")
+if mode == "API (paid)":
+    with st.sidebar.expander("Metrics"):
+        for row in metrics.summaries("vireo_stage_seconds")[:8]:
+            label = " · ".join(str(v) for v in row["labels"].values())
+            st.caption(
+                f"{label}: p50 {row['p50'] * 1000:.0f} ms · p95 {row['p95'] * 1000:.0f} ms · "
+                f"p99 {row['p99'] * 1000:.0f} ms (n={row['count']})"
+            )
+        tokens = {}
+        for row in metrics.counters("vireo_tokens_total"):
+            tokens[row["labels"]["style"]] = tokens.get(row["labels"]["style"], 0) + row["value"]
+        if tokens:
+            st.caption("Tokens by style: " + ", ".join(f"{k} {v:,}" for k, v in sorted(tokens.items(), key=lambda kv: -kv[1])))
@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def offline_cfg(tmp_path):
+    # every on-disk store under tmp_path; no network, no metrics port
+    return {
+        "cache": {"path": str(tmp_path / "translations.sqlite3")},
+        "semantic": {"enabled": False},
+        "shared": {"path": str(tmp_path / "shared.sqlite3"), "flush_ms": 0, "read_ttl_ms": 0},
+        "quota": {"path": str(tmp_path / "usage.sqlite3")},
+    }
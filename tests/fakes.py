@@ -0,0 +1,38 @@
+# Minimal stand-in for an OpenAI client: chat.completions.create, plain and stream=True
+from types import SimpleNamespace
+
+
+class FakeClient:
+    def __init__(self, choices, delta_words: bool = True):
+        self.choices = list(choices)  # text per choice index
+        self.delta_words = delta_words
+        self.calls = []
+        self.aborted = 0  # streams closed before their last chunk
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options):
+        return self
+
+    def create(self, **params):
+        self.calls.append(params)
+        n = params.get("n", 1)
+        texts = self.choices[:n]
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5 * n, total_tokens=10 + 5 * n)
+        if not params.get("stream"):
+            return SimpleNamespace(usage=usage, choices=[
+                SimpleNamespace(index=i, message=SimpleNamespace(content=t), finish_reason="stop")
+                for i, t in enumerate(texts)])
+        return self._stream(texts, usage)
+
+    def _stream(self, texts, usage):
+        try:
+            for i, text in enumerate(texts):
+                words = text.split(" ")
+                for k, word in enumerate(words):
+                    delta = word if k == 0 else " " + word
+                    yield SimpleNamespace(usage=None, choices=[
+                        SimpleNamespace(index=i, delta=SimpleNamespace(content=delta), finish_reason=None)])
+            yield SimpleNamespace(usage=usage, choices=[])
+        except GeneratorExit:
+            self.aborted += 1
+            raise
@@ -0,0 +1,68 @@
+import json
+
+from vireo.batch import main, parse_row
+from vireo.core import MODES_PATH
+from vireo.safety import SUPPORTIVE_LINES
+
+
+def run_batch(tmp_path, lines, *extra):
+    src, out = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    code = main([str(src), "-o", str(out), "--demo", "--quiet", *extra])
+    return code, {r["row"]: r for r in map(json.loads, out.read_text(encoding="utf-8").splitlines())}
+
+
+def test_bad_rows_become_error_records(tmp_path):
+    code, rows = run_batch(tmp_path, [
+        '"just a string"',
+        "42",
+        "{not json",
+        '{"thought": "fine", "style": "Nope"}',
+        '{"thought": "fine", "style": ["Zen"]}',
+        '{"thought": ""}',
+        '{"thought": "the last one"}',
+    ])
+    assert code == 1
+    assert rows[0]["error"] is None and rows[0]["line"]
+    assert "not int" in rows[1]["error"]
+    assert rows[2]["error"].startswith("invalid JSON")
+    assert "unknown style" in rows[3]["error"]
+    assert rows[4]["error"] == "style must be a string"
+    assert rows[5]["error"] == "empty thought"
+    assert rows[6]["error"] is None and rows[6]["line"]
+
+
+def test_demo_uses_the_given_modes(tmp_path):
+    modes = json.loads(open(MODES_PATH, encoding="utf-8").read())
+    modes["Zen"]["demo"] = ["custom {thought}"]
+    path = tmp_path / "modes.json"
+    path.write_text(json.dumps(modes), encoding="utf-8")
+    code, rows = run_batch(tmp_path, ['{"thought": "tea", "style": "Zen"}'], "--modes", str(path))
+    assert code == 0
+    assert rows[0]["line"] == "custom tea"
+
+
+def test_crisis_rows_get_the_supportive_line(tmp_path):
+    code, rows = run_batch(tmp_path, ['{"thought": "I overdosed", "style": "Zen"}'])
+    assert code == 0
+    assert rows[0]["line"] in SUPPORTIVE_LINES
+
+
+def test_parse_row():
+    assert parse_row({"thought": " hi "}, "Zen", {"Zen"}) == ("hi", "Zen", None)
+    assert parse_row([1], "Zen", {"Zen"})[2] == "row must be an object or a string, not list"
+    assert parse_row({"thought": 5}, "Zen", {"Zen"})[2] == "thought must be a string"
+
+
+def test_resume_keeps_one_record_per_row(tmp_path):
+    lines = ['{"thought": "tea"}', "{not json", '{"thought": "rain"}']
+    run_batch(tmp_path, lines)
+    out = tmp_path / "out.jsonl"
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"row": 2, "line": "torn')  # an interrupted run
+    run_batch(tmp_path, lines, "--resume")
+    code, rows = run_batch(tmp_path, lines, "--resume")
+    assert code == 1  # row 1 is still bad
+    records = [json.loads(line)["row"] for line in out.read_text(encoding="utf-8").splitlines()]
+    assert sorted(records) == [0, 1, 2]
+    assert rows[0]["error"] is None and rows[1]["error"].startswith("invalid JSON")
@@ -0,0 +1,88 @@
+import pytest
+
+from vireo import cache as cache_mod
+from vireo.cache import TranslationCache, cache_from_config, make_key, normalize_thought
+
+
+def test_normalize_thought():
+    assert normalize_thought("  I feel   STUCK. ") == normalize_thought("i feel stuck") == "i feel stuck"
+
+
+def test_key_depends_on_prompt_version():
+    base = make_key("Zen", "I feel stuck.", "gpt", 0.8, "v1")
+    assert base == make_key("Zen", " i feel stuck", "gpt", 0.8000001, "v1")
+    assert base != make_key("Zen", "I feel stuck.", "gpt", 0.8, "v2")
+    assert base != make_key("Zen", "I feel stuck.", "gpt", 0.8, "legacy:v1")
+    assert base != make_key("Haiku", "I feel stuck.", "gpt", 0.8, "v1")
+
+
+def test_translator_key_follows_registry_snapshot(tmp_path):
+    from vireo.core import MODES_PATH
+    from vireo.registry import StyleRegistry
+    from vireo.translator import Translator
+
+    path = tmp_path / "modes.json"
+    path.write_bytes(MODES_PATH.read_bytes())
+    registry = StyleRegistry(path, check_interval=0)
+    translator = Translator(registry, TranslationCache(path=None))
+    before = translator.key("Zen", "tea")
+    path.write_bytes(MODES_PATH.read_bytes() + b"\n")  # any edit is a new snapshot version
+    assert translator.key("Zen", "tea") != before
+
+
+def test_lru_eviction_and_stats():
+    c = TranslationCache(path=None, max_entries=2)
+    c.put("a", "1")
+    c.put("b", "2")
+    assert c.get("a") == "1"  # a is now most recent
+    c.put("c", "3")
+    assert c.get("b") is None
+    assert c.get("a") == "1" and c.get("c") == "3"
+    s = c.stats()
+    assert s["evictions"] == 1 and s["memory_entries"] == 2 and "disk_entries" not in s
+
+
+def test_fifo_eviction():
+    c = TranslationCache(path=None, max_entries=2, eviction="fifo")
+    c.put("a", "1")
+    c.put("b", "2")
+    c.get("a")
+    c.put("c", "3")
+    assert c.get("a") is None
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "time", lambda: now[0])
+    c = TranslationCache(path=None, ttl_seconds=10)
+    c.put("a", "1")
+    now[0] += 11
+    assert c.get("a") is None
+    assert c.stats()["expired"] == 1
+
+
+def test_disk_tier_is_shared(tmp_path):
+    path = tmp_path / "t.sqlite3"
+    TranslationCache(path=path).put("k", "line")
+    other = TranslationCache(path=path)
+    assert other.get("k") == "line"
+    assert other.get_many(["k", "missing"]) == {"k": "line"}
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_disk_count_is_cached(tmp_path, monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+    c = TranslationCache(path=tmp_path / "t.sqlite3")
+    c.put("a", "1")
+    assert c.stats()["disk_entries"] == 1
+    c.put("b", "2")
+    assert c.stats()["disk_entries"] == 1  # not recounted yet
+    now[0] += cache_mod.DISK_COUNT_TTL + 1
+    assert c.stats()["disk_entries"] == 2
+
+
+def test_config():
+    assert cache_from_config({"path": ""}).stats()["memory_entries"] == 0
+    with pytest.raises(ValueError):
+        TranslationCache(path=None, eviction="random")
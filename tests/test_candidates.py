@@ -0,0 +1,54 @@
+import pytest
+
+from vireo.candidates import Reranker, check, reranker_from_config, score, words
+
+
+@pytest.mark.parametrize("line, reasons", [
+    ("Tea steam rises; tomorrow does not.", ()),
+    ("", ("empty",)),
+    ("one\ntwo", ("multiline",)),
+    (" ".join(["word"] * 23), ("too_long",)),
+    ('"Quoted line"', ("quotes",)),
+    ("Breathe #mindful", ("hashtag",)),
+    ("Quiet sky 🌙", ("emoji",)),
+    ("Sure! The river keeps going.", ("explanation",)),
+    ("Here's a line: the river keeps going", ("explanation",)),
+    ("don't apostrophes stay fine", ()),
+])
+def test_check(line, reasons):
+    assert check(line) == reasons
+
+
+def test_verbatim_needs_a_run_of_thought_words():
+    thought = "I feel stuck at work"
+    assert check("I feel stuck at sea, the tide says", thought) == ("verbatim",)
+    assert check("Stuck is a season, not a place", thought) == ()
+    assert check("I feel", "I feel") == ()  # thoughts under 3 words are exempt
+
+
+def test_words_casefold_and_apostrophes():
+    assert words("Don’t STOP") == ["don't", "stop"]
+
+
+def test_score_prefers_fresh_mid_length_lines():
+    thought = "I am tired of waiting"
+    assert score("The kettle hums a patient song for the morning", thought) > score("Tired waiting", thought)
+
+
+def test_pick_takes_the_best_valid_choice():
+    r = Reranker(3)
+    pick = r.pick(['"Quoted."', "Tea steam rises; tomorrow does not.", "Stone."], "I feel stuck", seconds=0.5)
+    assert pick.index == 1 and pick.reasons == () and pick.reask_avoided
+    assert pick.rejected == [("quotes",)]
+    s = r.stats()
+    assert s["reasks_avoided"] == 1 and s["saved_seconds"] == 0.5 and s["reasons"] == {"quotes": 1}
+
+
+def test_pick_reports_when_nothing_is_valid():
+    pick = Reranker(2).pick(["", '"x"'], "t")
+    assert pick.reasons and not pick.reask_avoided
+
+
+def test_config():
+    assert reranker_from_config({"enabled": False}) is None
+    assert reranker_from_config({"n": 0}).n == 1
@@ -0,0 +1,54 @@
+import io
+
+from PIL import Image
+
+from vireo.cards import CardRenderer, cards_from_config
+
+
+def renderer(tmp_path, **kw):
+    return CardRenderer(path=tmp_path / "cards", size=270, workers=0, **kw)
+
+
+def test_renders_once_then_reads_from_disk(tmp_path):
+    cards = renderer(tmp_path)
+    first = cards.get("Even slow rivers reach the sea.", "Zen")
+    assert Image.open(io.BytesIO(first)).size == (270, 270)
+    assert cards.get("  Even slow rivers reach the sea. ", "Zen") == first  # same key once stripped
+    assert cards.stats()["renders"] == 1 and cards.stats()["hits"] == 1
+    again = renderer(tmp_path)  # another worker process on the host
+    assert again.get("Even slow rivers reach the sea.", "Zen") == first
+    assert again.stats()["renders"] == 0
+
+
+def test_key_covers_everything_that_changes_the_pixels(tmp_path):
+    cards = renderer(tmp_path)
+    base = cards.key("line", "Zen")
+    assert len({base, cards.key("line", "Stoic"), cards.key("other", "Zen"), cards.key("line", "Zen", "webp")}) == 4
+    assert renderer(tmp_path / "elsewhere").key("line", "Zen") == base  # the cache directory is not
+    assert CardRenderer(path=tmp_path / "big", size=540, workers=0).key("line", "Zen") != base
+
+
+def test_webp_and_unknown_formats(tmp_path):
+    cards = renderer(tmp_path)
+    assert Image.open(io.BytesIO(cards.get("line", "Zen", "webp"))).format == "WEBP"
+    assert Image.open(io.BytesIO(cards.get("line", "Zen", "gif"))).format == "PNG"
+
+
+def test_saturated_renderer_returns_none(tmp_path):
+    cards = renderer(tmp_path, max_pending=0)
+    assert cards.get("line", "Zen") is None
+    assert cards.stats()["rejected"] == 1
+
+
+def test_prune_keeps_the_newest_files(tmp_path):
+    cards = renderer(tmp_path, max_files=2)
+    for i in range(3):
+        cards.get(f"line {i}", "Zen")
+    cards.prune()
+    assert len(list((tmp_path / "cards").glob("*/*.png"))) == 2
+
+
+def test_config(tmp_path):
+    assert cards_from_config({"enabled": False}) is None
+    cards = cards_from_config({"path": str(tmp_path), "workers": 0, "format": "bmp"})
+    assert cards.fmt == "png"
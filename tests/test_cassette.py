@@ -0,0 +1,82 @@
+import pytest
+
+from vireo.cassette import Cassette, CassetteMiss, cassette_from_config, request_key, request_of
+from vireo.completions import CompletionStream, complete_choices
+
+from fakes import FakeClient
+
+MESSAGES = [{"role": "user", "content": "tea"}]
+
+
+def test_key_ignores_stream_flag_and_extra_params():
+    plain = request_of({"model": "m", "messages": MESSAGES, "temperature": 0.8, "max_tokens": 60})
+    streamed = request_of({"model": "m", "messages": MESSAGES, "temperature": 0.8, "max_tokens": 60,
+                           "stream": True, "timeout": 5, "n": 1})
+    assert request_key(plain) == request_key(streamed)
+    assert request_key(plain) != request_key({**plain, "n": 3})
+
+
+def test_record_then_replay_offline(tmp_path):
+    path = tmp_path / "c.cassette"
+    upstream = FakeClient(["Tea steam rises.", "Stone waits."])
+    recorder = Cassette(path, mode="record", latency_ms=0)
+    assert complete_choices(recorder.wrap(upstream), MESSAGES, "m", 0.8, 60, n=2) == ["Tea steam rises.", "Stone waits."]
+    recorder.close()
+
+    replay = Cassette(path, mode="replay", latency_ms=0)
+    client = replay.wrap(None)
+    usage = []
+    assert complete_choices(client, MESSAGES, "m", 0.8, 60, n=2, on_usage=usage.append)[0] == "Tea steam rises."
+    assert usage[0].total_tokens == 20
+    with pytest.raises(CassetteMiss) as e:
+        complete_choices(client, MESSAGES, "other", 0.8, 60)
+    assert e.value.status_code == 404
+    assert replay.stats()["hits"] == 1 and replay.stats()["misses"] == 1
+
+
+def test_streamed_recording_replays_as_stream_and_plain(tmp_path):
+    path = tmp_path / "c.cassette"
+    recorder = Cassette(path, mode="record", latency_ms=0)
+    stream = CompletionStream(recorder.wrap(FakeClient(["Tea steam rises."])), MESSAGES, "m", 0.8, 60)
+    list(stream)
+    recorder.close()
+
+    replay = Cassette(path, mode="replay", latency_ms=0)
+    again = CompletionStream(replay.wrap(), MESSAGES, "m", 0.8, 60)
+    assert list(again) == ["Tea", " steam", " rises."]
+    assert complete_choices(replay.wrap(), MESSAGES, "m", 0.8, 60) == ["Tea steam rises."]
+
+
+def test_auto_records_misses_and_rotates_recordings(tmp_path):
+    path = tmp_path / "c.cassette"
+    upstream = FakeClient(["first"])
+    cassette = Cassette(path, mode="auto", latency_ms=0)
+    client = cassette.wrap(upstream)
+    complete_choices(client, MESSAGES, "m", 0.8, 60)
+    complete_choices(client, MESSAGES, "m", 0.8, 60)  # replayed, not asked again
+    assert len(upstream.calls) == 1
+
+    upstream.choices = ["second"]
+    Cassette(path, mode="record", latency_ms=0).wrap(upstream).chat.completions.create(
+        model="m", messages=MESSAGES, temperature=0.8, max_tokens=60)
+    replay = Cassette(path, mode="replay", latency_ms=0).wrap()
+    seen = [complete_choices(replay, MESSAGES, "m", 0.8, 60)[0] for _ in range(3)]
+    assert seen == ["first", "second", "first"]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "c.cassette"
+    Cassette(path, mode="record", latency_ms=0).wrap(FakeClient(["ok"])).chat.completions.create(
+        model="m", messages=MESSAGES, temperature=0.8, max_tokens=60)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("A " + "0" * 32 + ' {"l": 1')
+    assert Cassette(path, mode="replay").stats()["recordings"] == 1
+
+
+def test_config(tmp_path):
+    assert cassette_from_config({}) is None
+    assert cassette_from_config({"path": str(tmp_path / "x"), "mode": "off"}) is None
+    with pytest.raises(FileNotFoundError):
+        cassette_from_config({"path": str(tmp_path / "missing"), "mode": "replay"})
+    with pytest.raises(ValueError):
+        Cassette(tmp_path / "x", mode="play")
@@ -0,0 +1,51 @@
+import httpx
+import pytest
+
+from vireo.clients import ClientRegistry
+
+
+@pytest.fixture
+def registry():
+    registry = ClientRegistry(max_retries=0)
+    yield registry
+    registry.close()
+
+
+def http_client(registry, api_key="sk-test"):
+    registry.get(api_key)
+    return next(entry[1] for entry in registry._entries.values())
+
+
+def test_one_client_per_key_and_base_url(registry):
+    first = registry.get("sk-a")
+    assert registry.get("sk-a") is first
+    assert registry.get("sk-b") is not first
+    assert registry.get("sk-a", "http://localhost:8000/v1") is not first
+    assert len(registry.stats()) == 3
+    assert "sk-a" not in str(registry.stats())  # keys are fingerprinted
+
+
+def test_counts_requests_and_upstream_errors(registry):
+    client = http_client(registry)
+    statuses = iter([200, 429, 503])
+    client._transport.inner = httpx.MockTransport(lambda request: httpx.Response(next(statuses)))
+    for _ in range(3):
+        client.get("http://upstream.test/")
+    stats = registry.stats()[0]
+    assert stats["requests"] == 3 and stats["active"] == 0 and stats["peak_active"] == 1
+    assert stats["upstream_errors"] == 2
+
+
+def test_failed_requests_leave_the_active_count(registry):
+    client = http_client(registry)
+
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client._transport.inner = httpx.MockTransport(refuse)
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectError):
+            client.get("http://upstream.test/")
+    stats = registry.stats()[0]
+    assert stats["requests"] == 3 and stats["active"] == 0 and stats["peak_active"] == 1
+    assert stats["upstream_errors"] == 3
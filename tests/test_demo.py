@@ -0,0 +1,43 @@
+import pytest
+
+from vireo.demo import DEFAULT_THOUGHT, DemoBook, DemoTemplates, template_problems
+
+
+@pytest.mark.parametrize("template, problems", [
+    ("{Thought} turns toward light.", []),
+    ("{thought}, and {{braces}}", []),
+    ("", ["must be a non-empty string"]),
+    ("{", ["bad braces (Single '{' encountered in format string)"]),
+    ("{name}", ["unknown placeholder {name} (use {thought} or {Thought})"]),
+    ("{thought!r}", ["placeholder {thought} can't take a format spec or conversion"]),
+    ("{thought:>10}", ["placeholder {thought} can't take a format spec or conversion"]),
+])
+def test_template_problems(template, problems):
+    assert template_problems(template) == problems
+
+
+def test_placeholders_and_literal_braces():
+    tpl = DemoTemplates(["{Thought} / {thought} {{ok}}"])
+    assert tpl.render("  i saw Anna  ") == "I saw Anna / i saw Anna {ok}"
+    assert tpl.render("") == f"{DEFAULT_THOUGHT.capitalize()} / {DEFAULT_THOUGHT} {{ok}}"
+
+
+def test_variant_is_stable_per_thought_and_spread():
+    tpl = DemoTemplates(["a {thought}", "b {thought}", "c {thought}"])
+    assert tpl.render("tea") == tpl.render(" tea ")
+    assert len({tpl.render(f"thought {i}")[0] for i in range(30)}) == 3
+
+
+def test_render_many_matches_render():
+    zen, fallback = DemoTemplates(["z {thought}", "Z {Thought}"]), DemoTemplates(["{Thought}."])
+    book = DemoBook({"Zen": zen}, fallback)
+    thoughts = ["tea", "rain", "tea", None]
+    styles = ["Zen", "Haiku", "Zen", "Zen"]
+    assert book.render_many(thoughts, styles) == [book.render(t, s) for t, s in zip(thoughts, styles)]
+    assert book.render_many(thoughts, "Zen") == [book.render(t, "Zen") for t in thoughts]
+    assert book.render("tea", "Unknown") == "Tea."
+
+
+def test_templates_required():
+    with pytest.raises(ValueError):
+        DemoTemplates([])
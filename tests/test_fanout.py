@@ -0,0 +1,54 @@
+import threading
+import time
+
+from vireo.fanout import FanOut
+
+
+def test_closing_early_waits_for_running_calls_and_starts_no_more():
+    fanout = FanOut(max_workers=4, per_request=2)
+    started, finished = [], []
+    release = threading.Event()
+
+    def fn(style, thought):
+        started.append(style)
+        if style != "a":
+            release.wait(5)
+        time.sleep(0.01)
+        finished.append(style)
+        return style.upper()
+
+    results = fanout.run(fn, ["a", "b", "c", "d"], "thought")
+    assert next(results)[:2] == ("a", "A")
+    threading.Timer(0.05, release.set).start()
+    results.close()  # like a cancelled job
+    assert sorted(finished) == sorted(started)  # nothing still running after close()
+    assert "c" not in started and "d" not in started
+    assert fanout.stats()["in_flight"] == 0
+
+
+def test_errors_are_returned_per_style():
+    fanout = FanOut(max_workers=2)
+
+    def fn(style, thought):
+        if style == "bad":
+            raise RuntimeError("upstream down")
+        return f"{style}: {thought}"
+
+    results = {style: (line, err) for style, line, err, _ in fanout.run(fn, ["a", "bad", "c"], "tea")}
+    assert results["a"] == ("a: tea", None) and results["c"] == ("c: tea", None)
+    assert results["bad"][0] is None and isinstance(results["bad"][1], RuntimeError)
+
+
+def test_per_request_cap_and_completion_order():
+    fanout = FanOut(max_workers=8, per_request=2)
+    delays = {"slow": 0.1, "b": 0.0, "c": 0.0, "d": 0.0}
+
+    def fn(style, thought):
+        time.sleep(delays[style])
+        return style
+
+    order = [style for style, *_ in fanout.run(fn, list(delays), "x")]
+    assert order[-1] == "slow"  # yielded as they finish, not in input order
+    stats = fanout.stats()
+    assert stats["peak_in_flight"] <= 2 and stats["runs"] == 1 and stats["per_request"] == 2
+    assert FanOut(max_workers=3, per_request=10).per_request == 3
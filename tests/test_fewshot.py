@@ -0,0 +1,43 @@
+from vireo.core import build_messages, load_modes
+from vireo.fewshot import FewShotIndex, estimate_tokens, fewshot_from_config, message_tokens
+
+MODES = {
+    "_meta": {"system_prefix": "You write one line."},
+    "Zen": {"prompt": "Zen. Calm.", "examples": [
+        {"thought": "I can't sleep at night", "line": "The moon keeps watch."},
+        {"thought": "I feel lonely", "line": "One lamp, still company."},
+        {"thought": "I am angry at my boss", "line": "Let the kettle cool."},
+        {"thought": "", "line": "skipped: no thought"},
+    ]},
+}
+
+
+def test_nearest_examples_first():
+    index = FewShotIndex(MODES, k=2)
+    assert index.pool_size("Zen") == 3
+    picked = index.select("Zen", "I really can't sleep")
+    assert len(picked) == 2 and picked[0]["line"] == "The moon keeps watch."
+
+
+def test_token_budget_covers_the_whole_prompt():
+    index = FewShotIndex(MODES, k=3)
+    thought = "I can't sleep"
+    unbounded = build_messages(MODES, "Zen", thought, index.select("Zen", thought))
+    budget = message_tokens(unbounded) - 1
+    picked = index.select("Zen", thought, token_budget=budget)
+    assert len(picked) < 3
+    assert message_tokens(build_messages(MODES, "Zen", thought, picked)) <= budget
+    assert index.select("Zen", thought, token_budget=1) == []
+
+
+def test_k_zero_and_unmatched_thoughts():
+    index = FewShotIndex(MODES, k=3)
+    assert index.select("Zen", "anything", k=0) == []
+    assert len(index.select("Zen", "")) == 3  # nothing to compare: pool order
+
+
+def test_config():
+    assert fewshot_from_config(MODES, {"enabled": False}) is None
+    index = fewshot_from_config(load_modes(), {"k": 2, "token_budget": 0})
+    assert index.k == 2 and index.token_budget is None
+    assert estimate_tokens("abcd") == 1 and estimate_tokens("abcde") == 2
@@ -0,0 +1,80 @@
+import pytest
+
+from vireo.history import HistoryStore, history_from_config
+from vireo.shared import shared_from_config
+
+
+def test_ring_keeps_the_newest_entries():
+    h = HistoryStore(per_session=3)
+    for i in range(5):
+        h.add("s", f"thought {i}", "Zen", f"line {i}", at=i)
+    entries = h.recent("s")
+    assert [e.line for e in entries] == ["line 4", "line 3", "line 2"]
+    assert entries[0] == ("thought 4", "Zen", "line 4", 4.0)
+    assert [e.line for e in h.recent("s", limit=1)] == ["line 4"]
+    assert h.session_stats("s")["entries"] == 3
+
+
+def test_long_text_is_clipped_on_a_character_boundary():
+    h = HistoryStore(max_text_bytes=5)
+    h.add("s", "ééé", "Zen", "abcdefgh")
+    entry = h.recent("s")[0]
+    assert entry.thought == "éé" and entry.line == "abcde"
+
+
+def test_budget_evicts_least_recently_used_sessions():
+    h = HistoryStore(per_session=2)
+    h.max_bytes = h.session_overhead * 2 + 500
+    h.add("a", "x", "Zen", "y")
+    h.add("b", "x", "Zen", "y")
+    h.recent("a")  # a is now the most recent
+    h.add("c", "x", "Zen", "y")
+    assert h.recent("b") == [] and h.recent("a") and h.recent("c")
+    assert h.stats()["evicted_sessions"] == 1
+
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("vireo.history.time.monotonic", lambda: now[0])
+    h = HistoryStore(idle_seconds=60)
+    h.add("old", "x", "Zen", "y")
+    now[0] += 61
+    h.add("new", "x", "Zen", "y")
+    assert h.stats()["sessions"] == 1 and h.stats()["expired_sessions"] == 1
+
+
+def test_byte_accounting_returns_to_zero():
+    h = HistoryStore(per_session=2)
+    for i in range(4):
+        h.add("s", "thought", "Zen", "line" * i)
+    h.clear("s")
+    assert h.stats()["bytes"] == 0 and h.recent("s") == []
+
+
+def test_export_formats():
+    h = HistoryStore()
+    h.add("s", "a, b", "Zen", "line one", at=0)
+    h.add("s", "c", "Haiku", "line two", at=60)
+    assert h.export("s").splitlines()[0] == \
+        '{"at": "1970-01-01T00:00:00Z", "style": "Zen", "thought": "a, b", "line": "line one"}'
+    assert h.export("s", "csv").splitlines()[1] == '1970-01-01T00:00:00Z,Zen,"a, b",line one'
+    with pytest.raises(ValueError):
+        h.export("s", "xml")
+
+
+def test_shared_history_is_seen_by_other_workers(offline_cfg):
+    state = shared_from_config(offline_cfg["shared"])
+    try:
+        first = history_from_config({"per_session": 3}, shared=state)
+        second = history_from_config({"per_session": 3}, shared=state)
+        first.add("s", "tea", "Zen", "steam", at=1)
+        second.add("s", "rain", "Zen", "drops", at=2)  # on top of what the first worker kept
+        assert [e.line for e in second.recent("s")] == ["drops", "steam"]
+        first.clear("s")
+        assert history_from_config({}, shared=state).recent("s") == []
+    finally:
+        state.close()
+
+
+def test_disabled():
+    assert history_from_config({"enabled": False}) is None
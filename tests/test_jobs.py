@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from vireo.jobs import CANCELLED, DONE, FAILED, JobQueue, QueueFullError
+
+
+def wait_done(queue, job_id):
+    job = queue.get(job_id)
+    job.future.result(5)
+    return job
+
+
+def test_result_error_and_partial_output():
+    queue = JobQueue(max_workers=2)
+
+    def stream(job):
+        job.partial = "half"
+        return {"line": "whole"}
+
+    def boom(job):
+        raise ValueError("upstream said no")
+
+    ok, bad = wait_done(queue, queue.submit(stream)), wait_done(queue, queue.submit(boom))
+    assert ok.status == DONE and ok.result == {"line": "whole"} and ok.partial == "half"
+    assert bad.status == FAILED and isinstance(bad.error, ValueError)
+    assert not ok.pending and ok.run_seconds is not None
+    assert queue.stats()["done"] == 1 and queue.stats()["failed"] == 1
+
+
+def test_queue_is_bounded():
+    queue = JobQueue(max_workers=1, max_queued=1)
+    release = threading.Event()
+    running = threading.Event()
+
+    def block(job):
+        running.set()
+        release.wait(5)
+
+    first = queue.submit(block)
+    running.wait(5)
+    queue.submit(block)  # waits for the only worker
+    with pytest.raises(QueueFullError):
+        queue.submit(block)
+    release.set()
+    wait_done(queue, first)
+    assert queue.stats()["rejected"] == 1
+
+
+def test_cancel_queued_and_running_jobs():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    running = threading.Event()
+    seen = []
+
+    def block(job):
+        running.set()
+        release.wait(5)
+        seen.append(job.cancelled)
+        return "stale"
+
+    first = queue.submit(block)
+    running.wait(5)
+    second = queue.submit(lambda job: seen.append("ran"))
+    assert queue.cancel(first) and queue.cancel(second)
+    assert not queue.cancel(second)  # already over
+    release.set()
+    a, b = wait_done(queue, first), wait_done(queue, second)
+    assert a.status == CANCELLED and a.result is None  # finished in the background, result dropped
+    assert b.status == CANCELLED and "ran" not in seen
+    assert seen == [True]
+
+
+def test_finished_jobs_are_forgotten_after_keep_seconds():
+    queue = JobQueue(keep_seconds=0)
+    old = queue.submit(lambda job: None)
+    wait_done(queue, old)
+    queue.submit(lambda job: None)  # pruning happens on submit
+    assert queue.get(old) is None
+
+
+def test_wait_and_run_times_are_observed():
+    seen = []
+    queue = JobQueue(observe=lambda name, value, **labels: seen.append((name, labels.get("label"))))
+    wait_done(queue, queue.submit(lambda job: None, label="single"))
+    assert ("vireo_queue_depth", None) in seen
+    assert ("vireo_job_wait_seconds", "single") in seen and ("vireo_job_run_seconds", "single") in seen
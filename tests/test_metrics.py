@@ -0,0 +1,63 @@
+import json
+import urllib.request
+from types import SimpleNamespace
+
+from vireo.metrics import Metrics
+
+
+def test_summaries_keep_quantiles_over_a_bounded_window():
+    m = Metrics(window=10)
+    for v in range(100):
+        m.observe("vireo_stage_seconds", v / 100, stage="upstream")
+    row = m.summaries("vireo_stage_seconds")[0]
+    assert row["count"] == 100 and abs(row["sum"] - 49.5) < 1e-9
+    assert row["p50"] == 0.95 and row["p99"] == 0.99  # only the last 10 samples
+
+
+def test_counters_are_per_label_set():
+    m = Metrics()
+    m.record_usage(SimpleNamespace(prompt_tokens=12, completion_tokens=5), style="Zen", model="m")
+    m.record_usage(SimpleNamespace(prompt_tokens=8, completion_tokens=None), style="Zen", model="m")
+    values = {(r["labels"].get("kind"), r["name"]): r["value"] for r in m.counters()}
+    assert values[("prompt", "vireo_tokens_total")] == 20
+    assert values[("completion", "vireo_tokens_total")] == 5
+    assert values[(None, "vireo_completions_total")] == 2
+
+
+def test_span_times_the_block_even_when_it_raises():
+    m = Metrics()
+    try:
+        with m.span("upstream", style="Zen"):
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert m.summaries()[0]["labels"] == {"stage": "upstream", "style": "Zen"}
+
+
+def test_prometheus_text_escapes_labels():
+    m = Metrics()
+    m.observe("vireo_ttft_seconds", 0.25, style='say "hi"')
+    m.inc("vireo_candidates_total", 3, style="Zen")
+    text = m.render_prometheus()
+    assert "# TYPE vireo_ttft_seconds summary" in text
+    assert 'vireo_ttft_seconds{style="say \\"hi\\"",quantile="0.5"} 0.250000' in text
+    assert 'vireo_ttft_seconds_count{style="say \\"hi\\""} 1' in text
+    assert "# TYPE vireo_candidates_total counter" in text
+    assert 'vireo_candidates_total{style="Zen"} 3' in text
+
+
+def test_jsonl_log_and_http_endpoint(tmp_path):
+    path = tmp_path / "metrics" / "events.jsonl"
+    m = Metrics(jsonl_path=path)
+    m.inc("vireo_reasks_avoided_total", style="Zen")
+    event = json.loads(path.read_text(encoding="utf-8").splitlines()[-1])
+    assert event["kind"] == "counter" and event["metric"] == "vireo_reasks_avoided_total"
+    server = m.serve(0)
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5).read().decode()
+        assert 'vireo_reasks_avoided_total{style="Zen"} 1' in body
+        assert m.serve(0) is server  # idempotent
+    finally:
+        server.shutdown()
+        server.server_close()
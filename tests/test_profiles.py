@@ -0,0 +1,51 @@
+import pytest
+
+from vireo.cache import TranslationCache
+from vireo.profiles import BUILTIN, DEFAULT, Profile, ProfileBook, parse_profiles, profiles_from_config
+from vireo.registry import StyleRegistry
+from vireo.resilience import resilience_from_config
+from vireo.translator import Translator
+
+from fakes import FakeClient
+
+CFG = {
+    "default": "turbo",
+    "styles": {"Haiku": "mini", "Zen": "local"},
+    "profiles": {"mini": {"max_tokens": 48}, "local": {"model": "llama3", "temperature": 0.5}},
+}
+
+
+def test_styles_map_to_profiles_over_the_builtins():
+    book = profiles_from_config(CFG)
+    assert book.for_style("Haiku") == Profile("mini", "gpt-4o-mini", 0.8, 48, 0.15, 0.60)
+    assert book.for_style("Zen").model == "llama3" and book.for_style("Zen").temperature == 0.5
+    assert book.for_style("Stoic") is book.profiles[DEFAULT]
+    assert book.models() == ["gpt-3.5-turbo", "gpt-4o-mini", "llama3"]
+
+
+def test_bad_config_is_rejected():
+    with pytest.raises(ValueError, match="needs a model"):
+        parse_profiles({"local": {"temperature": 0.5}})
+    with pytest.raises(ValueError, match="undefined profiles"):
+        ProfileBook(BUILTIN, styles={"Zen": "nope"})
+    with pytest.raises(ValueError, match="default profile"):
+        ProfileBook(BUILTIN, default="nope")
+
+
+def test_single_profile_keeps_known_prices():
+    book = profiles_from_config(None, model="gpt-4o-mini", temperature=0.3, max_tokens=20)
+    profile = book.for_style("Zen")
+    assert (profile.temperature, profile.max_tokens, profile.input_per_mtok) == (0.3, 20, 0.15)
+    assert profile.cost(1_000_000, 1_000_000) == pytest.approx(0.75)
+
+
+def test_translator_uses_the_style_profile():
+    client = FakeClient(["Rain on tin."])
+    translator = Translator(StyleRegistry(), TranslationCache(path=None), client=client,
+                            resilience=resilience_from_config({}), profiles=profiles_from_config(CFG))
+    translator.translate("Zen", "I feel stuck")
+    translator.translate("Haiku", "I feel stuck")
+    assert [(c["model"], c["temperature"], c["max_tokens"]) for c in client.calls] == [
+        ("llama3", 0.5, 60), ("gpt-4o-mini", 0.8, 48)]
+    default = Translator(StyleRegistry(), TranslationCache(path=None))
+    assert translator.key("Zen", "I feel stuck") != default.key("Zen", "I feel stuck")  # never shares cached lines
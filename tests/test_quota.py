@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+
+from vireo import quota as quota_mod
+from vireo.quota import Charge, QuotaManager, TokenBucket, hash_code, quota_from_config
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(quota_mod.time, "monotonic", lambda: now[0])
+    return now
+
+
+def manager(**kw):
+    kw = {"per_code_per_minute": 60, "per_code_burst": 5, "daily_requests": 10, "path": None, **kw}
+    return QuotaManager(["alpha", " beta "], **kw)
+
+
+def test_token_bucket_refills(clock):
+    bucket = TokenBucket(rate_per_second=1, capacity=2)
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.seconds_until() == pytest.approx(1.0)
+    clock[0] += 1.5
+    assert bucket.try_acquire()
+    bucket.refund(5)
+    assert bucket.available == 2  # capped at capacity
+
+
+def test_codes_are_hashed_and_stripped():
+    q = manager()
+    assert q.is_valid("alpha") and q.is_valid("beta")
+    assert not q.is_valid("gamma") and not q.is_valid("")
+    assert hash_code(" alpha ") == hash_code("alpha")
+    assert not q.acquire("gamma").allowed
+
+
+def test_burst_then_daily_limit(clock):
+    q = manager()
+    assert all(q.acquire("alpha").allowed for _ in range(5))
+    d = q.acquire("alpha")
+    assert not d.allowed and d.reason == "too many requests for this code" and d.retry_after > 0
+    clock[0] += 60
+    assert all(q.acquire("alpha").allowed for _ in range(5))
+    assert q.acquire("alpha").reason == "daily request quota used up"
+    assert q.remaining("beta")["requests_left"] == 10  # other codes are unaffected
+
+
+def test_daily_tokens():
+    q = manager(daily_tokens=100)
+    q.record_tokens("alpha", 100)
+    assert q.acquire("alpha").reason == "daily token quota used up"
+
+
+def test_refund_gives_back_requests_and_burst():
+    q = manager()
+    assert q.acquire("alpha", 3).allowed
+    q.refund("alpha", 2)
+    left = q.remaining("alpha")
+    assert left["requests_left"] == 9
+    assert left["burst_left"] == 4
+
+
+def test_charge_refunds_what_upstream_did_not_use():
+    q = manager()
+    assert q.acquire("alpha", 3).allowed
+    charge = Charge(q, "alpha", 3)
+    charge.record(SimpleNamespace(total_tokens=40))  # one style reached upstream, two were cached
+    charge.settle()
+    charge.settle()  # idempotent
+    assert q.remaining("alpha")["requests_left"] == 9
+    assert q.remaining("alpha")["tokens_left"] == q.daily_tokens - 40
+
+
+def test_persisted_usage(tmp_path):
+    path = tmp_path / "usage.sqlite3"
+    assert manager(path=path).acquire("alpha", 4).allowed
+    assert manager(path=path).remaining("alpha")["requests_left"] == 6
+
+
+def test_shared_state_usage(offline_cfg):
+    from vireo.shared import shared_from_config
+
+    state = shared_from_config(offline_cfg["shared"])
+    try:
+        q = quota_from_config(["alpha"], {"per_code_burst": 5, "daily_requests": 10}, state=state)
+        assert q.acquire("alpha", 2).allowed
+        q.refund("alpha", 1)
+        other = quota_from_config(["alpha"], {"daily_requests": 10}, state=state)
+        assert other.remaining("alpha")["requests_left"] == 9
+    finally:
+        state.close()
+
+
+def test_usage_file_is_imported_into_shared_state_once(tmp_path, offline_cfg):
+    from vireo.shared import shared_from_config
+
+    legacy = tmp_path / "usage.sqlite3"
+    assert manager(path=legacy).acquire("alpha", 4).allowed
+    state = shared_from_config(offline_cfg["shared"])
+    try:
+        assert manager(path=legacy, state=state).remaining("alpha")["requests_left"] == 6
+        assert not legacy.exists() and (tmp_path / "usage.sqlite3.migrated").exists()
+        assert manager(path=legacy, state=state).remaining("alpha")["requests_left"] == 6  # not imported twice
+    finally:
+        state.close()
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from vireo.registry import StyleConfigError, StyleRegistry, compile_modes
+
+
+def modes(**styles):
+    return {"_meta": {"system_prefix": "One line only."}, **styles}
+
+
+def compile_json(data):
+    return compile_modes(json.dumps(data).encode())
+
+
+def test_shipped_modes_compile():
+    snapshot = StyleRegistry().current()
+    assert snapshot.names and all(snapshot.demo("tea", name) for name in snapshot.names)
+
+
+def test_messages_use_prefix_style_and_examples():
+    snap = compile_json(modes(Zen={"prompt": "Be calm. Short.", "examples": [{"thought": "a", "line": "b"}]}))
+    style = snap.styles["Zen"]
+    assert style.description == "Be calm"
+    assert style.messages(" hi ") == [
+        {"role": "system", "content": "One line only."},
+        {"role": "system", "content": "Be calm. Short."},
+        {"role": "user", "content": "a"},
+        {"role": "assistant", "content": "b"},
+        {"role": "user", "content": "hi"},
+    ]
+    assert len(style.messages("hi", examples=[])) == 3  # a retrieved (empty) selection replaces the pool
+
+
+def test_plain_string_style():
+    snap = compile_json(modes(Plain="Just a prompt."))
+    assert snap.styles["Plain"].examples == ()
+
+
+@pytest.mark.parametrize("data, problem", [
+    ([], "top level must be an object"),
+    ({"Zen": "x"}, "_meta.system_prefix must be a non-empty string"),
+    (modes(), "no styles defined"),
+    (modes(Zen=""), "Zen: empty prompt"),
+    (modes(Zen=3), "Zen: must be a prompt string or an object"),
+    (modes(Zen={"prompt": " "}), "Zen: 'prompt' must be a non-empty string"),
+    (modes(Zen={"prompt": "p", "examples": {}}), "Zen: 'examples' must be a list"),
+    (modes(Zen={"prompt": "p", "examples": [{"thought": "a"}]}), "Zen: examples[0] needs string 'thought' and 'line'"),
+    (modes(Zen={"prompt": "p", "examples": [{"thought": "a", "line": " "}]}),
+     "Zen: examples[0] has an empty thought or line"),
+    (modes(Zen={"prompt": "p", "demo": []}), "Zen: 'demo' must be a non-empty list of templates"),
+    (modes(Zen={"prompt": "p", "demo": ["{name}"]}), "Zen: demo[0] unknown placeholder {name}"),
+])
+def test_validation_problems(data, problem):
+    with pytest.raises(StyleConfigError) as e:
+        compile_json(data)
+    assert any(p.startswith(problem) for p in e.value.problems)
+
+
+def test_invalid_json():
+    with pytest.raises(StyleConfigError, match="invalid JSON"):
+        compile_modes(b"{")
+
+
+def test_hot_reload_keeps_last_good_snapshot(tmp_path):
+    path = tmp_path / "modes.json"
+    path.write_text(json.dumps(modes(Zen="Calm.")), encoding="utf-8")
+    registry = StyleRegistry(path, check_interval=0)
+    first = registry.current()
+    path.write_text(json.dumps(modes(Zen="Calm.", Haiku="Short.")), encoding="utf-8")
+    second = registry.current()
+    assert second.names == ("Zen", "Haiku") and second.version != first.version and registry.reloads == 1
+    path.write_text("{broken", encoding="utf-8")
+    assert registry.current() is second
+    assert "invalid JSON" in registry.last_error
+
+
+def test_startup_fails_fast_on_invalid_file(tmp_path):
+    path = tmp_path / "modes.json"
+    path.write_text(json.dumps(modes()), encoding="utf-8")
+    with pytest.raises(StyleConfigError):
+        StyleRegistry(path)
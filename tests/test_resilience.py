@@ -0,0 +1,120 @@
+import httpx
+import openai
+import pytest
+
+from vireo.resilience import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, EmptyCompletionError,
+                              Resilience, is_retryable)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(status_code)
+        self.status_code = status_code
+
+
+def flaky(*errors, result="ok"):
+    errors = list(errors)
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        if errors:
+            raise errors.pop(0)
+        return result
+    return fn, calls
+
+
+@pytest.mark.parametrize("exc, retryable", [
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (StatusError(400), False),
+    (StatusError(401), False),
+    (TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (EmptyCompletionError("empty"), True),
+    (httpx.ReadTimeout("slow"), True),
+    (openai.APIConnectionError(request=httpx.Request("POST", "http://x")), True),
+    (openai.APITimeoutError(request=httpx.Request("POST", "http://x")), True),
+    (TypeError("bug"), False),
+    (KeyError("bug"), False),
+])
+def test_is_retryable(exc, retryable):
+    assert is_retryable(exc) is retryable
+
+
+def fast(**kw):
+    return Resilience(backoff_base=0, backoff_cap=0, **kw)
+
+
+def test_retries_then_succeeds():
+    r = fast(max_attempts=3)
+    fn, calls = flaky(TimeoutError(), TimeoutError())
+    assert r.call(fn) == "ok"
+    assert len(calls) == 3
+    assert r.stats()["retries"] == 2 and r.stats()["failures"] == 0
+    assert r.breaker.state == CLOSED
+
+
+def test_local_bug_is_not_retried_or_counted():
+    r = fast(max_attempts=3, failure_threshold=1)
+    fn, calls = flaky(TypeError("bug"))
+    with pytest.raises(TypeError):
+        r.call(fn)
+    assert len(calls) == 1
+    assert r.breaker.state == CLOSED
+
+
+def test_client_error_is_not_retried():
+    r = fast(max_attempts=3, failure_threshold=1)
+    fn, calls = flaky(StatusError(400))
+    with pytest.raises(StatusError):
+        r.call(fn)
+    assert len(calls) == 1 and r.breaker.state == CLOSED
+
+
+def test_one_breaker_failure_per_call():
+    r = fast(max_attempts=3, failure_threshold=3)
+    for _ in range(2):
+        fn, calls = flaky(*[TimeoutError()] * 3)
+        with pytest.raises(TimeoutError):
+            r.call(fn)
+        assert len(calls) == 3
+    assert r.breaker.state == CLOSED  # 6 failed attempts, 2 failed calls
+    fn, _ = flaky(*[TimeoutError()] * 3)
+    with pytest.raises(TimeoutError):
+        r.call(fn)
+    assert r.breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        r.call(flaky()[0])
+    assert r.stats()["short_circuits"] == 1
+
+
+def test_guard_counts_upstream_failures_only():
+    r = fast(failure_threshold=1)
+    with pytest.raises(KeyError):
+        with r.guard():
+            raise KeyError("bug")
+    assert r.breaker.state == CLOSED
+    with pytest.raises(EmptyCompletionError):
+        with r.guard():
+            raise EmptyCompletionError("empty")
+    assert r.breaker.state == OPEN
+
+
+def test_breaker_half_open_lets_one_probe(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("vireo.resilience.time.monotonic", lambda: now[0])
+    b = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    b.record_failure()
+    assert not b.allow()
+    now[0] = 11
+    assert b.state == HALF_OPEN
+    assert b.allow() and not b.allow()
+    b.release()  # the probe hit a local bug: slot freed, still half-open
+    assert b.allow()
+    b.record_failure()
+    assert b.state == OPEN
+    now[0] = 22
+    assert b.allow()
+    b.record_success()
+    assert b.state == CLOSED
@@ -0,0 +1,81 @@
+import pytest
+
+from vireo.cache import TranslationCache
+from vireo.registry import StyleRegistry
+from vireo.resilience import resilience_from_config
+from vireo.safety import Safety, safety_from_config, trie_pattern
+from vireo.translator import Translator
+
+from fakes import FakeClient
+
+safety = safety_from_config({})
+
+
+@pytest.mark.parametrize("text", [
+    "I overdosed last night",
+    "thinking about an overdose",
+    "I want to kms",
+    "honestly gonna kms",
+    "I want to kill myself",
+    "I don’t want to live anymore",
+    "self harm again",
+    "SUICIDAL thoughts",
+])
+def test_crisis_text_matches(text):
+    assert safety.check(text) is not None
+
+
+@pytest.mark.parametrize("text", [
+    "I ran 10 kms this morning",
+    "the trail is 5 kms long",
+    "killing it at work today",
+    "my diet is overdue",
+    "",
+])
+def test_ordinary_text_does_not_match(text):
+    assert safety.check(text) is None
+
+
+def test_categories():
+    assert safety.check("I overdosed").category == "self_harm"
+    assert safety.check("I want to kms").category == "suicide"
+
+
+def test_trie_pattern_shares_prefixes():
+    assert trie_pattern(["kill myself", "killing myself"]).startswith("kill(?:")
+
+
+def test_extra_phrases_and_disable():
+    custom = safety_from_config({"extra_phrases": {"self_harm": ["punch the wall"]}})
+    assert custom.check("I want to punch the wall").category == "self_harm"
+    assert safety_from_config({"enabled": False}) is None
+    with pytest.raises(ValueError):
+        Safety({}, {})
+
+
+def test_supportive_line_is_deterministic():
+    assert safety.supportive("x") == safety.supportive("x")
+    assert safety.supportive("x") in safety.lines
+
+
+def test_stream_stops_before_unsafe_text_is_shown():
+    client = FakeClient(["Quiet dusk; I want to kill myself tonight, softly."])
+    translator = Translator(StyleRegistry(), TranslationCache(path=None), client=client,
+                            resilience=resilience_from_config({}), safety=safety)
+    seen = []
+    out = translator.stream("Zen", "a calm evening", on_text=seen.append)
+    assert out["safety"] is True
+    assert out["line"] in safety.lines
+    assert all(safety.check(text) is None for text in seen)
+    assert client.aborted == 1  # the rest of the completion was never generated
+    assert translator.cache.get(translator.key("Zen", "a calm evening")) is None
+
+
+def test_stream_holds_back_the_last_word_until_checked():
+    client = FakeClient(["Tea steam rises slowly."])
+    translator = Translator(StyleRegistry(), TranslationCache(path=None), client=client,
+                            resilience=resilience_from_config({}), safety=safety)
+    seen = []
+    out = translator.stream("Zen", "tea", on_text=seen.append)
+    assert out["safety"] is False
+    assert seen == ["Tea", "Tea steam", "Tea steam rises", "Tea steam rises slowly."]
@@ -0,0 +1,66 @@
+import pytest
+
+from vireo.cache import TranslationCache
+from vireo.registry import StyleRegistry
+from vireo.semantic import SemanticIndex, negations
+from vireo.translator import Translator
+
+from fakes import FakeClient
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SemanticIndex(path=tmp_path / "semantic", dim=256, capacity=16)
+
+
+def test_near_duplicate_hits_in_the_same_style(index):
+    index.add("I feel so tired today", "Haiku", "Lanterns dim at dusk.")
+    line, score = index.lookup("I feel tired", "Haiku")
+    assert line == "Lanterns dim at dusk." and score >= index.threshold
+    assert index.lookup("I feel tired", "Zen") is None
+    assert index.lookup("My cat ignores me", "Haiku") is None
+
+
+def test_scope_separates_prompt_versions(index):
+    index.add("I feel so tired today", "Haiku", "old line", scope="v1")
+    assert index.lookup("I feel so tired today", "Haiku", scope="v2") is None
+    assert index.lookup("I feel so tired today", "Haiku", scope="v1")[0] == "old line"
+
+
+@pytest.mark.parametrize("past,query", [
+    ("I am afraid of failing", "I am not afraid of failing"),
+    ("I can do this", "I can't do this"),
+    ("I will never give up", "I will give up"),
+])
+def test_negation_mismatch_is_not_a_hit(index, past, query):
+    index.add(past, "Haiku", "line")
+    assert index.lookup(query, "Haiku") is None
+
+
+def test_matching_negation_still_hits(index):
+    index.add("I am not afraid of failing", "Haiku", "line")
+    assert index.lookup("I am not afraid of failing again", "Haiku") is not None
+    assert negations("I don't care") == negations("I do not care") == {"not"}
+
+
+def test_rows_survive_a_reopen_and_a_compaction(tmp_path):
+    path = tmp_path / "semantic"
+    first = SemanticIndex(path=path, capacity=4)
+    for i in range(6):  # wraps the ring
+        first.add(f"thought number {'x' * (i + 1)} about rain", "Zen", f"line {i}", scope="v1")
+    first.compact()
+    second = SemanticIndex(path=path, capacity=4)
+    assert second.stats()["size"] == 4
+    assert second.lookup("thought number xxxxxx about rain", "Zen", scope="v1")[0] == "line 5"
+
+
+def test_translator_scopes_the_index_by_prompt_version(tmp_path, monkeypatch):
+    index = SemanticIndex(path=tmp_path / "semantic")
+    registry = StyleRegistry()
+    translator = Translator(registry, TranslationCache(path=None), client=FakeClient(["Rain on tin."]),
+                            semantic=index)
+    translator.remember("Zen", "I feel so tired today", translator.key("Zen", "I feel so tired today"), "old")
+    assert translator.cached("Zen", "I feel tired") == "old"
+    snapshot = registry.current()
+    monkeypatch.setattr(registry, "current", lambda: type(snapshot)(**{**vars(snapshot), "version": "next"}))
+    assert translator.cached("Zen", "I feel tired") is None
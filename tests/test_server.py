@@ -0,0 +1,87 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from vireo.server import Service, serve
+
+
+@pytest.fixture
+def server(offline_cfg):
+    srv = serve(Service(offline_cfg, demo=True), port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+
+def post(port, path, body, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    data = body if isinstance(body, bytes) else json.dumps(body).encode()
+    conn.request("POST", path, data, {"Content-Type": "application/json", **(headers or {})})
+    resp = conn.getresponse()
+    payload = json.loads(resp.read() or b"null")
+    conn.close()
+    return resp.status, payload
+
+
+def test_translate_demo(server):
+    status, payload = post(server, "/v1/translate", {"thought": "I feel stuck", "style": "Zen"})
+    assert status == 200
+    assert payload["style"] == "Zen" and payload["line"] and payload["source"] == "demo"
+
+
+@pytest.mark.parametrize("style", [["Zen"], {"name": "Zen"}, 7])
+def test_non_string_style_is_400(server, style):
+    status, payload = post(server, "/v1/translate", {"thought": "I feel stuck", "style": style})
+    assert status == 400
+    assert "style" in payload["error"]
+
+
+def test_batch_non_string_default_style_is_400(server):
+    status, _ = post(server, "/v1/batch", {"items": [{"thought": "hi"}], "style": ["Zen"]})
+    assert status == 400
+
+
+def test_unknown_style_and_route(server):
+    assert post(server, "/v1/translate", {"thought": "hi", "style": "Nope"})[0] == 400
+    assert post(server, "/v1/nothing", {})[0] == 404
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_bad_content_length_is_400(server, length):
+    conn = http.client.HTTPConnection("127.0.0.1", server, timeout=10)
+    conn.putrequest("POST", "/v1/translate")
+    conn.putheader("Content-Length", length)
+    conn.endheaders()
+    resp = conn.getresponse()
+    assert resp.status == 400
+    assert "Content-Length" in json.loads(resp.read())["error"]
+
+
+def test_unexpected_error_is_json_500(server, monkeypatch, capsys):
+    def boom(self, body, default_style=None):
+        raise KeyError("bug")
+
+    monkeypatch.setattr(Service, "item", boom)
+    status, payload = post(server, "/v1/translate", {"thought": "hi", "style": "Zen"})
+    assert status == 500
+    assert payload == {"error": "internal error"}
+
+
+def test_requests_without_upstream_call_are_not_charged(offline_cfg):
+    service = Service({**offline_cfg, "paywall": {"codes": ["alpha"]}}, demo=True)
+    srv = serve(service, port=0)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    port = srv.server_address[1]
+    try:
+        auth = {"Authorization": "Bearer alpha"}
+        assert post(port, "/v1/translate", {"thought": "hi", "style": "Zen"})[0] == 401
+        assert post(port, "/v1/translate", {"thought": "hi", "style": "Zen"}, auth)[0] == 200
+        assert post(port, "/v1/batch", {"items": [{"thought": "a"}, {"thought": "b"}], "style": "Zen"}, auth)[0] == 200
+        left = service.quota.remaining("alpha")
+        assert left["requests_left"] == left["daily_requests"]
+    finally:
+        srv.shutdown()
+        srv.server_close()
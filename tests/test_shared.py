@@ -0,0 +1,92 @@
+import pytest
+
+from vireo.shared import RedisBackend, SharedState, SQLiteBackend, shared_from_config
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteBackend(tmp_path / "shared.sqlite3")
+        yield store
+        store.close()
+        return
+    pytest.importorskip("redis")
+    from vireo.mock_redis import start
+
+    server, url = start()
+    store = RedisBackend.from_url(url)
+    yield store
+    store.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_counters(backend):
+    backend.incr({"a": (2, None), "b": (1, 60)})
+    backend.incr({"a": (3, 60)})
+    assert backend.get(["a", "b", "missing"]) == {"a": 5, "b": 1}
+    backend.delete(["a"])
+    assert backend.get(["a"]) == {}
+
+
+def test_lists_are_newest_first_and_trimmed(backend):
+    backend.push({"h": (["one", "two"], 3, 60)})
+    backend.push({"h": (["three", "four"], 3, None)})
+    assert backend.range("h", 10) == ["four", "three", "two"]
+    assert backend.range("h", 1) == ["four"]
+
+
+def test_redis_keys_are_prefixed_and_expire():
+    pytest.importorskip("redis")
+    from vireo.mock_redis import start
+
+    server, url = start()
+    try:
+        backend = RedisBackend.from_url(url, prefix="t:")
+        backend.incr({"a": (1, 30)})
+        assert backend.client.get("t:a") == b"1"
+        assert 0 < backend.client.ttl("t:a") <= 30
+        backend.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_batched_writes_are_visible_before_the_flush(backend):
+    state = SharedState(backend, flush_ms=60_000, read_ttl_ms=60_000)
+    other = SharedState(backend, flush_ms=0, read_ttl_ms=0)  # another worker process
+    state.incr("n", 2)
+    state.append("h", "line", maxlen=5)
+    assert state.get("n") == 2 and state.recent("h", 5) == ["line"]
+    assert other.get("n") == 0
+    state.flush()
+    assert other.get("n") == 2 and other.recent("h", 5) == ["line"]
+    assert state.stats()["flushes"] == 1 and state.stats()["flushed_ops"] == 2
+
+
+def test_failed_flush_keeps_the_writes(tmp_path):
+    class Down(SQLiteBackend):
+        up = False
+
+        def incr(self, amounts):
+            if not self.up:
+                raise ConnectionError("backend down")
+            super().incr(amounts)
+
+    backend = Down(tmp_path / "shared.sqlite3")
+    state = SharedState(backend, flush_ms=0, read_ttl_ms=0)
+    state.incr("n", 3)
+    assert state.stats()["errors"] == 1 and state.stats()["pending"] == 1
+    assert state.get("n") == 3  # still counted locally
+    backend.up = True
+    state.flush()
+    assert backend.get(["n"]) == {"n": 3}
+
+
+def test_config(tmp_path):
+    assert shared_from_config({"backend": "off"}) is None
+    with pytest.raises(ValueError):
+        shared_from_config({"backend": "memcached"})
+    state = shared_from_config({"path": str(tmp_path / "s.sqlite3"), "flush_ms": 0})
+    assert state.stats()["backend"] == "sqlite"
+    state.close()
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from vireo.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    sf = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "line"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(sf.do("k", fn)))
+    leader.start()
+    while not sf.stats()["in_flight"]:
+        pass
+    followers = [threading.Thread(target=lambda: results.append(sf.do("k", fn))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    while sf.stats()["waiting"] < 4:
+        pass
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+    assert results == ["line"] * 5
+    assert len(calls) == 1
+    s = sf.stats()
+    assert s["calls"] == 1 and s["coalesced"] == 4 and s["in_flight"] == 0
+
+
+def test_leader_error_reaches_followers_and_key_is_freed():
+    sf = SingleFlight()
+    with pytest.raises(KeyError):
+        sf.do("k", lambda: {}["missing"])
+    assert sf.do("k", lambda: "again") == "again"
+
+
+def test_different_keys_run_separately():
+    sf = SingleFlight()
+    assert sf.do("a", lambda: 1) == 1 and sf.do("b", lambda: 2) == 2
+    assert sf.stats()["calls"] == 2
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from vireo.cache import TranslationCache
+from vireo.candidates import Reranker
+from vireo.registry import StyleRegistry
+from vireo.resilience import CLOSED, resilience_from_config
+from vireo.singleflight import SingleFlight
+from vireo.translator import Translator
+
+from fakes import FakeClient
+
+THOUGHT = "I feel stuck"
+# choice 0 breaks the format (quotes), choice 1 is fine: the reranker prefers 1
+CHOICES = ['"Empty bowl, full of sky."', "Tea steam rises; tomorrow does not.", "Stone waits for rain."]
+
+
+@pytest.fixture
+def make(tmp_path):
+    def make(client, **kw):
+        return Translator(StyleRegistry(), TranslationCache(path=None), client=client,
+                          resilience=resilience_from_config({}), reranker=Reranker(3), **kw)
+    return make
+
+
+def test_translate_reranks_candidates(make):
+    client = FakeClient(CHOICES)
+    assert make(client).translate("Zen", THOUGHT) == CHOICES[1]
+    assert client.calls[0]["n"] == 3
+
+
+def test_stream_returns_the_streamed_line(make):
+    client = FakeClient(CHOICES)
+    seen = []
+    out = make(client).stream("Zen", THOUGHT, on_text=seen.append)
+    assert "n" not in client.calls[0]  # one choice, even with a reranker
+    assert out["line"] == CHOICES[0]
+    assert seen[-1] == out["line"]
+
+
+def test_stream_line_failing_format_is_not_cached(make):
+    client = FakeClient(CHOICES)
+    translator = make(client)
+    translator.stream("Zen", THOUGHT)
+    assert translator.cache.get(translator.key("Zen", THOUGHT)) is None
+
+
+class GatedClient(FakeClient):
+    """FakeClient whose requests wait for release, so followers can pile up."""
+
+    def __init__(self, choices):
+        super().__init__(choices)
+        self.release = threading.Event()
+
+    def create(self, **params):
+        self.release.wait(5)
+        return super().create(**params)
+
+
+@pytest.mark.parametrize("leader,follower", [("translate", "stream"), ("stream", "translate")])
+def test_translate_and_stream_share_one_request(make, leader, follower):
+    client = GatedClient(CHOICES)
+    translator = make(client, single_flight=SingleFlight())
+    call = {"translate": lambda: translator.translate("Zen", THOUGHT),
+            "stream": lambda: translator.stream("Zen", THOUGHT)["line"]}
+    results = {}
+    first = threading.Thread(target=lambda: results.update(leader=call[leader]()))
+    first.start()
+    while not translator.single_flight.stats()["in_flight"]:
+        pass
+    second = threading.Thread(target=lambda: results.update(follower=call[follower]()))
+    second.start()
+    while not translator.single_flight.stats()["waiting"]:
+        pass
+    client.release.set()
+    first.join(5)
+    second.join(5)
+    assert len(client.calls) == 1
+    assert isinstance(results["follower"], str)
+    assert results["follower"] == results["leader"]
+
+
+def test_client_hang_ups_do_not_trip_the_breaker():
+    client = FakeClient(CHOICES)
+    translator = Translator(StyleRegistry(), TranslationCache(path=None), client=client,
+                            resilience=resilience_from_config({"failure_threshold": 2}))
+
+    def gone(text):
+        raise BrokenPipeError(32, "Broken pipe")
+
+    for thought in ["one", "two", "three"]:
+        with pytest.raises(BrokenPipeError):
+            translator.stream("Zen", thought, on_text=gone)
+    assert translator.resilience.breaker.state == CLOSED
+    assert translator.cache.get(translator.key("Zen", "three")) == CHOICES[0]  # finished for the cache
@@ -1,8 +1,10 @@
 import streamlit as st
-from PIL import Image
-from openai import OpenAI
-import json, random, urllib.parse
+import random, urllib.parse
 from streamlit.components.v1 import html
+from vireo.cache import cache_from_config, make_key
+from vireo.clients import registry_from_config
+from vireo.profiles import MAX_TOKENS, MODEL, TEMPERATURE
+from vireo.registry import StyleRegistry
 
 # -------------------------
 # Config
@@ -14,9 +16,33 @@ PAGE_TITLE = "VIREO — Translate My Thought"
 # -------------------------
 # Data
 # -------------------------
-with open("poetic_modes.json", "r") as f:
-    poetic_modes = json.load(f)
-style_names = list(poetic_modes.keys())
+# Parsed + validated once per process; hot-reloads when poetic_modes.json changes
+@st.cache_resource
+def get_style_registry():
+    return StyleRegistry()
+
+styles_snapshot = get_style_registry().current()
+style_names = list(styles_snapshot.names)
+
+# Translation cache (in-memory LRU per process + shared SQLite store)
+@st.cache_resource
+def get_translation_cache():
+    try:
+        cfg = st.secrets["cache"]
+    except Exception:
+        cfg = {}
+    return cache_from_config(cfg)
+
+translation_cache = get_translation_cache()
+
+# One pooled OpenAI client per api key for the whole process
+@st.cache_resource
+def get_client_registry():
+    try:
+        cfg = st.secrets["openai_pool"]
+    except Exception:
+        cfg = {}
+    return registry_from_config(cfg)
 
 # -------------------------
 # Page / Theme
@@ -116,7 +142,7 @@ if mode == "API (paid)":
         demo_mode = True
     else:
         st.markdown(f"<div class='status-pill'>API mode</div>", unsafe_allow_html=True)
-        client = OpenAI(api_key=api_key)
+        client = get_client_registry().get(api_key.strip())
         demo_mode = False
 else:
     st.markdown(f"<div class='status-pill'>Demo mode</div>", unsafe_allow_html=True)
@@ -126,7 +152,7 @@ else:
 # -------------------------
 # Style picker (Surprise + Dropdown)
 # -------------------------
-if "style_select" not in st.session_state:
+if st.session_state.get("style_select") not in style_names:
     st.session_state.style_select = style_names[0]
 
 col1, col2 = st.columns([1, 3])
@@ -137,8 +163,8 @@ with col1:
 with col2:
     selected_style = st.selectbox("Poetic Style", style_names, key="style_select")
 
-resolved_prompt = poetic_modes[selected_style]
-resolved_description = resolved_prompt.split(".")[0]
+resolved_style = styles_snapshot.styles[selected_style]
+resolved_description = resolved_style.description
 st.markdown(f"<p style='color:{VIREO_GREEN}; font-style:italic;'>“{resolved_description}.”</p>", unsafe_allow_html=True)
 
 # -------------------------
@@ -146,37 +172,6 @@ st.markdown(f"<p style='color:{VIREO_GREEN}; font-style:italic;'>“{resolved_de
 # -------------------------
 user_input = st.text_area("Your thought:", placeholder="e.g. 'I feel stuck and overwhelmed.'", height=100)
 
-# -------------------------
-# Demo translator (no API)
-# -------------------------
-def demo_translate(thought: str, style: str) -> str:
-    t = (thought or "this moment").strip()
-    samples = {
-        "Poetic": f"Like tide over stone, {t} learns to soften.",
-        "Stoic": f"{t.capitalize()} is opinion; choose the next right action.",
-        "Shakespearean": f"'{t}' doth weigh my breast—yet still I breathe and onward go.",
-        "Deep": f"The root of {t} is asking to be seen.",
-        "Comic": f"{t}? You’re not broken—you’re buffering. Try a heart refresh.",
-        "Zen": f"{t} is a cloud; the sky remains.",
-        "Mystical": f"Within {t}, a hidden lantern waits for your name.",
-        "Mythic Mirror": f"You stand at the gate of {t}; the key is your true name.",
-        "Haiku": f"{t} in one breath—\nold knots loosening slowly—\nspring finds a small door",
-        "Lyrical": f"I hum through {t} till the melody turns me light.",
-        "Oracular": f"From {t}, a sign: choose the narrow way and become wide.",
-        "Surrealist": f"{t} grew feathers; the clock drank the sea.",
-        "Romantic": f"In {t}, the heart still hears a distant, faithful lighthouse.",
-        "Minimalist": f"{t}. Then—space.",
-        "Elegiac": f"I lay down the old name of {t} and listen for the quiet.",
-        "Epic/Grand": f"Across the ridge of {t}, your small step moves the mountain.",
-        "Satirical": f"{t}? Install fewer chaos-plugins.",
-        "Ecstatic (Rumi-style)": f"Beloved, even {t} is a doorway wearing your face.",
-        "Journal-style": f"Today felt like {t}. One truthful line eased it.",
-        "Rap/Spoken Word": f"{t} in my chest—ride the beat, let the walls confess.",
-        "Childlike": f"{t} feels big. I am bigger.",
-        "Cinematic": f"The room tightens with {t}; a window brightens—you exhale."
-    }
-    return samples.get(style, f"{t} turns toward light.")
-
 # -------------------------
 # Copy-to-clipboard (no deps)
 # -------------------------
@@ -199,28 +194,30 @@ if st.button("Translate"):
         st.warning("Please enter a thought to translate.")
     else:
         if demo_mode:
-            poetic_response = demo_translate(user_input, selected_style)
+            poetic_response = styles_snapshot.demo(user_input, selected_style)
             st.markdown("### 🌿 Your Line (Demo):")
             st.success(poetic_response)
         else:
             try:
-                messages = [
-                    {"role": "system", "content": resolved_prompt},
-                    {"role": "user", "content": user_input}
-                ]
-                resp = client.chat.completions.create(
-                    model="gpt-3.5-turbo",  # keep costs low; switch to gpt-4 if you prefer
-                    messages=messages,
-                    temperature=0.8,
-                    max_tokens=60
-                )
-                poetic_response = resp.choices[0].message.content.strip()
+                # own namespace: these lines skip the rerank and safety vetting of the Translate page
+                cache_key = make_key(selected_style, user_input, MODEL, TEMPERATURE, "legacy:" + styles_snapshot.version)
+                poetic_response = translation_cache.get(cache_key)
+                if poetic_response is None:
+                    messages = resolved_style.messages(user_input)
+                    resp = client.chat.completions.create(
+                        model=MODEL,
+                        messages=messages,
+                        temperature=TEMPERATURE,
+                        max_tokens=MAX_TOKENS
+                    )
+                    poetic_response = resp.choices[0].message.content.strip()
+                    translation_cache.put(cache_key, poetic_response)
                 st.markdown("### 🌸 Your Line:")
                 st.success(poetic_response)
             except Exception as e:
                 st.error(f"API error: {e}")
                 st.info("Falling back to Demo.")
-                poetic_response = demo_translate(user_input, selected_style)
+                poetic_response = styles_snapshot.demo(user_input, selected_style)
                 st.success(poetic_response)
 
 # -------------------------
@@ -0,0 +1 @@
+# VIREO — shared helpers for the Streamlit pages (cache, core translate logic, ...)
@@ -0,0 +1,68 @@
+# vireo/assets.py — static assets served from memory (theme CSS, pre-resized hero)
+#
+#   python -m vireo.assets            # regenerate assets/vireo_hero_900.webp after replacing the hero
+#
+# The 1024 px hero PNG is ~370 KB and st.image decodes (and maybe re-encodes) it with
+# Pillow + numpy on every rerun. A 900 px WebP is rendered once, offline, and inlined
+# as a data URI (~20 KB), so a cold worker needs neither library for the landing page.
+import argparse
+import base64
+from pathlib import Path
+
+ASSETS = Path(__file__).resolve().parent.parent / "assets"
+HERO_PATH = ASSETS / "vireo_hero.png"
+THEME_PATH = ASSETS / "vireo_theme.css"
+HERO_WIDTH = 900  # Home.py's .block-container max-width
+MIME = {"webp": "image/webp", "jpg": "image/jpeg", "png": "image/png"}
+
+
+def resized_path(src, width: int = HERO_WIDTH, fmt: str = "webp") -> Path:
+    src = Path(src)
+    return src.with_name(f"{src.stem}_{width}.{fmt}")
+
+
+def render_resized(src, width: int = HERO_WIDTH, fmt: str = "webp", quality: int = 82) -> Path:
+    from PIL import Image
+
+    src = Path(src)
+    out = resized_path(src, width, fmt)
+    image = Image.open(src).convert("RGB")
+    image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    if fmt == "webp":
+        image.save(out, "WEBP", quality=quality, method=6)
+    else:
+        image.save(out, "JPEG" if fmt == "jpg" else fmt.upper(), quality=quality, optimize=True)
+    return out
+
+
+def data_uri(path) -> str:
+    path = Path(path)
+    mime = MIME.get(path.suffix.lstrip(".").lower(), "application/octet-stream")
+    return f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+
+
+def hero_uri(src=HERO_PATH, width: int = HERO_WIDTH):
+    """Data URI of the pre-resized hero, or None when it has not been generated."""
+    resized = resized_path(src, width)
+    return data_uri(resized) if resized.exists() else None
+
+
+def read_text(path):
+    try:
+        return Path(path).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Pre-resize the hero image for Home.py.")
+    p.add_argument("--src", default=str(HERO_PATH))
+    p.add_argument("--width", type=int, default=HERO_WIDTH)
+    p.add_argument("--quality", type=int, default=82)
+    args = p.parse_args(argv)
+    out = render_resized(args.src, args.width, quality=args.quality)
+    print(f"{out} ({out.stat().st_size / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
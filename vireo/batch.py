@@ -0,0 +1,314 @@
+# vireo/batch.py — headless batch translation
+#
+#   python -m vireo.batch thoughts.jsonl -o lines.jsonl --concurrency 32 --resume
+#   python -m vireo.batch thoughts.csv -o lines.jsonl --style Zen --demo
+#
+# Input rows are JSONL objects or CSV rows with a "thought" field and an optional
+# "style" field. Rows stream through a bounded asyncio pipeline (reader -> N workers
+# -> writer), so memory stays flat regardless of file size. Every output record
+# carries its input row number; --resume skips rows already translated in the output
+# and retries the failed ones (their old records are dropped, so every row has one).
+# A row that cannot be translated (malformed JSON, not an object, unknown style) is
+# written with its "error" and the run goes on.
+#
+# Prompts, the local safety check and the candidate rerank come from the same
+# vireo.translator.Translator as the page and the server; only the upstream call is
+# ours, async, so a 429 can pause every worker.
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from vireo.cache import TranslationCache
+from vireo.candidates import Reranker
+from vireo.profiles import MAX_TOKENS, MODEL, TEMPERATURE
+from vireo.registry import MODES_PATH, StyleRegistry
+from vireo.safety import safety_from_config
+from vireo.translator import Translator
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+# -------------------------
+# Input / checkpoint
+# -------------------------
+def iter_rows(path: Path):
+    # yields (row_no, record) lazily; row_no is 0-based over data rows
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            for i, rec in enumerate(csv.DictReader(f)):
+                yield i, rec
+        else:
+            i = 0
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError as e:
+                    rec = ValueError(f"invalid JSON: {e}")  # reported on its row, not raised
+                if isinstance(rec, str):
+                    rec = {"thought": rec}
+                yield i, rec
+                i += 1
+
+
+def parse_row(rec, default_style: str, styles) -> tuple:
+    # (thought, style, error) for one input record; error is None when it can be translated
+    if isinstance(rec, Exception):
+        return "", default_style, str(rec)
+    if not isinstance(rec, dict):
+        return "", default_style, f"row must be an object or a string, not {type(rec).__name__}"
+    thought, style = rec.get("thought"), rec.get("style") or default_style
+    if not isinstance(style, str):
+        return "", default_style, "style must be a string"
+    if thought is not None and not isinstance(thought, str):
+        return "", style, "thought must be a string"
+    thought = (thought or "").strip()
+    if style not in styles:
+        return thought, style, f"unknown style {style!r}"
+    if not thought:
+        return thought, style, "empty thought"
+    return thought, style, None
+
+
+def completed_rows(out_path: Path) -> set:
+    """Rows already translated in out_path, which is rewritten to hold only their records.
+
+    Failed rows are retried on resume, so their old records (and torn lines of an
+    interrupted run) are dropped here instead of piling up next to the new ones.
+    """
+    done = set()
+    if not out_path.exists():
+        return done
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with open(out_path, "r", encoding="utf-8") as f, open(tmp, "w", encoding="utf-8") as out:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if rec.get("error") is None and rec["row"] not in done:
+                done.add(rec["row"])
+                out.write(line if line.endswith("\n") else line + "\n")
+    os.replace(tmp, out_path)
+    return done
+
+
+# -------------------------
+# Rate-limit-aware backoff
+# -------------------------
+class Backoff:
+    # Shared by all workers: a 429 from one worker pauses everyone until the
+    # server's retry-after (or our own exponential delay) has passed.
+    def __init__(self, base: float = 0.5, cap: float = 30.0, max_attempts: int = 6):
+        self.base = base
+        self.cap = cap
+        self.max_attempts = max_attempts
+        self.resume_at = 0.0
+        self.throttled = 0
+
+    def delay(self, attempt: int, retry_after=None) -> float:
+        if retry_after is not None:
+            return min(self.cap, retry_after)
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))  # full jitter
+
+    def pause_all(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+        self.throttled += 1
+
+    async def wait(self):
+        gap = self.resume_at - time.monotonic()
+        if gap > 0:
+            await asyncio.sleep(gap)
+
+
+def _retry_after(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _status(exc):
+    return getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+
+
+# -------------------------
+# Pipeline
+# -------------------------
+async def translate_one(client, translator: Translator, style, thought, backoff: Backoff) -> str:
+    line = translator.screened(style, thought)
+    if line is not None:
+        return line
+    if client is None:
+        return translator.registry.current().demo(thought, style)
+    import openai
+
+    messages = translator.messages(style, thought)
+    profile = translator.profiles.for_style(style)
+    params = {"n": translator.candidates} if translator.candidates > 1 else {}
+    for attempt in range(backoff.max_attempts):
+        await backoff.wait()
+        try:
+            started = time.perf_counter()
+            resp = await client.chat.completions.create(
+                model=profile.model,
+                messages=messages,
+                temperature=profile.temperature,
+                max_tokens=profile.max_tokens,
+                **params,
+            )
+            lines = [(c.message.content or "").strip() for c in sorted(resp.choices, key=lambda c: c.index or 0)]
+            line, _ = translator.pick(style, thought, lines, time.perf_counter() - started)
+            return translator.vetted(style, thought, line)[0]
+        except (openai.APIConnectionError, openai.APITimeoutError, openai.APIStatusError) as e:
+            status = _status(e)
+            if status is not None and status not in RETRYABLE_STATUS:
+                raise
+            if attempt == backoff.max_attempts - 1:
+                raise
+            delay = backoff.delay(attempt, _retry_after(e))
+            if status == 429:
+                backoff.pause_all(delay)
+            else:
+                await asyncio.sleep(delay)
+    raise RuntimeError("unreachable")
+
+
+async def run(args) -> dict:
+    registry = StyleRegistry(args.modes or MODES_PATH)
+    styles = set(registry.current().styles)
+    if args.style not in styles:
+        raise SystemExit(f"Unknown style {args.style!r}; choose from: {', '.join(sorted(styles))}")
+
+    client = None
+    if not args.demo:
+        from openai import AsyncOpenAI
+        import httpx
+
+        api_key = args.api_key or os.environ.get("OPENAI_API_KEY")
+        if not api_key:
+            raise SystemExit("No API key: pass --api-key, set OPENAI_API_KEY, or use --demo")
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=args.base_url or os.environ.get("OPENAI_BASE_URL") or None,
+            http_client=httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(args.timeout, connect=5.0)),
+            max_retries=0,  # retries are ours, so 429s can pause every worker
+        )
+
+    in_path, out_path = Path(args.input), Path(args.output)
+    done = completed_rows(out_path) if args.resume else set()
+    backoff = Backoff(max_attempts=args.max_attempts)
+    reranker = Reranker(args.candidates) if args.candidates > 1 else None
+    # no cache: every row is asked; the translator supplies prompts, safety and the rerank
+    translator = Translator(registry, TranslationCache(path=None), model=args.model, temperature=args.temperature,
+                            max_tokens=args.max_tokens, reranker=reranker, fewshot_cfg={},
+                            safety=None if args.no_safety else safety_from_config({}))
+
+    todo = asyncio.Queue(maxsize=args.concurrency * 4)
+    results = asyncio.Queue(maxsize=args.concurrency * 4)
+    stats = {"read": 0, "skipped": 0, "ok": 0, "failed": 0}
+    t0 = time.perf_counter()
+
+    async def reader():
+        for row, rec in iter_rows(in_path):
+            stats["read"] += 1
+            if row in done:
+                stats["skipped"] += 1
+                continue
+            await todo.put((row, rec))
+        for _ in range(args.concurrency):
+            await todo.put(None)
+
+    async def worker():
+        while True:
+            item = await todo.get()
+            if item is None:
+                return
+            row, rec = item
+            thought, style, error = parse_row(rec, args.style, styles)
+            out = {"row": row, "style": style, "thought": thought, "line": None, "error": error}
+            if error is None:
+                try:
+                    out["line"] = await translate_one(client, translator, style, thought, backoff)
+                except Exception as e:
+                    out["error"] = f"{type(e).__name__}: {e}"
+            await results.put(out)
+
+    async def writer():
+        mode = "a" if args.resume else "w"
+        with open(out_path, mode, encoding="utf-8") as f:
+            n = 0
+            while True:
+                out = await results.get()
+                if out is None:
+                    break
+                f.write(json.dumps(out, ensure_ascii=False) + "\n")
+                stats["failed" if out["error"] else "ok"] += 1
+                n += 1
+                if n % args.flush_every == 0:
+                    f.flush()
+                    if not args.quiet:
+                        rate = n / (time.perf_counter() - t0)
+                        print(f"{n} rows written ({rate:.0f}/s, throttled {backoff.throttled}x)", file=sys.stderr)
+
+    write_task = asyncio.create_task(writer())
+    workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+    await reader()
+    await asyncio.gather(*workers)
+    await results.put(None)
+    await write_task
+    if client is not None:
+        await client.close()
+
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    stats["throttled"] = backoff.throttled
+    if reranker is not None:
+        stats["candidates"] = reranker.stats()
+    return stats
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog="python -m vireo.batch", description="Translate a JSONL/CSV file of thoughts.")
+    p.add_argument("input", help="JSONL (one object or string per line) or CSV with a 'thought' column")
+    p.add_argument("-o", "--output", required=True, help="JSONL output, appended to with --resume")
+    p.add_argument("--style", default="Poetic", help="style for rows without a 'style' field")
+    p.add_argument("--concurrency", type=int, default=16, help="max in-flight requests")
+    p.add_argument("--resume", action="store_true", help="skip rows already translated in --output; retry failed ones")
+    p.add_argument("--demo", action="store_true", help="use the offline demo translator (no API calls)")
+    p.add_argument("--model", default=MODEL)
+    p.add_argument("--temperature", type=float, default=TEMPERATURE)
+    p.add_argument("--max-tokens", type=int, default=MAX_TOKENS)
+    p.add_argument("--candidates", type=int, default=1, help="choices per call; the best locally valid one is kept")
+    p.add_argument("--max-attempts", type=int, default=6)
+    p.add_argument("--timeout", type=float, default=30.0)
+    p.add_argument("--api-key", default=None)
+    p.add_argument("--base-url", default=None)
+    p.add_argument("--modes", default=None, help="path to poetic_modes.json")
+    p.add_argument("--no-safety", action="store_true", help="skip the local crisis / self-harm check")
+    p.add_argument("--flush-every", type=int, default=500)
+    p.add_argument("--quiet", action="store_true")
+    args = p.parse_args(argv)
+    if args.concurrency < 1:
+        p.error("--concurrency must be >= 1")
+    return args
+
+
+def main(argv=None):
+    stats = asyncio.run(run(parse_args(argv)))
+    print(json.dumps(stats), file=sys.stderr)
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
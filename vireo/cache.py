@@ -0,0 +1,228 @@
+# vireo/cache.py — translation cache in front of the completion call
+#
+# Two tiers:
+#   1. per-process in-memory map (LRU or FIFO eviction, TTL, size limit)
+#   2. on-disk SQLite store (WAL mode) shared by every Streamlit worker process
+#
+# Keys are derived from (style, normalized thought, model, temperature, prompt
+# version), so the same short thought asked again minutes later never reaches the
+# API, and a changed prompt (poetic_modes.json hot-reload) starts from a cold cache.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(".cache") / "translations.sqlite3"
+EVICTION_POLICIES = ("lru", "fifo")
+DISK_COUNT_TTL = 30.0  # stats() recounts the SQLite rows at most this often
+
+
+def normalize_thought(text: str) -> str:
+    # Case-fold, collapse whitespace and drop trailing punctuation so that
+    # "I feel stuck." and "  i feel   stuck " share one entry.
+    t = " ".join((text or "").split()).casefold()
+    return t.rstrip(".!?… ")
+
+
+def make_key(style: str, thought: str, model: str, temperature: float, version: str = "") -> str:
+    # version names the prompt that produced the line: the style registry snapshot, plus
+    # a namespace for writers whose lines are not comparable (no rerank / vetting)
+    raw = json.dumps([style, normalize_thought(thought), model, round(float(temperature), 3), version],
+                     ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    def __init__(self, path=DEFAULT_DB_PATH, max_entries: int = 2048, ttl_seconds: float = 86400,
+                 disk_max_entries: int = 100_000, eviction: str = "lru"):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"eviction must be one of {EVICTION_POLICIES}, got {eviction!r}")
+        self.max_entries = int(max_entries)
+        self.ttl_seconds = float(ttl_seconds)
+        self.disk_max_entries = int(disk_max_entries)
+        self.eviction = eviction
+
+        self._mem = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                          "writes": 0, "evictions": 0, "expired": 0}
+
+        self._db = None
+        if path:
+            self._db = self._open_db(Path(path))
+        self._writes_since_prune = 0
+        self._disk_count = (None, 0.0)  # (rows, counted at)
+
+    # ---- SQLite tier ----
+    @staticmethod
+    def _open_db(path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS translations_stored_at ON translations(stored_at)")
+        return db
+
+    def _disk_get(self, key, now):
+        try:
+            row = self._db.execute(
+                "SELECT value, stored_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        if self.ttl_seconds and now - row[1] > self.ttl_seconds:
+            return None
+        return row
+
+    def _disk_put(self, key, value, now):
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            self._writes_since_prune += 1
+            # Pruning is a full index scan; amortize it over many writes.
+            if self._writes_since_prune >= 256:
+                self._writes_since_prune = 0
+                self._disk_prune(now)
+        except sqlite3.Error:
+            pass
+
+    def _disk_prune(self, now):
+        if self.ttl_seconds:
+            self._db.execute("DELETE FROM translations WHERE stored_at < ?", (now - self.ttl_seconds,))
+        if self.disk_max_entries:
+            self._db.execute(
+                "DELETE FROM translations WHERE key IN ("
+                " SELECT key FROM translations ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max_entries,),
+            )
+
+    # ---- Memory tier ----
+    def _mem_put(self, key, value, stored_at):
+        self._mem[key] = (value, stored_at)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    # ---- Public API ----
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                value, stored_at = item
+                if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                    del self._mem[key]
+                    self._counters["expired"] += 1
+                else:
+                    if self.eviction == "lru":
+                        self._mem.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+
+            if self._db is not None:
+                row = self._disk_get(key, now)
+                if row is not None:
+                    self._mem_put(key, row[0], row[1])
+                    self._counters["disk_hits"] += 1
+                    return row[0]
+
+            self._counters["misses"] += 1
+            return None
+
+    def get_many(self, keys) -> dict:
+        """Batched get(): memory first, then one SQLite query for the rest. Returns hits only."""
+        now = time.time()
+        found, missing = {}, []
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                item = self._mem.get(key)
+                if item is not None and not (self.ttl_seconds and now - item[1] > self.ttl_seconds):
+                    if self.eviction == "lru":
+                        self._mem.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    found[key] = item[0]
+                else:
+                    missing.append(key)
+            if missing and self._db is not None:
+                rows = []
+                for i in range(0, len(missing), 500):  # stay under SQLite's variable limit
+                    chunk = missing[i:i + 500]
+                    try:
+                        rows += self._db.execute(
+                            f"SELECT key, value, stored_at FROM translations WHERE key IN ({','.join('?' * len(chunk))})",
+                            chunk,
+                        ).fetchall()
+                    except sqlite3.Error:
+                        pass
+                for key, value, stored_at in rows:
+                    if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                        continue
+                    self._mem_put(key, value, stored_at)
+                    self._counters["disk_hits"] += 1
+                    found[key] = value
+            self._counters["misses"] += sum(1 for key in missing if key not in found)
+        return found
+
+    def put(self, key: str, value: str):
+        if not value:
+            return
+        now = time.time()
+        with self._lock:
+            self._mem_put(key, value, now)
+            self._counters["writes"] += 1
+            if self._db is not None:
+                self._disk_put(key, value, now)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM translations")
+                except sqlite3.Error:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["memory_entries"] = len(self._mem)
+            if self._db is not None:
+                # a full count per stats() call would be a table scan on every page rerun
+                count, at = self._disk_count
+                now = time.monotonic()
+                if count is None or now - at > DISK_COUNT_TTL:
+                    try:
+                        count = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+                    except sqlite3.Error:
+                        count = None
+                    self._disk_count = (count, now)
+                s["disk_entries"] = count
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        s["hit_rate"] = (s["memory_hits"] + s["disk_hits"]) / lookups if lookups else 0.0
+        s["pid"] = os.getpid()
+        return s
+
+
+def cache_from_config(cfg=None) -> TranslationCache:
+    # cfg mirrors the optional [cache] table in .streamlit/secrets.toml
+    cfg = dict(cfg or {})
+    return TranslationCache(
+        path=cfg.get("path", DEFAULT_DB_PATH) or None,
+        max_entries=cfg.get("max_entries", 2048),
+        ttl_seconds=cfg.get("ttl_seconds", 86400),
+        disk_max_entries=cfg.get("disk_max_entries", 100_000),
+        eviction=cfg.get("eviction", "lru"),
+    )
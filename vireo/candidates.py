@@ -0,0 +1,134 @@
+# vireo/candidates.py — local format checks and reranking for n completion choices
+#
+# The system prefix asks for ONE line, 0–22 words, no emojis, hashtags or quotation
+# marks, and no verbatim repeat of the user's phrasing. Models break that now and
+# then, and a re-ask costs a full round trip. Requesting n choices in one call and
+# picking the best-scoring valid one here costs only extra completion tokens.
+import re
+import threading
+from collections import namedtuple
+
+MAX_WORDS = 22
+
+_WORD = re.compile(r"[^\W_]+(?:['’][^\W_]+)*", re.UNICODE)
+_QUOTES = re.compile(r"[\"“”„‟«»]|^['‘’]|['‘’]$")
+_HASHTAG = re.compile(r"(?<!\w)#\w")
+_EMOJI = re.compile(
+    "[\U0001F000-\U0001FAFF\U00002600-\U000027BF\U00002B00-\U00002BFF\U0000FE0F\U0000200D]"
+)
+_PREAMBLE = re.compile(r"^(?:(?:sure|okay|ok)\b\s*[,!.]|here(?:['’]s| is| are)\b|(?:line|translation|output)\s*:)",
+                       re.IGNORECASE)
+
+# Reasons, in the order they are reported
+REASONS = ("empty", "multiline", "too_long", "quotes", "hashtag", "emoji", "explanation", "verbatim")
+
+Pick = namedtuple("Pick", "line index reasons rejected reask_avoided")
+
+
+def words(text: str) -> list:
+    return [w.replace("’", "'") for w in _WORD.findall((text or "").casefold())]
+
+
+def _ngrams(seq, n):
+    return {tuple(seq[i:i + n]) for i in range(len(seq) - n + 1)}
+
+
+def check(line: str, thought: str = "", max_words: int = MAX_WORDS) -> tuple:
+    """Format violations of line (empty tuple = valid)."""
+    line = (line or "").strip()
+    if not line:
+        return ("empty",)
+    found = []
+    if "\n" in line:
+        found.append("multiline")
+    line_words = words(line)
+    if len(line_words) > max_words:
+        found.append("too_long")
+    if _QUOTES.search(line):
+        found.append("quotes")
+    if _HASHTAG.search(line):
+        found.append("hashtag")
+    if _EMOJI.search(line):
+        found.append("emoji")
+    if _PREAMBLE.match(line):
+        found.append("explanation")
+    # verbatim: any run of min(4, len) thought words, for thoughts of 3+ words
+    thought_words = words(thought)
+    n = min(4, len(thought_words))
+    if n >= 3 and _ngrams(thought_words, n) & _ngrams(line_words, n):
+        found.append("verbatim")
+    return tuple(found)
+
+
+def score(line: str, thought: str = "") -> float:
+    """Soft preference among valid lines: higher is better."""
+    line_words = words(line)
+    if not line_words:
+        return float("-inf")
+    s = 0.0
+    # sweet spot 6–18 words
+    if len(line_words) < 6:
+        s -= 0.1 * (6 - len(line_words))
+    elif len(line_words) > 18:
+        s -= 0.1 * (len(line_words) - 18)
+    # transform rather than echo: penalize word overlap with the thought
+    content = {w for w in line_words if len(w) > 3}
+    thought_content = {w for w in words(thought) if len(w) > 3}
+    if content and thought_content:
+        s -= len(content & thought_content) / len(content | thought_content)
+    # repeated content words read as filler
+    long_words = [w for w in line_words if len(w) > 3]
+    s -= 0.2 * (len(long_words) - len(set(long_words)))
+    return s
+
+
+class Reranker:
+    def __init__(self, n: int = 3, max_words: int = MAX_WORDS):
+        self.n = max(1, int(n))
+        self.max_words = int(max_words)
+        self._lock = threading.Lock()
+        self._counters = {"picks": 0, "candidates": 0, "rejected": 0, "none_valid": 0,
+                          "reasks_avoided": 0, "saved_seconds": 0.0}
+        self._reasons = dict.fromkeys(REASONS, 0)
+
+    def pick(self, lines, thought: str, seconds: float = None) -> Pick:
+        """Best candidate: fewest violations, then highest score, then earliest choice.
+
+        seconds is the upstream latency of the call; when choice 0 was invalid but
+        another one passed, that is the round trip a re-ask would have cost.
+        """
+        lines = [(line or "").strip() for line in lines]
+        checked = [check(line, thought, self.max_words) for line in lines]
+        best = min(range(len(lines)), key=lambda i: (len(checked[i]), -score(lines[i], thought), i))
+        reasons = checked[best]
+        rejected = [r for r in checked if r]
+        reask_avoided = bool(checked[0]) and not reasons
+        with self._lock:
+            self._counters["picks"] += 1
+            self._counters["candidates"] += len(lines)
+            self._counters["rejected"] += len(rejected)
+            self._counters["none_valid"] += bool(reasons)
+            if reask_avoided:
+                self._counters["reasks_avoided"] += 1
+                self._counters["saved_seconds"] += seconds or 0.0
+            for r in rejected:
+                for reason in r:
+                    self._reasons[reason] += 1
+        return Pick(lines[best], best, reasons, rejected, reask_avoided)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["reasons"] = {k: v for k, v in self._reasons.items() if v}
+        s["n"] = self.n
+        s["reject_rate"] = s["rejected"] / s["candidates"] if s["candidates"] else 0.0
+        s["saved_seconds"] = round(s["saved_seconds"], 3)
+        return s
+
+
+def reranker_from_config(cfg=None):
+    # cfg mirrors the optional [candidates] table in .streamlit/secrets.toml; None = take choice 0 as-is
+    cfg = dict(cfg or {})
+    if not cfg.get("enabled", True):
+        return None
+    return Reranker(n=cfg.get("n", 3), max_words=cfg.get("max_words", MAX_WORDS))
@@ -0,0 +1,278 @@
+# vireo/cards.py — share-card images (line on a branded per-style background)
+#
+# Rendering happens in a small process pool, so a burst of shares can't stall the
+# Streamlit worker's threads on Pillow. Each pool process preloads the fonts and the
+# per-style backgrounds once (lru_cache) and reuses them for every card. Finished
+# PNG/WebP bytes are stored under the sha256 of everything that affects the pixels,
+# so a repeat share is a file read. At most `max_pending` renders are queued; past
+# that (or after `timeout`) get() returns None and the page shares text only.
+# Pillow is imported only where cards are drawn, so the page process (which just
+# hashes, reads files and submits to the pool) never loads it.
+import colorsys
+import hashlib
+import io
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import textwrap
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from functools import lru_cache
+from pathlib import Path
+
+from vireo.singleflight import SingleFlight
+
+HERO_PATH = Path(__file__).resolve().parent.parent / "assets" / "vireo_hero.png"
+DEFAULT_PATH = Path(".cache") / "cards"
+VIREO_GREEN = (41, 163, 41)
+TEMPLATE_VERSION = 1  # bump when the layout changes so old cards are not reused
+MIME = {"png": "image/png", "webp": "image/webp"}
+
+
+# -------------------------
+# Rendering (runs inside pool processes)
+# -------------------------
+@lru_cache(maxsize=16)
+def _font(size: int, font_path: str = ""):
+    from PIL import ImageFont
+
+    for candidate in (font_path, "DejaVuSans.ttf"):
+        if candidate:
+            try:
+                return ImageFont.truetype(candidate, size)
+            except OSError:
+                pass
+    return ImageFont.load_default(size=size)
+
+
+def _accent(style: str) -> tuple:
+    # stable per-style tint: hue from the style name, fixed saturation/value
+    hue = (zlib.crc32(style.encode("utf-8")) % 360) / 360
+    r, g, b = colorsys.hsv_to_rgb(hue, 0.55, 0.75)
+    return int(r * 255), int(g * 255), int(b * 255)
+
+
+@lru_cache(maxsize=4)
+def _hero_base(size: int, hero_path: str):
+    # the expensive part (decode, resize, blur), shared by every style
+    from PIL import Image, ImageEnhance, ImageFilter
+
+    try:
+        hero = Image.open(hero_path).convert("RGB")
+        side = min(hero.size)
+        left, top = (hero.width - side) // 2, (hero.height - side) // 2
+        base = hero.crop((left, top, left + side, top + side)).resize((size, size), Image.LANCZOS)
+        base = ImageEnhance.Brightness(base.filter(ImageFilter.GaussianBlur(size // 120))).enhance(0.45)
+    except OSError:
+        base = Image.new("RGB", (size, size), (0, 0, 0))
+    # darken the lower two thirds so the line stays readable on any hero
+    shade = Image.linear_gradient("L").resize((size, size)).point(lambda v: int(v * 0.75))
+    return base, shade
+
+
+@lru_cache(maxsize=64)
+def _background(style: str, size: int, hero_path: str):
+    from PIL import Image
+
+    base, shade = _hero_base(size, hero_path)
+    card = Image.blend(base, Image.new("RGB", (size, size), _accent(style)), 0.22)
+    card.paste((0, 0, 0), (0, 0), shade)
+    return card
+
+
+def _wrap(draw, text: str, font, width: int) -> list:
+    for chars in range(40, 8, -2):
+        lines = textwrap.wrap(text, chars)
+        if all(draw.textlength(line, font=font) <= width for line in lines):
+            return lines
+    return textwrap.wrap(text, 8)
+
+
+def render_card(line: str, style: str, size: int = 1080, fmt: str = "png",
+                hero_path: str = str(HERO_PATH), font_path: str = "") -> bytes:
+    from PIL import ImageDraw
+
+    card = _background(style, size, hero_path).copy()
+    draw = ImageDraw.Draw(card)
+    margin = size // 12
+    width = size - 2 * margin
+
+    # shrink the type until the wrapped line fits the middle band
+    for pt in range(size // 14, size // 32, -max(1, size // 270)):
+        font = _font(pt, font_path)
+        lines = _wrap(draw, line, font, width)
+        height = len(lines) * int(pt * 1.3)
+        if height <= size * 0.55:
+            break
+    y = (size - height) // 2
+    for text in lines:
+        x = (size - draw.textlength(text, font=font)) // 2
+        draw.text((x, y), text, font=font, fill=(245, 245, 245))
+        y += int(pt * 1.3)
+
+    small = _font(size // 36, font_path)
+    draw.text((margin, margin), "VIREO", font=_font(size // 22, font_path), fill=VIREO_GREEN)
+    draw.text((margin, size - margin - size // 36), style, font=small, fill=_accent(style))
+    tag = "#VIREO"
+    draw.text((size - margin - draw.textlength(tag, font=small), size - margin - size // 36),
+              tag, font=small, fill=VIREO_GREEN)
+
+    out = io.BytesIO()
+    if fmt == "webp":
+        card.save(out, "WEBP", quality=88, method=4)
+    else:
+        card.save(out, "PNG", compress_level=3)  # encode dominates render time; 3 is ~2x faster than 6
+    return out.getvalue()
+
+
+def _warm(styles, size, hero_path, font_path):
+    # pool initializer: pay font/background loading once per process
+    for style in styles:
+        _background(style, size, hero_path)
+    _font(size // 22, font_path)
+    _font(size // 36, font_path)
+
+
+# -------------------------
+# Cache + pool (page side)
+# -------------------------
+def _file_digest(path) -> str:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:16]
+    except OSError:
+        return "none"
+
+
+class CardRenderer:
+    def __init__(self, path=DEFAULT_PATH, size: int = 1080, fmt: str = "png", workers: int = 2,
+                 max_pending: int = 16, timeout: float = 5.0, max_files: int = 20_000,
+                 hero_path=HERO_PATH, font_path: str = "", styles=()):
+        self.dir = Path(path)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.size = int(size)
+        self.fmt = fmt if fmt in MIME else "png"
+        self.max_pending = int(max_pending)
+        self.timeout = float(timeout)
+        self.max_files = int(max_files)
+        self.hero_path = str(hero_path)
+        self.font_path = font_path or ""
+        self._asset_digest = f"{_file_digest(self.hero_path)}:{_file_digest(self.font_path) if self.font_path else ''}"
+        self._pool = None
+        if workers > 0:
+            # spawn: forking a process that runs Streamlit's threads is not safe
+            self._pool = ProcessPoolExecutor(
+                max_workers=int(workers), mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm, initargs=(tuple(styles), self.size, self.hero_path, self.font_path),
+            )
+            # A multiprocessing child (e.g. a benchmark worker) exits via os._exit and
+            # joins its non-daemon children first; stop the pool before that join.
+            multiprocessing.util.Finalize(self, self._pool.shutdown, kwargs={"cancel_futures": True},
+                                          exitpriority=10)
+        self._single_flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._writes = 0
+        self._counters = {"hits": 0, "renders": 0, "rejected": 0, "timeouts": 0}
+        self._render_ms = deque(maxlen=512)
+
+    def key(self, line: str, style: str, fmt: str = None) -> str:
+        spec = {"v": TEMPLATE_VERSION, "line": line.strip(), "style": style, "size": self.size,
+                "fmt": fmt or self.fmt, "assets": self._asset_digest}
+        return hashlib.sha256(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, fmt: str) -> Path:
+        return self.dir / key[:2] / f"{key}.{fmt}"
+
+    def get(self, line: str, style: str, fmt: str = None):
+        """Card bytes for (line, style), or None when the renderer is saturated or too slow."""
+        fmt = fmt if fmt in MIME else self.fmt
+        key = self.key(line, style, fmt)
+        path = self._path(key, fmt)
+        try:
+            data = path.read_bytes()
+            with self._lock:
+                self._counters["hits"] += 1
+            return data
+        except OSError:
+            pass
+        try:
+            return self._single_flight.do(key, lambda: self._render(line.strip(), style, fmt, path))
+        except (FutureTimeout, RuntimeError):
+            return None
+
+    def _render(self, line, style, fmt, path):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._counters["rejected"] += 1
+                raise RuntimeError("card renderer saturated")
+            self._pending += 1
+        t0 = time.perf_counter()
+        try:
+            if self._pool is None:
+                data = render_card(line, style, self.size, fmt, self.hero_path, self.font_path)
+            else:
+                future = self._pool.submit(render_card, line, style, self.size, fmt, self.hero_path, self.font_path)
+                try:
+                    data = future.result(timeout=self.timeout)
+                except FutureTimeout:
+                    with self._lock:
+                        self._counters["timeouts"] += 1
+                    raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)  # atomic: other workers never read a partial card
+        with self._lock:
+            self._counters["renders"] += 1
+            self._render_ms.append((time.perf_counter() - t0) * 1000)
+            self._writes += 1
+            prune = self._writes % 256 == 0
+        if prune:
+            self.prune()
+        return data
+
+    def prune(self):
+        # keep the newest max_files cards (by mtime)
+        files = sorted(self.dir.glob("*/*.*"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in files[self.max_files:]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["pending"] = self._pending
+            samples = sorted(self._render_ms)
+        s["render_ms_p50"] = round(samples[len(samples) // 2], 1) if samples else None
+        s["render_ms_p95"] = round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 1) if samples else None
+        total = s["hits"] + s["renders"]
+        s["hit_rate"] = s["hits"] / total if total else 0.0
+        return s
+
+
+def cards_from_config(cfg=None, styles=()):
+    # cfg mirrors the optional [cards] table in .streamlit/secrets.toml; None when disabled
+    cfg = dict(cfg or {})
+    if not cfg.get("enabled", True):
+        return None
+    return CardRenderer(
+        path=cfg.get("path", DEFAULT_PATH),
+        size=cfg.get("size", 1080),
+        fmt=cfg.get("format", "png"),
+        workers=cfg.get("workers", 2),
+        max_pending=cfg.get("max_pending", 16),
+        timeout=cfg.get("timeout", 5.0),
+        max_files=cfg.get("max_files", 20_000),
+        font_path=cfg.get("font_path", ""),
+        styles=styles,
+    )
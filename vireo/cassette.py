@@ -0,0 +1,305 @@
+# vireo/cassette.py — record/replay for chat completions, for reproducible offline runs
+#
+#   cassette = Cassette(".cache/translate.cassette", mode="auto")
+#   client = cassette.wrap(openai_client)     # anything that goes through client.chat.completions.create
+#
+#   python -m vireo.cassette .cache/translate.cassette     # summary of a recorded cassette
+#
+# Modes: "record" always asks upstream and appends what came back; "replay" serves only
+# from the cassette (a miss raises CassetteMiss, never the network); "auto" replays
+# hits and records misses. Requests are keyed on what decides the answer — messages,
+# model, temperature, max_tokens, n — so a streamed recording also answers a plain call
+# and vice versa. Several recordings of one request (temperature > 0) are replayed
+# round-robin, starting from the first, so every run sees the same sequence.
+#
+# File format: append-only lines, one os.write each (safe for concurrent recorders):
+#   R <key> <request json>      once per request, for humans and `python -m vireo.cassette`
+#   A <key> <answer json>       one per recording
+# Opening a cassette only indexes line offsets; answers are parsed on first replay.
+# Answer json: l = seconds until the full response, c = text per choice,
+# u = [prompt, completion, total] tokens, e = [[seconds, choice, delta], ...] for streams.
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+MODES = ("record", "replay", "auto")
+KEY_LEN = 32  # hex chars of sha256
+
+
+class CassetteMiss(LookupError):
+    status_code = 404  # not retryable, not an upstream failure (see vireo.resilience)
+
+    def __init__(self, key: str, reason: str = "no recording"):
+        self.key = key
+        super().__init__(f"cassette: {reason} for request {key}")
+
+
+def request_of(params: dict) -> dict:
+    return {
+        "model": params.get("model"),
+        "messages": [{"role": m["role"], "content": m["content"]} for m in params.get("messages", [])],
+        "temperature": params.get("temperature"),
+        "max_tokens": params.get("max_tokens"),
+        "n": params.get("n", 1),
+    }
+
+
+def request_key(request: dict) -> str:
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:KEY_LEN]
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _usage(usage):
+    if usage is None:
+        return None
+    return [getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0,
+            getattr(usage, "total_tokens", 0) or 0]
+
+
+def _usage_obj(u):
+    if u is None:
+        return None
+    return SimpleNamespace(prompt_tokens=u[0], completion_tokens=u[1], total_tokens=u[2])
+
+
+# -------------------------
+# Replayed responses (the attributes vireo.completions reads)
+# -------------------------
+def _response(answer):
+    choices = [SimpleNamespace(index=i, message=SimpleNamespace(role="assistant", content=text),
+                               finish_reason="stop")
+               for i, text in enumerate(answer["c"])]
+    return SimpleNamespace(choices=choices, usage=_usage_obj(answer.get("u")))
+
+
+def _chunk(index, text):
+    return SimpleNamespace(choices=[SimpleNamespace(index=index, delta=SimpleNamespace(content=text),
+                                                    finish_reason=None)], usage=None)
+
+
+class Cassette:
+    def __init__(self, path, mode: str = "auto", latency_ms: float = None, latency_scale: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"cassette mode must be one of {', '.join(MODES)}, got {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_ms = None if latency_ms is None else float(latency_ms)
+        self.latency_scale = float(latency_scale)
+        self._lock = threading.Lock()
+        self._index = {}    # key -> [(offset, length) or parsed answer dict, ...]
+        self._next = {}     # key -> next recording to replay
+        self._requests = set()
+        self._counters = {"hits": 0, "misses": 0, "recorded": 0}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if mode == "replay" and not self.path.exists():
+            raise FileNotFoundError(f"cassette {self.path} does not exist (record it first)")
+        flags = os.O_RDONLY if mode == "replay" else os.O_RDWR | os.O_APPEND | os.O_CREAT
+        self._fd = os.open(self.path, flags, 0o644)
+        self._scan()
+
+    def _scan(self):
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n") and len(line) > KEY_LEN + 3:
+                    key = line[2:2 + KEY_LEN].decode("ascii")
+                    if line[:1] == b"A":
+                        self._index.setdefault(key, []).append((offset, len(line)))
+                    elif line[:1] == b"R":
+                        self._requests.add(key)
+                offset += len(line)  # a torn last line (crashed recorder) is skipped
+
+    def close(self):
+        os.close(self._fd)
+
+    def wrap(self, client=None) -> "CassetteClient":
+        """client may be None in replay mode (nothing will be sent anywhere)."""
+        return CassetteClient(self, client)
+
+    # ---- lookup ----
+    def _answer(self, key: str):
+        with self._lock:
+            recordings = self._index.get(key)
+            if not recordings:
+                return None
+            i = self._next.get(key, 0)
+            self._next[key] = (i + 1) % len(recordings)
+            entry = recordings[i]
+        if isinstance(entry, dict):
+            return entry
+        offset, length = entry
+        answer = json.loads(os.pread(self._fd, length, offset)[3 + KEY_LEN:])
+        with self._lock:
+            recordings[i] = answer
+        return answer
+
+    def _add(self, key: str, request: dict, answer: dict):
+        data = f"A {key} {_dumps(answer)}\n"
+        with self._lock:
+            if key not in self._requests:
+                data = f"R {key} {_dumps(request)}\n" + data
+                self._requests.add(key)
+            os.write(self._fd, data.encode("utf-8"))  # one write: lines never interleave
+            self._index.setdefault(key, []).append(answer)
+            self._counters["recorded"] += 1
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _delay(self, recorded: float) -> float:
+        return self.latency_ms / 1000 if self.latency_ms is not None else recorded * self.latency_scale
+
+    # ---- the wrapped create() ----
+    def create(self, inner, params: dict):
+        request = request_of(params)
+        key = request_key(request)
+        stream = bool(params.get("stream"))
+        if self.mode != "record":
+            answer = self._answer(key)
+            if answer is not None:
+                self._count("hits")
+                return self._replay_stream(answer) if stream else self._replay(answer)
+            self._count("misses")
+            if self.mode == "replay":
+                raise CassetteMiss(key)
+        if inner is None:
+            raise CassetteMiss(key, "no upstream client to record")
+        t0 = time.perf_counter()
+        resp = inner.chat.completions.create(**params)
+        if stream:
+            return self._record_stream(key, request, resp, t0)
+        choices = sorted(resp.choices, key=lambda c: c.index or 0)
+        self._add(key, request, {"l": round(time.perf_counter() - t0, 4),
+                                 "c": [c.message.content or "" for c in choices],
+                                 "u": _usage(getattr(resp, "usage", None))})
+        return resp
+
+    def _record_stream(self, key, request, stream, t0):
+        events, texts, usage = [], {}, None
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = _usage(chunk.usage)
+            for choice in chunk.choices or ():
+                if choice.delta.content:
+                    index = choice.index or 0
+                    events.append([round(time.perf_counter() - t0, 4), index, choice.delta.content])
+                    texts.setdefault(index, []).append(choice.delta.content)
+            yield chunk
+        # only complete streams get here; an abandoned one is not recorded
+        self._add(key, request, {"l": round(time.perf_counter() - t0, 4),
+                                 "c": ["".join(texts.get(i, ())) for i in range(max(texts, default=0) + 1)],
+                                 "u": usage, "e": events})
+
+    def _replay(self, answer):
+        time.sleep(self._delay(answer["l"]))
+        return _response(answer)
+
+    def _replay_stream(self, answer):
+        # one delta per choice when the recording was not streamed
+        events = answer.get("e") or [[answer["l"], i, text] for i, text in enumerate(answer["c"])]
+        start = time.perf_counter()
+        first = events[0][0] if events else answer["l"]
+        due = self._delay(first)
+        for t, index, text in events:
+            wait = start + due + (t - first) * self.latency_scale - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            yield _chunk(index, text)
+        yield SimpleNamespace(choices=[], usage=_usage_obj(answer.get("u")))
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["requests"] = len(self._index)
+            s["recordings"] = sum(len(v) for v in self._index.values())
+        s["mode"] = self.mode
+        s["bytes"] = os.fstat(self._fd).st_size
+        return s
+
+
+class _Completions:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **params):
+        return self._client.cassette.create(self._client.inner, params)
+
+
+class CassetteClient:
+    """Stands in for an OpenAI client: chat.completions.create and with_options."""
+
+    def __init__(self, cassette: Cassette, inner=None):
+        self.cassette = cassette
+        self.inner = inner
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def with_options(self, **options):
+        return CassetteClient(self.cassette, self.inner.with_options(**options) if self.inner is not None else None)
+
+
+def cassette_from_config(cfg=None):
+    # cfg mirrors the optional [cassette] table in .streamlit/secrets.toml; None when off
+    cfg = dict(cfg or {})
+    mode = cfg.get("mode", "auto")
+    if not cfg.get("path") or mode == "off":
+        return None
+    return Cassette(cfg["path"], mode=mode, latency_ms=cfg.get("latency_ms"),
+                    latency_scale=cfg.get("latency_scale", 1.0))
+
+
+# -------------------------
+# CLI: summary of a cassette
+# -------------------------
+def summarize(path) -> dict:
+    requests, answers = {}, []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                continue
+            kind, key, body = line[:1], line[2:2 + KEY_LEN].decode("ascii"), json.loads(line[3 + KEY_LEN:])
+            if kind == b"R":
+                requests[key] = body
+            else:
+                answers.append((key, body))
+    latencies = sorted(a["l"] for _, a in answers)
+
+    def pct(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1) if latencies else None
+
+    models = {}
+    for key, _ in answers:
+        model = requests.get(key, {}).get("model")
+        models[model] = models.get(model, 0) + 1
+    return {
+        "path": str(path),
+        "bytes": Path(path).stat().st_size,
+        "requests": len({k for k, _ in answers}),
+        "recordings": len(answers),
+        "streamed": sum(1 for _, a in answers if "e" in a),
+        "models": models,
+        "latency_ms": {"p50": pct(0.5), "p95": pct(0.95)},
+        "tokens": sum((a.get("u") or [0, 0, 0])[2] for _, a in answers),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Summarize a completion cassette.")
+    p.add_argument("path")
+    args = p.parse_args(argv)
+    print(json.dumps(summarize(args.path), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# vireo/clients.py — process-wide OpenAI client registry with pooled keep-alive connections
+#
+# Streamlit reruns the page script on every interaction; building OpenAI(...) there
+# means a fresh httpx pool (and TLS handshake) each time. The registry hands out one
+# client per (api key, base url) for the life of the process instead.
+#
+# httpx and openai are imported on first use: they cost ~0.6 s of a cold start and
+# Demo-mode sessions never need them.
+import hashlib
+import threading
+import time
+
+
+def _fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:10]
+
+
+class _PoolCounters:
+    # Fed by _CountingTransport; "active" counts requests whose response headers
+    # have not arrived yet (a streamed body may still be reading after that).
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self.errors = 0
+        self.last_used = None
+
+    def on_request(self, request):
+        with self.lock:
+            self.requests += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            self.last_used = time.time()
+
+    def on_response(self, response):
+        with self.lock:
+            self.active = max(0, self.active - 1)
+            if response.status_code >= 500 or response.status_code == 429:
+                self.errors += 1
+
+    def on_error(self, exc):
+        # connect errors and timeouts never produce a response
+        with self.lock:
+            self.active = max(0, self.active - 1)
+            self.errors += 1
+
+
+class _CountingTransport:
+    # Wraps the httpx transport rather than using event hooks: the response hook
+    # does not fire when the request fails, which left "active" counting up forever.
+    def __init__(self, inner, counters):
+        self.inner = inner
+        self.counters = counters
+
+    @property
+    def _pool(self):
+        return getattr(self.inner, "_pool", None)
+
+    def handle_request(self, request):
+        self.counters.on_request(request)
+        try:
+            response = self.inner.handle_request(request)
+        except BaseException as e:
+            self.counters.on_error(e)
+            raise
+        self.counters.on_response(response)
+        return response
+
+    def __enter__(self):
+        self.inner.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.inner.__exit__(*exc_info)
+
+    def close(self):
+        self.inner.close()
+
+
+class ClientRegistry:
+    def __init__(self, max_connections: int = 20, max_keepalive_connections: int = 10,
+                 keepalive_expiry: float = 30.0, timeout: float = 30.0, connect_timeout: float = 5.0,
+                 max_retries: int = 2):
+        import httpx
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._entries = {}  # (fingerprint, base_url) -> (OpenAI, httpx.Client, _PoolCounters, created_at)
+
+    def get(self, api_key: str, base_url: str = None):
+        key = (_fingerprint(api_key), base_url or "")
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+        import httpx
+        from openai import OpenAI
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                counters = _PoolCounters()
+                http_client = httpx.Client(
+                    timeout=self.timeout,
+                    transport=_CountingTransport(httpx.HTTPTransport(limits=self.limits), counters),
+                )
+                client = OpenAI(api_key=api_key, base_url=base_url or None, http_client=http_client,
+                                timeout=self.timeout, max_retries=self.max_retries)
+                entry = (client, http_client, counters, time.time())
+                self._entries[key] = entry
+        return entry[0]
+
+    @staticmethod
+    def _open_connections(http_client):
+        # httpx does not expose pool state publicly; peek at the httpcore pool if present.
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        conns = getattr(pool, "connections", None)
+        if conns is None:
+            return None, None
+        idle = sum(1 for c in conns if getattr(c, "is_idle", lambda: False)())
+        return len(conns), idle
+
+    def stats(self) -> list:
+        out = []
+        with self._lock:
+            entries = list(self._entries.items())
+        for (fp, base_url), (_, http_client, counters, created_at) in entries:
+            open_conns, idle_conns = self._open_connections(http_client)
+            with counters.lock:
+                out.append({
+                    "key": fp,
+                    "base_url": base_url or "default",
+                    "age_s": round(time.time() - created_at, 1),
+                    "requests": counters.requests,
+                    "active": counters.active,
+                    "peak_active": counters.peak_active,
+                    "upstream_errors": counters.errors,
+                    "open_connections": open_conns,
+                    "idle_connections": idle_conns,
+                    "max_connections": self.limits.max_connections,
+                })
+        return out
+
+    def close(self):
+        with self._lock:
+            for _, http_client, _, _ in self._entries.values():
+                http_client.close()
+            self._entries.clear()
+
+
+def registry_from_config(cfg=None) -> ClientRegistry:
+    # cfg mirrors the optional [openai_pool] table in .streamlit/secrets.toml
+    cfg = dict(cfg or {})
+    return ClientRegistry(
+        max_connections=cfg.get("max_connections", 20),
+        max_keepalive_connections=cfg.get("max_keepalive_connections", 10),
+        keepalive_expiry=cfg.get("keepalive_expiry", 30.0),
+        timeout=cfg.get("timeout", 30.0),
+        connect_timeout=cfg.get("connect_timeout", 5.0),
+        max_retries=cfg.get("max_retries", 2),
+    )
@@ -0,0 +1,95 @@
+# vireo/completions.py — thin wrappers around client.chat.completions.create
+import time
+
+
+def _per_call(client, timeout):
+    # Per-request timeout; retries are left to vireo.resilience when a timeout is given.
+    if timeout is None:
+        return client
+    return client.with_options(timeout=timeout, max_retries=0)
+
+
+def complete_choices(client, messages, model, temperature, max_tokens, n=1, timeout=None, on_usage=None) -> list:
+    # n > 1: one round trip, prompt tokens billed once; max_tokens applies per choice
+    params = {"n": n} if n > 1 else {}
+    resp = _per_call(client, timeout).chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        **params,
+    )
+    if on_usage is not None and getattr(resp, "usage", None) is not None:
+        on_usage(resp.usage)
+    choices = sorted(resp.choices, key=lambda c: c.index or 0)
+    return [(c.message.content or "").strip() for c in choices]
+
+
+def complete(client, messages, model, temperature, max_tokens, timeout=None, on_usage=None) -> str:
+    return complete_choices(client, messages, model, temperature, max_tokens,
+                            timeout=timeout, on_usage=on_usage)[0]
+
+
+class CompletionStream:
+    """Iterate text deltas of a streamed completion (stream=True).
+
+    Feed it to st.write_stream; afterwards `text` holds the full line and
+    `ttft` / `total` the time-to-first-token and full completion time (seconds).
+    With n > 1 only choice 0 is yielded; `texts` has every choice once done.
+    """
+
+    def __init__(self, client, messages, model, temperature, max_tokens, timeout=None, on_usage=None, n=1):
+        self.client = _per_call(client, timeout)
+        self.on_usage = on_usage
+        self.messages = messages
+        self.params = {"model": model, "temperature": temperature, "max_tokens": max_tokens}
+        if n > 1:
+            self.params["n"] = n
+        self.parts = []
+        self.others = {}  # choice index -> parts, for n > 1
+        self.ttft = None
+        self.total = None
+
+    def __iter__(self):
+        t0 = time.perf_counter()
+        stream = self.client.chat.completions.create(
+            messages=self.messages, stream=True, stream_options={"include_usage": True}, **self.params
+        )
+        try:
+            yield from self._deltas(stream, t0)
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()  # a consumer that stops early (safety hit) releases the connection
+            self.total = time.perf_counter() - t0
+
+    def _deltas(self, stream, t0):
+        for chunk in stream:
+            # with include_usage, the last chunk has no choices and carries the token counts
+            if getattr(chunk, "usage", None) is not None and self.on_usage is not None:
+                self.on_usage(chunk.usage)
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta.content
+            if not delta:
+                continue
+            if choice.index:
+                self.others.setdefault(choice.index, []).append(delta)
+                continue
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - t0
+            self.parts.append(delta)
+            yield delta
+
+    @property
+    def started(self) -> bool:
+        return self.ttft is not None
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts).strip()
+
+    @property
+    def texts(self) -> list:
+        return [self.text] + ["".join(self.others[i]).strip() for i in sorted(self.others)]
@@ -0,0 +1,63 @@
+# vireo/core.py — Streamlit-free translate logic shared by the pages, the batch CLI, ...
+import json
+from pathlib import Path
+
+MODES_PATH = Path(__file__).resolve().parent.parent / "poetic_modes.json"
+
+
+def load_modes(path=MODES_PATH) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Style list (exclude _meta)
+def list_styles(modes) -> list:
+    return [k for k in modes.keys() if k != "_meta"]
+
+
+# Helper to pull prompt/desc and examples for a style
+def get_style_block(modes, name):
+    block = modes[name]
+    if isinstance(block, dict):
+        prompt = block.get("prompt", "")
+        examples = block.get("examples", [])
+    else:
+        prompt = str(block)
+        examples = []
+    desc = prompt.split(".")[0].strip() if prompt else ""
+    return prompt, desc, examples
+
+
+# Build messages with system prefix + style prompt + few-shots + user
+# (examples: a subset picked by vireo.fewshot; default is the style's whole pool)
+def build_messages(modes, style_name, user_text, examples=None):
+    sys_prefix = modes["_meta"]["system_prefix"]
+    style_prompt, _, pool = get_style_block(modes, style_name)
+    if examples is None:
+        examples = pool
+
+    msgs = [
+        {"role": "system", "content": sys_prefix},
+        {"role": "system", "content": style_prompt},
+    ]
+    for ex in examples:
+        t = ex.get("thought", "").strip()
+        l = ex.get("line", "").strip()
+        if t and l:
+            msgs.append({"role": "user", "content": t})
+            msgs.append({"role": "assistant", "content": l})
+    msgs.append({"role": "user", "content": user_text.strip()})
+    return msgs
+
+
+# Demo translator (no API) — templates live under "demo" in poetic_modes.json and are
+# compiled by vireo.registry; callers with their own registry use Snapshot.demo().
+_demo_registry = None
+
+
+def demo_translate(thought: str, style: str) -> str:
+    global _demo_registry
+    if _demo_registry is None:
+        from vireo.registry import StyleRegistry  # registry imports this module
+        _demo_registry = StyleRegistry()
+    return _demo_registry.current().demo(thought, style)
@@ -0,0 +1,130 @@
+# vireo/demo.py — Demo-mode lines from the "demo" templates in poetic_modes.json
+#
+# Each style lists a few templates with two placeholders: {thought} (the stripped
+# input) and {Thought} (same, first letter upper-cased — the rest is left alone, so
+# "I" and names survive). Templates are compiled once per registry snapshot into
+# positional format strings; the variant is picked from a CRC of the thought, so the
+# same thought always gets the same line (cache- and test-friendly) while different
+# thoughts spread over the variants.
+#
+#   DemoBook.render(thought, style)            # one line
+#   DemoBook.render_many(thoughts, styles)     # a batch; styles is one name or one per thought
+from string import Formatter
+from zlib import crc32
+
+DEFAULT_THOUGHT = "this moment"
+DEFAULT_FALLBACK = ("{Thought} turns toward light.",)
+FIELDS = {"thought": "{0}", "Thought": "{1}"}
+
+
+def normalize(thought) -> str:
+    return (thought or DEFAULT_THOUGHT).strip()
+
+
+def template_problems(template) -> list:
+    """Why a template can't be compiled (empty list when it can)."""
+    if not isinstance(template, str) or not template.strip():
+        return ["must be a non-empty string"]
+    try:
+        parsed = list(Formatter().parse(template))
+    except ValueError as e:
+        return [f"bad braces ({e})"]
+    problems = []
+    for _, field, spec, conversion in parsed:
+        if field is None:
+            continue
+        if field not in FIELDS:
+            problems.append(f"unknown placeholder {{{field}}} (use {{thought}} or {{Thought}})")
+        elif spec or conversion:
+            problems.append(f"placeholder {{{field}}} can't take a format spec or conversion")
+    return problems
+
+
+def _compile(template: str) -> tuple:
+    # -> (positional format string, needs the capitalized form)
+    out, capital = [], False
+    for literal, field, _, _ in Formatter().parse(template):
+        out.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is not None:
+            out.append(FIELDS[field])
+            capital = capital or field == "Thought"
+    return "".join(out), capital
+
+
+def _capital(t: str) -> str:
+    return t[:1].upper() + t[1:]
+
+
+class DemoTemplates:
+    """One style's compiled variants."""
+
+    __slots__ = ("sources", "_formats", "_n")
+
+    def __init__(self, templates):
+        self.sources = tuple(templates)
+        if not self.sources:
+            raise ValueError("at least one demo template is required")
+        self._formats = tuple(_compile(t) for t in self.sources)
+        self._n = len(self._formats)
+
+    def __len__(self):
+        return self._n
+
+    def format(self, t: str, h: int) -> str:
+        # t already normalized, h = crc32 of it
+        fmt, capital = self._formats[h % self._n]
+        return fmt.format(t, _capital(t) if capital else t)
+
+    def render(self, thought) -> str:
+        t = normalize(thought)
+        return self.format(t, crc32(t.encode("utf-8")) if self._n > 1 else 0)
+
+    def render_many(self, thoughts) -> list:
+        formats, n = self._formats, self._n
+        out = []
+        append = out.append
+        for thought in thoughts:
+            t = (thought or DEFAULT_THOUGHT).strip()
+            fmt, capital = formats[crc32(t.encode("utf-8")) % n if n > 1 else 0]
+            append(fmt.format(t, t[:1].upper() + t[1:] if capital else t))
+        return out
+
+
+class DemoBook:
+    """style name -> DemoTemplates, plus the fallback for styles without templates."""
+
+    __slots__ = ("styles", "fallback", "_table")
+
+    def __init__(self, styles: dict, fallback: DemoTemplates):
+        self.styles = styles
+        self.fallback = fallback
+        self._table = {name: (tpl._formats, tpl._n) for name, tpl in styles.items()}
+
+    def templates(self, style) -> DemoTemplates:
+        return self.styles.get(style) or self.fallback
+
+    def render(self, thought, style) -> str:
+        return self.templates(style).render(thought)
+
+    def render_many(self, thoughts, styles) -> list:
+        """Lines for many thoughts; styles is one style name or a sequence aligned with thoughts.
+
+        A thought repeated across styles (the compare-all grid) is normalized and
+        hashed once.
+        """
+        if isinstance(styles, str):
+            return self.templates(styles).render_many(thoughts)
+        table, default = self._table, (self.fallback._formats, self.fallback._n)
+        seen = {}
+        out = []
+        append = out.append
+        for thought, style in zip(thoughts, styles):
+            prepared = seen.get(thought)
+            if prepared is None:
+                t = (thought or DEFAULT_THOUGHT).strip()
+                prepared = seen[thought] = (t, t[:1].upper() + t[1:], crc32(t.encode("utf-8")))
+            t, capital, h = prepared
+            formats, n = table.get(style, default)
+            fmt, use_capital = formats[h % n]
+            append(fmt.format(t, capital if use_capital else t))
+        return out
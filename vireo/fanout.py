@@ -0,0 +1,70 @@
+# vireo/fanout.py — translate one thought across many styles concurrently
+#
+# One bounded thread pool per process is the global concurrency cap. Each fan-out
+# additionally keeps at most `per_request` calls in flight, so a single "All styles"
+# click cannot fill the whole pool queue and starve other sessions.
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class FanOut:
+    def __init__(self, max_workers: int = 16, per_request: int = 6):
+        self.max_workers = int(max_workers)
+        self.per_request = max(1, min(int(per_request), self.max_workers))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vireo-fanout")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._peak = 0
+        self._runs = 0
+
+    def _timed(self, fn, style, thought):
+        with self._lock:
+            self._in_flight += 1
+            self._peak = max(self._peak, self._in_flight)
+        t0 = time.perf_counter()
+        try:
+            return fn(style, thought), None, time.perf_counter() - t0
+        except Exception as e:
+            return None, e, time.perf_counter() - t0
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def run(self, fn, styles, thought):
+        """Yield (style, line, error, seconds) in completion order.
+
+        fn(style, thought) -> line runs on the shared pool; it must not touch st.*.
+        Closing the generator early (a cancelled job) starts no further calls and
+        returns once the calls already running are over, so their side effects
+        (quota usage records) never land after the caller has moved on.
+        """
+        with self._lock:
+            self._runs += 1
+        pending = list(styles)[::-1]
+        running = {}
+        try:
+            while pending or running:
+                while pending and len(running) < self.per_request:
+                    style = pending.pop()
+                    running[self._pool.submit(self._timed, fn, style, thought)] = style
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    style = running.pop(fut)
+                    line, err, seconds = fut.result()
+                    yield style, line, err, seconds
+        finally:
+            for fut in running:
+                fut.cancel()  # only succeeds for calls still waiting for a pool thread
+            wait(running)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"runs": self._runs, "in_flight": self._in_flight, "peak_in_flight": self._peak,
+                    "max_workers": self.max_workers, "per_request": self.per_request}
+
+
+def fanout_from_config(cfg=None) -> FanOut:
+    # cfg mirrors the optional [fanout] table in .streamlit/secrets.toml
+    cfg = dict(cfg or {})
+    return FanOut(max_workers=cfg.get("max_workers", 16), per_request=cfg.get("per_request", 6))
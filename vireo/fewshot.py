@@ -0,0 +1,75 @@
+# vireo/fewshot.py — pick the few-shot examples most relevant to the incoming thought
+#
+# Every style keeps a larger example pool in poetic_modes.json. Sending all of them
+# costs a fixed chunk of prompt tokens per call, so FewShotIndex embeds each pool
+# once (same hashing vectorizer as the semantic cache) and, per request, keeps the
+# k nearest examples that still fit a token budget for the whole prompt.
+import numpy as np
+
+from vireo.core import get_style_block, list_styles
+from vireo.semantic import HashingVectorizer
+
+# Chat-format overhead per message (role/separators) on OpenAI models.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English; close enough for budgeting without tiktoken
+    return (len(text or "") + 3) // 4
+
+
+def message_tokens(messages) -> int:
+    return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages) + 3
+
+
+class FewShotIndex:
+    def __init__(self, modes: dict, k: int = 3, token_budget: int = None, dim: int = 256):
+        self.k = int(k)
+        self.token_budget = token_budget
+        self.vectorizer = HashingVectorizer(dim)
+        self.sys_prefix = modes["_meta"]["system_prefix"]
+        self._pools = {}
+        for name in list_styles(modes):
+            prompt, _, examples = get_style_block(modes, name)
+            pool = [ex for ex in examples
+                    if ex.get("thought", "").strip() and ex.get("line", "").strip()]
+            vectors = np.stack([self.vectorizer.embed(ex["thought"]) for ex in pool]) if pool else None
+            costs = [estimate_tokens(ex["thought"]) + estimate_tokens(ex["line"]) + 2 * MESSAGE_OVERHEAD_TOKENS
+                     for ex in pool]
+            base = (estimate_tokens(self.sys_prefix) + estimate_tokens(prompt) + 3 * MESSAGE_OVERHEAD_TOKENS + 3)
+            self._pools[name] = (pool, vectors, costs, base)
+
+    def select(self, style: str, thought: str, k: int = None, token_budget: int = None) -> list:
+        """Up to k examples for style, most similar first, within token_budget for the whole prompt."""
+        k = self.k if k is None else k
+        token_budget = self.token_budget if token_budget is None else token_budget
+        pool, vectors, costs, base = self._pools[style]
+        if not pool or k <= 0:
+            return []
+        q = self.vectorizer.embed(thought)
+        order = np.argsort(-(vectors @ q), kind="stable") if q.any() else range(len(pool))
+        remaining = None
+        if token_budget:
+            remaining = token_budget - base - estimate_tokens(thought)
+        chosen = []
+        for i in order:
+            if len(chosen) == k:
+                break
+            if remaining is not None:
+                if costs[i] > remaining:
+                    continue
+                remaining -= costs[i]
+            chosen.append(pool[i])
+        return chosen
+
+    def pool_size(self, style: str) -> int:
+        return len(self._pools[style][0])
+
+
+def fewshot_from_config(modes, cfg=None):
+    # cfg mirrors the optional [fewshot] table in .streamlit/secrets.toml; None = send every example
+    cfg = dict(cfg or {})
+    if not cfg.get("enabled", True):
+        return None
+    return FewShotIndex(modes, k=cfg.get("k", 3), token_budget=cfg.get("token_budget") or None,
+                        dim=cfg.get("dim", 256))
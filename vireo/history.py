@@ -0,0 +1,236 @@
+# vireo/history.py — recent translations per session, in one process-wide memory budget
+#
+# Keeping lines in st.session_state grows without bound (one dict of str per entry,
+# per session, forever). Instead each session gets a fixed-size ring: style names
+# interned to a uint16 id, timestamps in an array, and thought + line as one UTF-8
+# bytes object per slot. The whole store has a byte budget; past it the least
+# recently used sessions are dropped first, and sessions idle for idle_seconds are
+# dropped as a matter of course. st.session_state only holds the session's id.
+#
+# With a shared state (vireo/shared.py) every entry is also appended to a capped list
+# per session there (batched), and a session this process does not hold — evicted
+# here, or first seen on this worker — is read back from it. The rings then act as a
+# per-process read-through cache over history every worker sees.
+#
+# Byte counts are estimates of what the store holds (payload plus fixed per-entry and
+# per-session overheads measured with sys.getsizeof), not allocator-exact.
+import csv
+import io
+import json
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple
+
+ENTRY_OVERHEAD = sys.getsizeof(b"") + 8 + 2 + 4 + 4  # bytes object + list slot + style id + split + stamp
+
+
+class HistoryEntry(NamedTuple):
+    thought: str
+    style: str
+    line: str
+    at: float  # unix time
+
+
+class _Ring:
+    __slots__ = ("styles", "stamps", "splits", "texts", "head", "count", "payload", "last_used")
+
+    def __init__(self, size: int):
+        self.styles = array("H", bytes(2 * size))   # interned style ids
+        self.stamps = array("I", bytes(4 * size))   # unix seconds
+        self.splits = array("I", bytes(4 * size))   # where the thought ends in texts[i]
+        self.texts = [None] * size                  # thought + line, UTF-8
+        self.head = 0                               # next slot to write
+        self.count = 0
+        self.payload = 0                            # bytes held in texts
+        self.last_used = time.monotonic()
+
+
+def _ring_overhead(size: int) -> int:
+    ring = _Ring(size)
+    return (sys.getsizeof(ring) + sys.getsizeof(ring.styles) + sys.getsizeof(ring.stamps)
+            + sys.getsizeof(ring.splits) + sys.getsizeof(ring.texts) + 100)  # + OrderedDict node and key
+
+
+def _clip(text: str, limit: int) -> bytes:
+    data = text.encode("utf-8")
+    if len(data) <= limit:
+        return data
+    return data[:limit].decode("utf-8", "ignore").encode("utf-8")  # don't split a character
+
+
+class HistoryStore:
+    def __init__(self, per_session: int = 20, max_bytes: int = 8 * 2**20, idle_seconds: float = 6 * 3600,
+                 max_text_bytes: int = 2000, shared=None):
+        self.per_session = int(per_session)
+        self.max_bytes = int(max_bytes)
+        self.idle_seconds = float(idle_seconds)
+        self.max_text_bytes = int(max_text_bytes)
+        self.shared = shared
+        self.session_overhead = _ring_overhead(self.per_session)
+        self._sessions = OrderedDict()  # session id -> _Ring, least recently used first
+        self._style_ids = {}
+        self._style_names = []
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"added": 0, "evicted_sessions": 0, "expired_sessions": 0, "loaded_sessions": 0}
+
+    def _intern(self, style: str) -> int:
+        sid = self._style_ids.get(style)
+        if sid is None:
+            if len(self._style_names) >= 0xFFFF:
+                raise ValueError("too many distinct styles")
+            sid = self._style_ids[style] = len(self._style_names)
+            self._style_names.append(style)
+        return sid
+
+    def _ring_bytes(self, ring: _Ring) -> int:
+        return self.session_overhead + ring.payload + ring.count * ENTRY_OVERHEAD
+
+    def _drop(self, session):
+        ring = self._sessions.pop(session)
+        self._bytes -= self._ring_bytes(ring)
+
+    def _trim(self, keep):
+        # idle sessions first (oldest are at the front), then LRU until under budget
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            session, ring = next(iter(self._sessions.items()))
+            if ring.last_used >= cutoff or session == keep:
+                break
+            self._drop(session)
+            self._counters["expired_sessions"] += 1
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            session = next(iter(self._sessions))
+            if session == keep:
+                break
+            self._drop(session)
+            self._counters["evicted_sessions"] += 1
+
+    def add(self, session: str, thought: str, style: str, line: str, at: float = None):
+        at = int(at if at is not None else time.time())
+        if self.shared is not None:
+            if session not in self._sessions:
+                self._load(session)  # new entries go on top of what other workers kept
+            thought = _clip(thought.strip(), self.max_text_bytes).decode("utf-8")
+            line = _clip(line.strip(), self.max_text_bytes).decode("utf-8")
+        with self._lock:
+            self._put(session, thought, style, line, at)
+            self._counters["added"] += 1
+            self._trim(session)
+        if self.shared is not None:
+            self.shared.append(f"history:{session}", json.dumps([thought, style, line, at], ensure_ascii=False),
+                               self.per_session, self.idle_seconds)
+
+    def _put(self, session, thought, style, line, at):
+        thought_b = _clip(thought.strip(), self.max_text_bytes)
+        text = thought_b + _clip(line.strip(), self.max_text_bytes)
+        ring = self._sessions.get(session)
+        if ring is None:
+            ring = self._sessions[session] = _Ring(self.per_session)
+            self._bytes += self.session_overhead
+        else:
+            self._sessions.move_to_end(session)
+        slot = ring.head
+        old = ring.texts[slot]
+        if old is not None:
+            ring.payload -= len(old)
+            self._bytes -= len(old) + ENTRY_OVERHEAD
+        else:
+            ring.count += 1
+        ring.texts[slot] = text
+        ring.splits[slot] = len(thought_b)
+        ring.styles[slot] = self._intern(style)
+        ring.stamps[slot] = at
+        ring.head = (slot + 1) % self.per_session
+        ring.payload += len(text)
+        ring.last_used = time.monotonic()
+        self._bytes += len(text) + ENTRY_OVERHEAD
+
+    def _load(self, session):
+        # read-through: a session another worker (or this one, before eviction) wrote
+        rows = [json.loads(v) for v in self.shared.recent(f"history:{session}", self.per_session)]
+        with self._lock:
+            if rows and session not in self._sessions:
+                for thought, style, line, at in reversed(rows):
+                    self._put(session, thought, style, line, int(at))
+                self._counters["loaded_sessions"] += 1
+                self._trim(session)
+
+    def recent(self, session: str, limit: int = None) -> list:
+        """Newest first."""
+        if self.shared is not None and session not in self._sessions:
+            self._load(session)
+        with self._lock:
+            ring = self._sessions.get(session)
+            if ring is None:
+                return []
+            ring.last_used = time.monotonic()
+            self._sessions.move_to_end(session)
+            n = ring.count if limit is None else min(limit, ring.count)
+            out = []
+            for k in range(1, n + 1):
+                slot = (ring.head - k) % self.per_session
+                text, split = ring.texts[slot], ring.splits[slot]
+                out.append(HistoryEntry(text[:split].decode("utf-8"), self._style_names[ring.styles[slot]],
+                                        text[split:].decode("utf-8"), float(ring.stamps[slot])))
+            return out
+
+    def clear(self, session: str):
+        with self._lock:
+            if session in self._sessions:
+                self._drop(session)
+        if self.shared is not None:
+            self.shared.delete(f"history:{session}")
+
+    def export(self, session: str, fmt: str = "jsonl") -> str:
+        """Oldest first, as "jsonl" or "csv"."""
+        entries = self.recent(session)[::-1]
+        if fmt == "jsonl":
+            return "".join(json.dumps({"at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(e.at)),
+                                       "style": e.style, "thought": e.thought, "line": e.line},
+                                      ensure_ascii=False) + "\n" for e in entries)
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(["at", "style", "thought", "line"])
+            for e in entries:
+                writer.writerow([time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(e.at)), e.style, e.thought, e.line])
+            return buf.getvalue()
+        raise ValueError(f"unknown export format {fmt!r}")
+
+    def session_stats(self, session: str) -> dict:
+        with self._lock:
+            ring = self._sessions.get(session)
+            if ring is None:
+                return {"entries": 0, "bytes": 0}
+            return {"entries": ring.count, "bytes": self._ring_bytes(ring)}
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["sessions"] = len(self._sessions)
+            s["entries"] = sum(r.count for r in self._sessions.values())
+            s["bytes"] = self._bytes
+            s["max_bytes"] = self.max_bytes
+            s["per_session"] = self.per_session
+            s["styles_interned"] = len(self._style_names)
+        s["bytes_per_session"] = round(s["bytes"] / s["sessions"]) if s["sessions"] else 0
+        return s
+
+
+def history_from_config(cfg=None, shared=None):
+    # cfg mirrors the optional [history] table in .streamlit/secrets.toml; None when disabled.
+    # shared: the [shared] vireo.shared.SharedState, to keep history across workers
+    cfg = dict(cfg or {})
+    if not cfg.get("enabled", True):
+        return None
+    return HistoryStore(
+        per_session=cfg.get("per_session", 20),
+        max_bytes=int(cfg.get("max_mb", 8) * 2**20),
+        idle_seconds=cfg.get("idle_seconds", 6 * 3600),
+        max_text_bytes=cfg.get("max_text_bytes", 2000),
+        shared=shared,
+    )
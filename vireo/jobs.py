@@ -0,0 +1,151 @@
+# vireo/jobs.py — process-wide bounded executor for translations, polled by job id
+#
+# A script run that blocks on chat.completions.create freezes the whole page and
+# pins a Streamlit worker thread. Instead the page submits the work here, keeps only
+# the job id in st.session_state and lets a fragment poll get(job_id) until it is
+# done. fn receives its Job, so it can publish partial output (streamed tokens,
+# finished styles) and skip work once the job is cancelled.
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, job_id: str, label: str):
+        self.id = job_id
+        self.label = label
+        self.status = QUEUED
+        self.partial = None      # whatever fn publishes while running
+        self.result = None
+        self.error = None
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    @property
+    def pending(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.status == CANCELLED
+
+    @property
+    def wait_seconds(self):
+        return None if self.started_at is None else self.started_at - self.submitted_at
+
+    @property
+    def run_seconds(self):
+        return None if self.finished_at is None or self.started_at is None else self.finished_at - self.started_at
+
+
+class JobQueue:
+    def __init__(self, max_workers: int = 8, max_queued: int = 64, keep_seconds: float = 600, observe=None):
+        self.max_workers = int(max_workers)
+        self.max_queued = int(max_queued)
+        self.keep_seconds = float(keep_seconds)
+        self.observe = observe  # e.g. Metrics.observe, for wait/run time summaries
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vireo-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._queued = 0
+        self._running = 0
+        self._seq = itertools.count(1)
+        self._counters = {"submitted": 0, "done": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+        self._wait = deque(maxlen=1024)
+
+    def submit(self, fn, label: str = "") -> str:
+        """Queue fn(job); returns the job id. Raises QueueFullError when max_queued jobs wait."""
+        with self._lock:
+            self._prune()
+            if self._queued >= self.max_queued:
+                self._counters["rejected"] += 1
+                raise QueueFullError(f"{self._queued} translations waiting; try again shortly")
+            job = Job(f"{next(self._seq)}-{uuid.uuid4().hex[:8]}", label)
+            self._jobs[job.id] = job
+            self._queued += 1
+            self._counters["submitted"] += 1
+            depth = self._queued
+        if self.observe is not None:
+            self.observe("vireo_queue_depth", depth, queue="jobs")
+        job.future = self._pool.submit(self._run, job, fn)
+        return job.id
+
+    def _run(self, job: Job, fn):
+        with self._lock:
+            self._queued -= 1
+            if job.cancelled:
+                return
+            job.status = RUNNING
+            job.started_at = time.monotonic()
+            self._running += 1
+            self._wait.append(job.wait_seconds)
+        if self.observe is not None:
+            self.observe("vireo_job_wait_seconds", job.wait_seconds, label=job.label)
+        try:
+            result, error = fn(job), None
+        except BaseException as e:
+            result, error = None, e
+        with self._lock:
+            self._running -= 1
+            job.finished_at = time.monotonic()
+            if job.cancelled:
+                return  # cancelled while running: drop the result
+            job.result, job.error = result, error
+            job.status = FAILED if error is not None else DONE
+            self._counters["failed" if error is not None else "done"] += 1
+        if self.observe is not None:
+            self.observe("vireo_job_run_seconds", job.run_seconds, label=job.label)
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        # a queued job never starts; a running one finishes in the background and its result is dropped
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.pending:
+                return False
+            job.status = CANCELLED
+            job.finished_at = time.monotonic()
+            self._counters["cancelled"] += 1
+        return True
+
+    def _prune(self):
+        # finished jobs nobody polled again (closed tabs) are forgotten after keep_seconds
+        cutoff = time.monotonic() - self.keep_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["queued"] = self._queued
+            s["running"] = self._running
+            samples = sorted(self._wait)
+        s["max_workers"] = self.max_workers
+        s["wait_ms_p50"] = round(samples[len(samples) // 2] * 1000, 1) if samples else None
+        s["wait_ms_p95"] = round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 1) if samples else None
+        return s
+
+
+def jobs_from_config(cfg=None, observe=None) -> JobQueue:
+    # cfg mirrors the optional [jobs] table in .streamlit/secrets.toml
+    cfg = dict(cfg or {})
+    return JobQueue(
+        max_workers=cfg.get("max_workers", 8),
+        max_queued=cfg.get("max_queued", 64),
+        keep_seconds=cfg.get("keep_seconds", 600),
+        observe=observe,
+    )
@@ -0,0 +1,186 @@
+# vireo/metrics.py — in-process timing spans, token counters and their export
+#
+# Series are (name, sorted labels). Timings keep count/sum plus a bounded window of
+# recent samples for p50/p95/p99; counters are plain sums. Export paths:
+#   - Prometheus text format via render_prometheus() / serve(port) (GET /metrics)
+#   - a rotating JSONL event log (one line per observation) when jsonl_path is set
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _series(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def quantile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class _Summary:
+    __slots__ = ("count", "sum", "window")
+
+    def __init__(self, window):
+        self.count = 0
+        self.sum = 0.0
+        self.window = deque(maxlen=window)
+
+
+class Metrics:
+    def __init__(self, window: int = 1024, jsonl_path=None, max_bytes: int = 10_000_000, backups: int = 5):
+        self.window = int(window)
+        self._lock = threading.Lock()
+        self._summaries = {}
+        self._counters = {}
+        self._log = None
+        if jsonl_path:
+            path = Path(jsonl_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = logging.getLogger(f"vireo.metrics.{path.resolve()}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            if not self._log.handlers:
+                handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._log.addHandler(handler)
+        self._server = None
+
+    def _emit(self, kind, name, labels, value):
+        if self._log is not None:
+            self._log.info(json.dumps({"ts": round(time.time(), 3), "kind": kind, "metric": name,
+                                       "labels": labels, "value": value}, ensure_ascii=False))
+
+    # ---- recording ----
+    def observe(self, name: str, value: float, **labels):
+        key = _series(name, labels)
+        with self._lock:
+            s = self._summaries.get(key)
+            if s is None:
+                s = self._summaries[key] = _Summary(self.window)
+            s.count += 1
+            s.sum += value
+            s.window.append(value)
+        self._emit("summary", name, labels, value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _series(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._emit("counter", name, labels, value)
+
+    @contextmanager
+    def span(self, stage: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("vireo_stage_seconds", time.perf_counter() - t0, stage=stage, **labels)
+
+    def record_usage(self, usage, style: str, model: str):
+        if usage is None:
+            return
+        self.inc("vireo_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, kind="prompt", style=style, model=model)
+        self.inc("vireo_tokens_total", getattr(usage, "completion_tokens", 0) or 0, kind="completion", style=style, model=model)
+        self.inc("vireo_completions_total", 1, style=style, model=model)
+
+    # ---- reading ----
+    def summaries(self, name: str = None) -> list:
+        """[{name, labels, count, sum, p50, p95, p99}], slowest p95 first."""
+        with self._lock:
+            items = [(k, s.count, s.sum, sorted(s.window)) for k, s in self._summaries.items()
+                     if name is None or k[0] == name]
+        out = []
+        for (n, labels), count, total, values in items:
+            row = {"name": n, "labels": dict(labels), "count": count, "sum": total}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}"] = quantile(values, q)
+            out.append(row)
+        out.sort(key=lambda r: r["p95"] or 0, reverse=True)
+        return out
+
+    def counters(self, name: str = None) -> list:
+        with self._lock:
+            return [{"name": n, "labels": dict(labels), "value": v}
+                    for (n, labels), v in self._counters.items() if name is None or n == name]
+
+    def render_prometheus(self) -> str:
+        def fmt_labels(labels, extra=None):
+            pairs = list(labels.items()) + (list(extra.items()) if extra else [])
+            if not pairs:
+                return ""
+            esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+        lines, typed = [], set()
+        for row in sorted(self.summaries(), key=lambda r: (r["name"], sorted(r["labels"].items()))):
+            n = row["name"]
+            if n not in typed:
+                lines.append(f"# TYPE {n} summary")
+                typed.add(n)
+            for q in QUANTILES:
+                v = row[f"p{int(q * 100)}"]
+                if v is not None:
+                    lines.append(f"{n}{fmt_labels(row['labels'], {'quantile': q})} {v:.6f}")
+            lines.append(f"{n}_sum{fmt_labels(row['labels'])} {row['sum']:.6f}")
+            lines.append(f"{n}_count{fmt_labels(row['labels'])} {row['count']}")
+        for row in sorted(self.counters(), key=lambda r: (r["name"], sorted(r["labels"].items()))):
+            n = row["name"]
+            if n not in typed:
+                lines.append(f"# TYPE {n} counter")
+                typed.add(n)
+            lines.append(f"{n}{fmt_labels(row['labels'])} {row['value']}")
+        return "\n".join(lines) + "\n"
+
+    # ---- export endpoint ----
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Expose GET /metrics on a daemon thread (idempotent)."""
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((host, int(port)), Handler)
+        except OSError:
+            return None  # another worker on this host already owns the port
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="vireo-metrics", daemon=True).start()
+        return self._server
+
+
+def metrics_from_config(cfg=None) -> Metrics:
+    # cfg mirrors the optional [metrics] table in .streamlit/secrets.toml
+    cfg = dict(cfg or {})
+    m = Metrics(
+        window=cfg.get("window", 1024),
+        jsonl_path=cfg.get("jsonl_path") or None,
+        max_bytes=cfg.get("max_bytes", 10_000_000),
+        backups=cfg.get("backups", 5),
+    )
+    if cfg.get("port"):
+        m.serve(cfg["port"], cfg.get("host", "127.0.0.1"))
+    return m
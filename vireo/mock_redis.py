@@ -0,0 +1,250 @@
+# vireo/mock_redis.py — offline Redis-protocol stand-in for the shared-state backend
+#
+#   python -m vireo.mock_redis --port 6390
+#
+# then point the app at it in .streamlit/secrets.toml:
+#   [shared]
+#   backend = "redis"
+#   url = "redis://127.0.0.1:6390/0"
+#
+# Speaks RESP2 over TCP for the commands vireo.shared.RedisBackend sends (GET, MGET,
+# SET, INCRBY, EXPIRE, TTL, LPUSH, LTRIM, LRANGE, DEL, plus the PING / SELECT / CLIENT
+# handshake of redis-py), pipelined or not. One in-memory keyspace, one lock, lazy
+# expiry; --latency-ms delays every reply batch like a network hop. Not a Redis: no
+# persistence, no other data types, no RESP3 (HELLO is refused).
+import argparse
+import socketserver
+import threading
+import time
+
+
+class Store:
+    def __init__(self):
+        self.data = {}      # key -> bytes or list of bytes (head first)
+        self.expires = {}   # key -> monotonic deadline
+        self.lock = threading.Lock()
+        self.commands = 0
+
+    def _live(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def execute(self, args):
+        name = args[0].upper().decode("ascii", "replace")
+        handler = getattr(self, "cmd_" + name.lower(), None)
+        if handler is None:
+            return Error(f"ERR unknown command '{name}'")
+        with self.lock:
+            self.commands += 1
+            try:
+                return handler(*args[1:])
+            except (TypeError, ValueError, IndexError):
+                return Error(f"ERR wrong arguments for '{name}' command")
+
+    # ---- connection ----
+    def cmd_ping(self, *args):
+        return args[0] if args else Simple("PONG")
+
+    def cmd_select(self, db):
+        return Simple("OK")
+
+    def cmd_client(self, *args):
+        return Simple("OK")
+
+    # ---- strings / counters ----
+    def cmd_get(self, key):
+        value = self._live(key)
+        if isinstance(value, list):
+            return Error("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def cmd_mget(self, *keys):
+        values = [self._live(k) for k in keys]
+        return [v if isinstance(v, bytes) else None for v in values]
+
+    def cmd_set(self, key, value, *opts):
+        self.data[key] = value
+        self.expires.pop(key, None)
+        opts = [o.upper() for o in opts]
+        if b"EX" in opts:
+            self.expires[key] = time.monotonic() + int(opts[opts.index(b"EX") + 1])
+        return Simple("OK")
+
+    def cmd_incrby(self, key, n):
+        value = int(self._live(key) or 0) + int(n)
+        self.data[key] = str(value).encode("ascii")
+        return value
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, b"1")
+
+    def cmd_expire(self, key, seconds):
+        if self._live(key) is None:
+            return 0
+        self.expires[key] = time.monotonic() + int(seconds)
+        return 1
+
+    def cmd_ttl(self, key):
+        if self._live(key) is None:
+            return -2
+        deadline = self.expires.get(key)
+        return -1 if deadline is None else max(0, round(deadline - time.monotonic()))
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._live(key) is not None:
+                removed += 1
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    # ---- lists ----
+    def cmd_lpush(self, key, *values):
+        items = self._live(key)
+        if items is None:
+            items = self.data[key] = []
+        items[:0] = values[::-1]
+        return len(items)
+
+    def cmd_ltrim(self, key, start, stop):
+        items = self._live(key)
+        if items is not None:
+            start, stop = int(start), int(stop)
+            stop = len(items) if stop == -1 else stop + 1
+            items[:] = items[start:stop]
+            if not items:
+                self.cmd_del(key)
+        return Simple("OK")
+
+    def cmd_lrange(self, key, start, stop):
+        items = self._live(key) or []
+        start, stop = int(start), int(stop)
+        return items[start:len(items) if stop == -1 else stop + 1]
+
+    def cmd_flushall(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return Simple("OK")
+
+
+class Simple(str):
+    pass
+
+
+class Error(str):
+    pass
+
+
+def encode(value) -> bytes:
+    if isinstance(value, Error):
+        return b"-" + value.encode() + b"\r\n"
+    if isinstance(value, Simple):
+        return b"+" + value.encode() + b"\r\n"
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode(v) for v in value)
+    raise TypeError(type(value))
+
+
+class Reader:
+    """Buffered socket reads that can tell whether more input is already here (a pipeline)."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buf = bytearray()
+
+    def _fill(self) -> bool:
+        data = self.sock.recv(65536)
+        self.buf += data
+        return bool(data)
+
+    def readline(self) -> bytes:
+        while (end := self.buf.find(b"\r\n")) < 0:
+            if not self._fill():
+                return b""
+        line = bytes(self.buf[:end + 2])
+        del self.buf[:end + 2]
+        return line
+
+    def read(self, n: int) -> bytes:
+        while len(self.buf) < n:
+            if not self._fill():
+                return b""
+        data = bytes(self.buf[:n])
+        del self.buf[:n]
+        return data
+
+    def pending(self) -> bool:
+        return bool(self.buf)
+
+
+def read_command(reader: Reader):
+    line = reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):  # inline command (telnet / redis-cli -x)
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        size = int(reader.readline()[1:])
+        args.append(reader.read(size + 2)[:-2])
+    return args
+
+
+def make_handler(store: Store, latency_ms: float = 0):
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            reader = Reader(self.request)
+            while True:
+                replies = []
+                # answer everything already received at once: a pipeline is one round trip
+                while not replies or reader.pending():
+                    args = read_command(reader)
+                    if args is None:
+                        return
+                    if args:
+                        replies.append(encode(store.execute(args)))
+                if latency_ms:
+                    time.sleep(latency_ms / 1000)
+                self.request.sendall(b"".join(replies))
+
+    return Handler
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def start(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0, store: Store = None):
+    """Start on a daemon thread; returns (server, url). port=0 picks a free port."""
+    server = _Server((host, port), make_handler(store or Store(), latency_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"redis://{host}:{server.server_address[1]}/0"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Offline Redis-protocol stand-in for vireo's shared state.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=6390)
+    p.add_argument("--latency-ms", type=float, default=0, help="delay per reply batch (network round trip)")
+    args = p.parse_args(argv)
+    server = _Server((args.host, args.port), make_handler(Store(), args.latency_ms))
+    print(f"mock Redis listening on redis://{args.host}:{args.port}/0")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# vireo/mock_server.py — offline OpenAI-compatible chat-completions stand-in for load tests
+#
+#   python -m vireo.mock_server --port 8900 --latency-ms 400 --sigma 0.5 --error-rate 0.02
+#
+# then point the app at it in .streamlit/secrets.toml:
+#   [openai]
+#   api_key = "mock"
+#   base_url = "http://127.0.0.1:8900/v1"
+#
+# Replies are example lines of the style whose prompt appears in the request (the demo
+# line if it has none), so output looks plausible; --invalid-rate breaks the format of
+# that fraction of choices (quotes, hashtags, echoing the thought, ...). Latency is
+# log-normal around --latency-ms; with stream=true the first chunk arrives after that
+# latency and further tokens every --token-delay-ms. --model NAME:LATENCY_MS[:INVALID_RATE]
+# gives one model its own latency / invalid rate (for comparing model profiles), and
+# replies longer than max_tokens (~4 characters a token) are cut off, finish_reason "length".
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from vireo.core import demo_translate, get_style_block, list_styles, load_modes
+
+
+class MockConfig:
+    def __init__(self, latency_ms: float = 400, sigma: float = 0.5, token_delay_ms: float = 15,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, invalid_rate: float = 0.0, seed=None,
+                 models: dict = None):
+        self.latency_ms = float(latency_ms)
+        self.sigma = float(sigma)
+        self.token_delay_ms = float(token_delay_ms)
+        self.error_rate = float(error_rate)
+        self.rate_limit_rate = float(rate_limit_rate)
+        self.invalid_rate = float(invalid_rate)
+        self.models = dict(models or {})  # model -> {"latency_ms", "invalid_rate"} overrides
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def latency(self, model: str = None) -> float:
+        median = self.models.get(model, {}).get("latency_ms", self.latency_ms)
+        with self.lock:
+            if self.sigma <= 0:
+                return median / 1000
+            # log-normal with median latency_ms
+            return self.rng.lognormvariate(math.log(max(median, 0.001)), self.sigma) / 1000
+
+    def roll(self):
+        with self.lock:
+            r = self.rng.random()
+        if r < self.rate_limit_rate:
+            return 429
+        if r < self.rate_limit_rate + self.error_rate:
+            return 500
+        return 200
+
+    def reply(self, pool: list, thought: str, style: str, model: str = None) -> str:
+        invalid_rate = self.models.get(model, {}).get("invalid_rate", self.invalid_rate)
+        with self.lock:
+            line = self.rng.choice(pool) if pool else demo_translate(thought, style)
+            if self.rng.random() >= invalid_rate:
+                return line
+            breaker = self.rng.choice(_BREAKERS)
+        return breaker(line, thought)
+
+
+# Ways a model breaks the one-line format (see vireo.candidates.check)
+_BREAKERS = (
+    lambda line, thought: f"“{line}”",
+    lambda line, thought: f"{line} #VIREO",
+    lambda line, thought: f"{line} ✨",
+    lambda line, thought: f"Here is your line: {line}",
+    lambda line, thought: f"{thought.strip()} — {line}",
+    lambda line, thought: " ".join([line] * 3),
+)
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def make_handler(cfg: MockConfig, modes: dict):
+    prompt_to_style = {get_style_block(modes, name)[0]: name for name in list_styles(modes)}
+    pools = {name: [ex["line"] for ex in get_style_block(modes, name)[2] if ex.get("line")]
+             for name in list_styles(modes)}
+    counters = {"requests": 0, "errors": 0}
+    counters_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+        disable_nagle_algorithm = True  # headers and body are separate writes; avoid the delayed-ACK stall
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status, obj, headers=None):
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "vireo"}]})
+            elif self.path.rstrip("/").endswith("/stats"):
+                with counters_lock:
+                    self._json(200, dict(counters))
+            else:
+                self._json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                req = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._json(400, {"error": {"message": "invalid JSON", "type": "invalid_request_error"}})
+                return
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._json(404, {"error": {"message": "not found"}})
+                return
+            with counters_lock:
+                counters["requests"] += 1
+
+            model = req.get("model") or "mock"
+            delay = cfg.latency(model)
+            status = cfg.roll()
+            if status != 200:
+                with counters_lock:
+                    counters["errors"] += 1
+                time.sleep(delay / 4)
+                kind = "rate_limit_exceeded" if status == 429 else "server_error"
+                self._json(status, {"error": {"message": f"mock {kind}", "type": kind}},
+                           {"retry-after": "1"} if status == 429 else None)
+                return
+
+            messages = req.get("messages") or []
+            style = next((prompt_to_style[m.get("content")] for m in messages
+                          if m.get("role") == "system" and m.get("content") in prompt_to_style), "Poetic")
+            thought = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+            n = max(1, int(req.get("n") or 1))
+            lines = [cfg.reply(pools.get(style), thought, style, model) for _ in range(n)]
+            limit = int(req.get("max_tokens") or 0) * 4
+            finish = ["length" if limit and len(line) > limit else "stop" for line in lines]
+            lines = [line[:limit] if limit else line for line in lines]
+            prompt_tokens = sum(_approx_tokens(m.get("content") or "") for m in messages)
+            completion_tokens = sum(_approx_tokens(line) for line in lines)
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+            cid = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            created = int(time.time())
+
+            time.sleep(delay)
+            if not req.get("stream"):
+                self._json(200, {
+                    "id": cid, "object": "chat.completion", "created": created, "model": model,
+                    "choices": [{"index": i, "message": {"role": "assistant", "content": line},
+                                 "finish_reason": finish[i]} for i, line in enumerate(lines)],
+                    "usage": usage,
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def send(obj):
+                data = ("data: " + (obj if isinstance(obj, str) else json.dumps(obj)) + "\n\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def chunk(index, delta, finish=None):
+                return {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": index, "delta": delta, "finish_reason": finish}]}
+
+            # choices are interleaved word by word, like the real API with n > 1
+            words = [line.split(" ") for line in lines]
+            for index in range(n):
+                send(chunk(index, {"role": "assistant", "content": ""}))
+            for i in range(max(len(w) for w in words)):
+                if i:
+                    time.sleep(cfg.token_delay_ms / 1000)
+                for index, ws in enumerate(words):
+                    if i < len(ws):
+                        send(chunk(index, {"content": ws[i] if i == 0 else " " + ws[i]}))
+            for index in range(n):
+                send(chunk(index, {}, finish[index]))
+            if (req.get("stream_options") or {}).get("include_usage"):
+                send({"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                      "choices": [], "usage": usage})
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def parse_models(specs) -> dict:
+    # ["gpt-4o-mini:250:0.02", ...] -> {"gpt-4o-mini": {"latency_ms": 250.0, "invalid_rate": 0.02}}
+    models = {}
+    for spec in specs:
+        name, _, rest = spec.partition(":")
+        parts = [float(x) for x in rest.split(":") if x]
+        models[name] = dict(zip(("latency_ms", "invalid_rate"), parts))
+    return models
+
+
+def start(cfg: MockConfig = None, host: str = "127.0.0.1", port: int = 0, modes=None):
+    """Start on a daemon thread; returns (server, base_url). port=0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), make_handler(cfg or MockConfig(), modes or load_modes()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="vireo-mock-openai", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(prog="python -m vireo.mock_server", description="Offline OpenAI-compatible chat-completions server.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--latency-ms", type=float, default=400, help="median time to first byte")
+    p.add_argument("--sigma", type=float, default=0.5, help="log-normal spread (0 = fixed latency)")
+    p.add_argument("--token-delay-ms", type=float, default=15, help="gap between streamed tokens")
+    p.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    p.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    p.add_argument("--invalid-rate", type=float, default=0.0, help="fraction of choices that break the line format")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--model", action="append", default=[], metavar="NAME:LATENCY_MS[:INVALID_RATE]",
+                   help="per-model latency / invalid rate (repeatable)")
+    args = p.parse_args(argv)
+    cfg = MockConfig(args.latency_ms, args.sigma, args.token_delay_ms, args.error_rate,
+                     args.rate_limit_rate, args.invalid_rate, args.seed, models=parse_models(args.model))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(cfg, load_modes()))
+    server.daemon_threads = True
+    print(f"mock OpenAI listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
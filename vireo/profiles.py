@@ -0,0 +1,93 @@
+# vireo/profiles.py — model + sampling parameters per style, from config
+#
+#   [models]
+#   default = "turbo"                     # profile for styles not listed below
+#   [models.styles]
+#   Haiku = "mini"
+#   [models.profiles.mini]                # adds to / overrides the built-in profiles
+#   model = "gpt-4o-mini"
+#   temperature = 0.7
+#   max_tokens = 48
+#   input_per_mtok = 0.15                 # USD per million tokens, for cost reports
+#   output_per_mtok = 0.60
+#
+# The Translator asks the book for a style's profile on every call; profiles are part
+# of the cache key (model + temperature), so switching a style's profile never serves
+# lines cached under another one. bench/bench_models.py compares profiles per style.
+from dataclasses import dataclass, replace
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    model: str
+    temperature: float = 0.8
+    max_tokens: int = 60
+    input_per_mtok: float = 0.0     # USD per million prompt tokens
+    output_per_mtok: float = 0.0    # USD per million completion tokens
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        return (prompt_tokens * self.input_per_mtok + completion_tokens * self.output_per_mtok) / 1e6
+
+
+# list prices at the time of writing; override in [models.profiles.*]
+BUILTIN = {
+    "turbo": Profile("turbo", "gpt-3.5-turbo", 0.8, 60, 0.50, 1.50),
+    "mini": Profile("mini", "gpt-4o-mini", 0.8, 60, 0.15, 0.60),
+}
+DEFAULT = "turbo"
+# the default profile as plain settings, for callers without a [models] table
+MODEL = BUILTIN[DEFAULT].model
+TEMPERATURE = BUILTIN[DEFAULT].temperature
+MAX_TOKENS = BUILTIN[DEFAULT].max_tokens
+
+
+class ProfileBook:
+    def __init__(self, profiles: dict, default: str = DEFAULT, styles: dict = None):
+        if default not in profiles:
+            raise ValueError(f"default profile {default!r} is not defined")
+        unknown = {s: p for s, p in (styles or {}).items() if p not in profiles}
+        if unknown:
+            raise ValueError(f"styles use undefined profiles: {unknown}")
+        self.profiles = dict(profiles)
+        self.default = default
+        self.styles = dict(styles or {})
+        self._default = self.profiles[default]
+
+    @classmethod
+    def single(cls, model: str, temperature: float, max_tokens: int) -> "ProfileBook":
+        base = next((p for p in BUILTIN.values() if p.model == model), Profile("default", model))
+        return cls({"default": replace(base, name="default", temperature=temperature, max_tokens=max_tokens)},
+                   "default")
+
+    def for_style(self, style: str) -> Profile:
+        name = self.styles.get(style)
+        return self.profiles[name] if name is not None else self._default
+
+    def models(self) -> list:
+        return sorted({p.model for p in self.profiles.values()})
+
+
+def parse_profiles(table: dict) -> dict:
+    """{name: {model, temperature, ...}} merged over BUILTIN -> {name: Profile}."""
+    profiles = dict(BUILTIN)
+    for name, spec in dict(table or {}).items():
+        spec = dict(spec)
+        base = profiles.get(name)
+        if base is None:
+            if "model" not in spec:
+                raise ValueError(f"profile {name!r} needs a model")
+            base = Profile(name, spec["model"])
+        fields = {k: spec[k] for k in ("model", "temperature", "max_tokens", "input_per_mtok", "output_per_mtok")
+                  if k in spec}
+        profiles[name] = replace(base, **fields)
+    return profiles
+
+
+def profiles_from_config(cfg=None, model: str = None, temperature: float = None, max_tokens: int = None):
+    # cfg mirrors the optional [models] table in .streamlit/secrets.toml. Without it,
+    # every style uses one profile built from the caller's defaults (model, ...).
+    cfg = dict(cfg or {})
+    if not cfg and model is not None:
+        return ProfileBook.single(model, temperature, max_tokens)
+    return ProfileBook(parse_profiles(cfg.get("profiles")), cfg.get("default", DEFAULT), cfg.get("styles"))
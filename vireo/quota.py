@@ -0,0 +1,278 @@
+# vireo/quota.py — access-code lookup, token-bucket rate limits and persisted usage quotas
+#
+# Codes are kept only as SHA-256 digests in a frozenset (O(1) membership). Each code
+# gets its own token bucket, and all codes share a global bucket sized below the
+# OpenAI account limit, so one shared code cannot trigger 429 storms for everyone.
+# Daily request/token counters live in SQLite and survive restarts. With a shared
+# state (vireo/shared.py) they live there instead, next to a global per-minute request
+# count, so every worker process charges the same counters; the token buckets stay
+# per-process and only smooth bursts. Shared counts are batched and read through a
+# short cache, so a code can go over its daily quota by what other workers admit
+# within one flush + read window. The first worker to start with a shared state
+# imports the recent counters of the per-process SQLite file, so switching to it does
+# not reset anyone's daily usage.
+#
+# acquire() is admission control: it reserves requests before the page or server
+# knows whether a line is cached. A Charge wraps that reservation; its record() is
+# the on_usage hook of the upstream calls, and settle() refunds whatever no upstream
+# call answered (cache hits, rejected or cancelled jobs, an open circuit, failures).
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(".cache") / "usage.sqlite3"
+USAGE_TTL = 2 * 86400  # shared daily counters outlive their day by one
+
+
+def hash_code(code: str) -> str:
+    return hashlib.sha256((code or "").strip().encode("utf-8")).hexdigest()
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, n: float = 1.0) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= n:
+                self._tokens -= n
+                return True
+            return False
+
+    def refund(self, n: float = 1.0):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + n)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def seconds_until(self, n: float = 1.0) -> float:
+        missing = n - self.available
+        return 0.0 if missing <= 0 or self.rate <= 0 else missing / self.rate
+
+
+@dataclass
+class Decision:
+    allowed: bool
+    reason: str = ""
+    retry_after: float = 0.0
+
+
+class QuotaManager:
+    def __init__(self, codes, per_code_per_minute: float = 30, per_code_burst: int = 25,
+                 global_per_minute: float = 600, global_burst: int = 50,
+                 daily_requests: int = 200, daily_tokens: int = 50_000, path=DEFAULT_DB_PATH, state=None):
+        self._codes = frozenset(hash_code(c) for c in codes if str(c).strip())
+        self.per_code_rate = float(per_code_per_minute) / 60.0
+        self.per_code_burst = int(per_code_burst)
+        self.daily_requests = int(daily_requests)
+        self.daily_tokens = int(daily_tokens)
+        self.global_per_minute = float(global_per_minute)
+        self.global_bucket = TokenBucket(self.global_per_minute / 60.0, global_burst)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._state = state
+        self._db = self._open_db(Path(path)) if path and state is None else None
+        self._mem_usage = {}  # used when path is None
+        if state is not None and path:
+            self._import_legacy(Path(path))
+
+    # ---- storage ----
+    @staticmethod
+    def _open_db(path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            " code TEXT NOT NULL, day TEXT NOT NULL, requests INTEGER NOT NULL DEFAULT 0,"
+            " tokens INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (code, day))"
+        )
+        return db
+
+    def _import_legacy(self, path: Path):
+        # Renaming the file first makes the import happen once, in one process, even
+        # when several workers start together; the .migrated copy is kept for reference.
+        if not path.exists():
+            return
+        try:
+            db = sqlite3.connect(str(path), timeout=5.0)
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # the rename leaves -wal behind
+            db.close()
+            moved = path.with_name(path.name + ".migrated")
+            path.replace(moved)
+        except (OSError, sqlite3.Error):
+            return  # another worker got there first (or the file is unreadable)
+        db = sqlite3.connect(str(moved))
+        try:
+            since = (date.today() - timedelta(days=1)).isoformat()  # older days no longer count
+            rows = db.execute("SELECT code, day, requests, tokens FROM usage WHERE day >= ?", (since,)).fetchall()
+        except sqlite3.Error:
+            rows = []
+        finally:
+            db.close()
+        for digest, day, requests, tokens in rows:
+            if requests:
+                self._state.incr(f"usage:{day}:{digest}:r", requests, ttl=USAGE_TTL)
+            if tokens:
+                self._state.incr(f"usage:{day}:{digest}:t", tokens, ttl=USAGE_TTL)
+        self._state.flush()
+
+    def _usage(self, digest):
+        day = date.today().isoformat()
+        if self._state is not None:
+            found = self._state.get_many([f"usage:{day}:{digest}:r", f"usage:{day}:{digest}:t"])
+            return found[f"usage:{day}:{digest}:r"], found[f"usage:{day}:{digest}:t"]
+        if self._db is None:
+            return self._mem_usage.get((digest, day), (0, 0))
+        row = self._db.execute("SELECT requests, tokens FROM usage WHERE code = ? AND day = ?",
+                               (digest, day)).fetchone()
+        return row or (0, 0)
+
+    def _add(self, digest, requests: int = 0, tokens: int = 0):
+        day = date.today().isoformat()
+        if self._state is not None:
+            if requests:
+                self._state.incr(f"usage:{day}:{digest}:r", requests, ttl=USAGE_TTL)
+            if tokens:
+                self._state.incr(f"usage:{day}:{digest}:t", tokens, ttl=USAGE_TTL)
+            return
+        if self._db is None:
+            r, t = self._mem_usage.get((digest, day), (0, 0))
+            self._mem_usage[(digest, day)] = (r + requests, t + tokens)
+            return
+        self._db.execute(
+            "INSERT INTO usage (code, day, requests, tokens) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(code, day) DO UPDATE SET requests = requests + excluded.requests,"
+            " tokens = tokens + excluded.tokens",
+            (digest, day, requests, tokens),
+        )
+
+    # ---- public API ----
+    def is_valid(self, code: str) -> bool:
+        return bool(code) and hash_code(code) in self._codes
+
+    def _bucket(self, digest) -> TokenBucket:
+        b = self._buckets.get(digest)
+        if b is None:
+            with self._lock:
+                b = self._buckets.setdefault(digest, TokenBucket(self.per_code_rate, self.per_code_burst))
+        return b
+
+    def acquire(self, code: str, n: int = 1) -> Decision:
+        """Reserve n requests for code; call record_tokens() once usage is known."""
+        digest = hash_code(code)
+        if digest not in self._codes:
+            return Decision(False, "invalid access code")
+        with self._lock:
+            requests, tokens = self._usage(digest)
+            if requests + n > self.daily_requests:
+                return Decision(False, "daily request quota used up")
+            if tokens >= self.daily_tokens:
+                return Decision(False, "daily token quota used up")
+        minute = None
+        if self._state is not None:
+            # the global limit protects one upstream account: count it across workers
+            now = time.time()
+            minute = f"rate:{int(now // 60)}"
+            if self._state.get(minute) + n > self.global_per_minute:
+                return Decision(False, "service is busy", 60 - now % 60)
+        bucket = self._bucket(digest)
+        if not bucket.try_acquire(n):
+            return Decision(False, "too many requests for this code", bucket.seconds_until(n))
+        if not self.global_bucket.try_acquire(n):
+            bucket.refund(n)
+            return Decision(False, "service is busy", self.global_bucket.seconds_until(n))
+        with self._lock:
+            self._add(digest, requests=n)
+        if minute is not None:
+            self._state.incr(minute, n, ttl=120)
+        return Decision(True)
+
+    def refund(self, code: str, n: int = 1):
+        """Give back n acquired requests that never reached upstream."""
+        digest = hash_code(code)
+        if n <= 0 or digest not in self._codes:
+            return
+        self._bucket(digest).refund(n)
+        self.global_bucket.refund(n)
+        with self._lock:
+            self._add(digest, requests=-n)
+        # the shared per-minute count is left alone: it expires within the minute anyway
+
+    def record_tokens(self, code: str, tokens: int):
+        if tokens:
+            with self._lock:
+                self._add(hash_code(code), tokens=int(tokens))
+
+    def remaining(self, code: str) -> dict:
+        digest = hash_code(code)
+        with self._lock:
+            requests, tokens = self._usage(digest)
+        return {
+            "requests_left": max(0, self.daily_requests - requests),
+            "tokens_left": max(0, self.daily_tokens - tokens),
+            "burst_left": int(self._bucket(digest).available),
+            "daily_requests": self.daily_requests,
+            "daily_tokens": self.daily_tokens,
+        }
+
+
+class Charge:
+    """n requests acquired for one action; settle() refunds those no upstream call used."""
+
+    def __init__(self, quota: QuotaManager, code: str, n: int = 1):
+        self.quota = quota
+        self.code = code
+        self.n = int(n)
+        self.used = 0
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def record(self, usage):
+        # on_usage hook: one call per upstream answer, with its token counts
+        self.quota.record_tokens(self.code, getattr(usage, "total_tokens", 0) or 0)
+        with self._lock:
+            self.used += 1
+
+    def settle(self):
+        with self._lock:
+            if self._settled:
+                return
+            self._settled = True
+            unused = max(0, self.n - self.used)
+        self.quota.refund(self.code, unused)
+
+
+def quota_from_config(codes, cfg=None, state=None) -> QuotaManager:
+    # cfg mirrors the optional [quota] table in .streamlit/secrets.toml; state is the
+    # [shared] vireo.shared.SharedState, when there is one (then cfg["path"] is only
+    # read once, to import its usage)
+    cfg = dict(cfg or {})
+    return QuotaManager(
+        codes,
+        per_code_per_minute=cfg.get("per_code_per_minute", 30),
+        per_code_burst=cfg.get("per_code_burst", 25),
+        global_per_minute=cfg.get("global_per_minute", 600),
+        global_burst=cfg.get("global_burst", 50),
+        daily_requests=cfg.get("daily_requests", 200),
+        daily_tokens=cfg.get("daily_tokens", 50_000),
+        path=cfg.get("path", DEFAULT_DB_PATH) or None,
+        state=state,
+    )
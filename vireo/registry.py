@@ -0,0 +1,194 @@
+# vireo/registry.py — parse, validate and precompile poetic_modes.json once per process
+#
+# StyleRegistry.current() returns an immutable Snapshot. It re-stats the file at most
+# every `check_interval` seconds and only re-parses when mtime/size changed *and* the
+# content hash differs, so edits to poetic_modes.json go live without restarting
+# workers. An invalid edit is rejected as a whole: the previous snapshot stays active
+# and the problems are kept in `last_error`.
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+
+from vireo.core import MODES_PATH
+from vireo.demo import DEFAULT_FALLBACK, DemoBook, DemoTemplates, template_problems
+
+
+class StyleConfigError(ValueError):
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("; ".join(self.problems))
+
+
+@dataclass(frozen=True)
+class Style:
+    name: str
+    prompt: str
+    description: str
+    examples: tuple          # ((thought, line), ...)
+    system: tuple            # ((role, content), ...) — prefix + style prompt
+    few_shot: tuple          # ((role, content), ...) — every example as user/assistant pairs
+    demo: DemoTemplates      # compiled "demo" variants (the fallback when the style has none)
+
+    def messages(self, user_text: str, examples=None) -> list:
+        """Chat messages for user_text; examples overrides the full few-shot pool."""
+        if examples is None:
+            shots = self.few_shot
+        else:
+            shots = []
+            for ex in examples:
+                t = ex.get("thought", "").strip() if isinstance(ex, dict) else ex[0]
+                l = ex.get("line", "").strip() if isinstance(ex, dict) else ex[1]
+                if t and l:
+                    shots += (("user", t), ("assistant", l))
+        msgs = [{"role": r, "content": c} for r, c in self.system]
+        msgs += [{"role": r, "content": c} for r, c in shots]
+        msgs.append({"role": "user", "content": user_text.strip()})
+        return msgs
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: str                     # sha256 of the file bytes
+    loaded_at: float
+    system_prefix: str
+    names: tuple
+    styles: MappingProxyType         # name -> Style
+    modes: dict                      # parsed JSON for vireo.core helpers; treat as read-only
+    demos: DemoBook                  # Demo-mode lines for every style
+
+    def demo(self, thought, style) -> str:
+        return self.demos.render(thought, style)
+
+    def demo_many(self, thoughts, styles) -> list:
+        return self.demos.render_many(thoughts, styles)
+
+
+def _validate(data) -> list:
+    problems = []
+    if not isinstance(data, dict):
+        return ["top level must be an object"]
+    meta = data.get("_meta")
+    if not isinstance(meta, dict) or not isinstance(meta.get("system_prefix"), str) \
+            or not meta["system_prefix"].strip():
+        problems.append("_meta.system_prefix must be a non-empty string")
+    if isinstance(meta, dict) and "demo_fallback" in meta:
+        problems += _demo_problems("_meta", "demo_fallback", meta["demo_fallback"])
+    names = [k for k in data if k != "_meta"]
+    if not names:
+        problems.append("no styles defined")
+    for name in names:
+        block = data[name]
+        if isinstance(block, str):
+            if not block.strip():
+                problems.append(f"{name}: empty prompt")
+            continue
+        if not isinstance(block, dict):
+            problems.append(f"{name}: must be a prompt string or an object")
+            continue
+        if not isinstance(block.get("prompt"), str) or not block["prompt"].strip():
+            problems.append(f"{name}: 'prompt' must be a non-empty string")
+        examples = block.get("examples", [])
+        if not isinstance(examples, list):
+            problems.append(f"{name}: 'examples' must be a list")
+            continue
+        for i, ex in enumerate(examples):
+            if not isinstance(ex, dict) or not isinstance(ex.get("thought"), str) \
+                    or not isinstance(ex.get("line"), str):
+                problems.append(f"{name}: examples[{i}] needs string 'thought' and 'line'")
+            elif not ex["thought"].strip() or not ex["line"].strip():
+                problems.append(f"{name}: examples[{i}] has an empty thought or line")
+        if "demo" in block:
+            problems += _demo_problems(name, "demo", block["demo"])
+    return problems
+
+
+def _demo_problems(owner, key, templates) -> list:
+    if not isinstance(templates, list) or not templates:
+        return [f"{owner}: '{key}' must be a non-empty list of templates"]
+    return [f"{owner}: {key}[{i}] {p}" for i, t in enumerate(templates) for p in template_problems(t)]
+
+
+def compile_modes(raw: bytes) -> Snapshot:
+    try:
+        data = json.loads(raw.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise StyleConfigError([f"invalid JSON: {e}"]) from e
+    problems = _validate(data)
+    if problems:
+        raise StyleConfigError(problems)
+
+    prefix = data["_meta"]["system_prefix"].strip()
+    fallback = DemoTemplates(data["_meta"].get("demo_fallback", DEFAULT_FALLBACK))
+    styles = {}
+    for name, block in data.items():
+        if name == "_meta":
+            continue
+        if isinstance(block, str):
+            prompt, pool, demo = block.strip(), [], None
+        else:
+            prompt, pool, demo = block["prompt"].strip(), block.get("examples", []), block.get("demo")
+        examples = tuple((ex["thought"].strip(), ex["line"].strip()) for ex in pool)
+        styles[name] = Style(
+            name=name,
+            prompt=prompt,
+            description=prompt.split(".")[0].strip(),
+            examples=examples,
+            system=(("system", prefix), ("system", prompt)),
+            few_shot=tuple(m for t, l in examples for m in (("user", t), ("assistant", l))),
+            demo=DemoTemplates(demo) if demo else fallback,
+        )
+    return Snapshot(
+        version=hashlib.sha256(raw).hexdigest(),
+        loaded_at=time.time(),
+        system_prefix=prefix,
+        names=tuple(styles),
+        styles=MappingProxyType(styles),
+        modes=data,
+        demos=DemoBook({name: style.demo for name, style in styles.items()}, fallback),
+    )
+
+
+class StyleRegistry:
+    def __init__(self, path=MODES_PATH, check_interval: float = 2.0):
+        self.path = Path(path)
+        self.check_interval = float(check_interval)
+        self.last_error = None
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._stat = None
+        self._checked_at = 0.0
+        raw = self.path.read_bytes()
+        self._snapshot = compile_modes(raw)  # fail fast at startup
+        st = self.path.stat()
+        self._stat = (st.st_mtime_ns, st.st_size)
+
+    def current(self) -> Snapshot:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._snapshot
+            self._checked_at = now
+            try:
+                st = self.path.stat()
+            except OSError as e:
+                self.last_error = str(e)
+                return self._snapshot
+            if (st.st_mtime_ns, st.st_size) == self._stat:
+                return self._snapshot
+            self._stat = (st.st_mtime_ns, st.st_size)
+            raw = self.path.read_bytes()
+            if hashlib.sha256(raw).hexdigest() == self._snapshot.version:
+                return self._snapshot  # touched, not changed
+            try:
+                self._snapshot = compile_modes(raw)
+                self.last_error = None
+                self.reloads += 1
+            except StyleConfigError as e:
+                self.last_error = str(e)
+        return self._snapshot
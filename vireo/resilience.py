@@ -0,0 +1,269 @@
+# vireo/resilience.py — timeouts, retries, hedging and a circuit breaker for upstream calls
+#
+# Resilience.call(fn) runs fn(timeout) with:
+#   - a per-attempt timeout handed to fn (the OpenAI client enforces it),
+#   - bounded exponential backoff with full jitter between retryable failures,
+#   - an optional hedge: if an attempt is still running after the observed p95,
+#     a duplicate is fired and the first success wins,
+#   - a circuit breaker that fails fast (CircuitOpenError) while upstream is unhealthy.
+#
+# Only upstream trouble is retried or counted against the breaker: retryable HTTP
+# statuses, connection errors and timeouts (openai / httpx / socket) and empty
+# completions. A call that still fails after its retries is one breaker failure,
+# not one per attempt. Anything else (a bug on our side) propagates untouched.
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class EmptyCompletionError(RuntimeError):
+    """Upstream answered without any text."""
+
+
+@lru_cache(maxsize=1)
+def _transient_errors() -> tuple:
+    errors = [ConnectionError, TimeoutError, EmptyCompletionError]
+    try:
+        import openai
+
+        errors.append(openai.APIConnectionError)  # APITimeoutError is a subclass
+    except ImportError:
+        pass
+    try:
+        import httpx
+
+        errors.append(httpx.TransportError)  # connect / read timeouts, network errors
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def upstream_status(exc):
+    """HTTP status of an upstream error response, None for anything else."""
+    return getattr(exc, "status_code", None)
+
+
+def is_retryable(exc) -> bool:
+    # Client errors (bad request, auth, ...) will not get better by retrying and
+    # say nothing about upstream health; neither do errors raised by our own code.
+    status = upstream_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(exc, _transient_errors())
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+            # half-open: let exactly one probe through
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        # the call failed for a reason that says nothing about upstream: no state
+        # change, but a half-open probe slot is freed for the next caller
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def quantile(self, q: float):
+        with self._lock:
+            data = sorted(self._samples)
+        if not data:
+            return None
+        return data[min(len(data) - 1, int(q * len(data)))]
+
+
+class Resilience:
+    def __init__(self, timeout: float = 20.0, max_attempts: int = 3, backoff_base: float = 0.25,
+                 backoff_cap: float = 4.0, hedge: bool = False, hedge_min_samples: int = 20,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.timeout = float(timeout)
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = float(backoff_base)
+        self.backoff_cap = float(backoff_cap)
+        self.hedge = bool(hedge)
+        self.hedge_min_samples = int(hedge_min_samples)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyWindow()
+        self._pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="vireo-hedge") if hedge else None
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                          "short_circuits": 0, "failures": 0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _enter(self):
+        if not self.breaker.allow():
+            self._count("short_circuits")
+            raise CircuitOpenError("upstream circuit is open")
+
+    def _backoff(self, attempt: int):
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+
+    def _hedged(self, fn):
+        # The losing attempt is not cancelled (HTTP calls can't be); it finishes in the
+        # background and its result is dropped.
+        primary = self._pool.submit(fn, self.timeout)
+        done, _ = wait([primary], timeout=self.latency.quantile(0.95))
+        if done:
+            return primary.result()
+        self._count("hedges")
+        hedge = self._pool.submit(fn, self.timeout)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if fut is hedge:
+                    self._count("hedge_wins")
+                return result
+        raise error
+
+    def _attempt(self, fn):
+        t0 = time.perf_counter()
+        if self.hedge and len(self.latency) >= self.hedge_min_samples:
+            result = self._hedged(fn)
+        else:
+            result = fn(self.timeout)
+        self.latency.add(time.perf_counter() - t0)
+        return result
+
+    def _settle(self, exc):
+        # breaker bookkeeping for an error that will not be retried
+        if is_retryable(exc):
+            self.breaker.record_failure()
+            self._count("failures")
+        elif upstream_status(exc) is not None:
+            self.breaker.record_success()  # upstream answered; it's our request
+        else:
+            self.breaker.release()
+
+    def call(self, fn):
+        """fn(timeout) -> result. Raises CircuitOpenError without calling fn while open."""
+        self._count("calls")
+        self._enter()
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._count("retries")
+                self._backoff(attempt - 1)
+                if self.breaker.state == OPEN:  # other calls tripped it meanwhile
+                    self._count("short_circuits")
+                    raise CircuitOpenError("upstream circuit is open")
+            try:
+                result = self._attempt(fn)
+            except Exception as e:
+                if is_retryable(e) and attempt < self.max_attempts - 1:
+                    continue
+                self._settle(e)
+                raise
+            self.breaker.record_success()
+            return result
+
+    @contextmanager
+    def guard(self):
+        # For calls that can't be retried transparently (token streams already shown
+        # to the user): breaker + latency bookkeeping only.
+        self._count("calls")
+        self._enter()
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self._settle(e)
+            raise
+        self.latency.add(time.perf_counter() - t0)
+        self.breaker.record_success()
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+        s["state"] = self.breaker.state
+        s["p95_ms"] = None
+        p95 = self.latency.quantile(0.95)
+        if p95 is not None:
+            s["p95_ms"] = round(p95 * 1000)
+        return s
+
+
+def resilience_from_config(cfg=None) -> Resilience:
+    # cfg mirrors the optional [resilience] table in .streamlit/secrets.toml
+    cfg = dict(cfg or {})
+    return Resilience(
+        timeout=cfg.get("timeout", 20.0),
+        max_attempts=cfg.get("max_attempts", 3),
+        backoff_base=cfg.get("backoff_base", 0.25),
+        backoff_cap=cfg.get("backoff_cap", 4.0),
+        hedge=cfg.get("hedge", False),
+        hedge_min_samples=cfg.get("hedge_min_samples", 20),
+        failure_threshold=cfg.get("failure_threshold", 5),
+        reset_timeout=cfg.get("reset_timeout", 30.0),
+    )
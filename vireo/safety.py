@@ -0,0 +1,133 @@
+# vireo/safety.py — local crisis / self-harm pre-check, no network call
+#
+# A moderation request in series would double translate latency, so this is a
+# keyword-and-pattern classifier compiled once into a single regex: the phrase list
+# is folded into a character trie ("kill myself", "killing myself" share "kill") so
+# the engine walks it like an automaton instead of trying every phrase in turn.
+# Spaces match any whitespace and apostrophes are optional (straight or curly), so
+# the only normalization is str.lower() (re.IGNORECASE would make the search ~3x
+# slower). A check costs a few microseconds (bench/bench_safety.py), cheaper than
+# handing it to another thread, so callers run it inline before the upstream call
+# (a hit skips the call entirely) and again on the generated line.
+#
+# It is deliberately high-recall: a false positive costs one supportive line instead
+# of a poem. It is a backstop for the system prompt, not a clinical tool.
+import re
+from typing import NamedTuple
+from zlib import crc32
+
+PHRASES = {
+    "suicide": [
+        "kill myself", "killing myself", "end my life", "ending my life", "end my own life",
+        "take my life", "take my own life", "taking my own life", "end it all", "ending it all",
+        "want to die", "wanna die", "wish i was dead", "wish i were dead", "wish i had never been born",
+        "better off dead", "better off without me", "no reason to live", "nothing to live for",
+        "don't want to live", "don't want to be alive", "don't want to wake up", "don't want to exist",
+        "do not want to live", "do not want to be alive", "can't go on living", "not worth living",
+        "goodbye forever", "final goodbye", "my suicide note", "how to die painlessly",
+        # es / fr / de / pt / it
+        "quiero morir", "me quiero matar", "quiero matarme", "quitarme la vida",
+        "je veux mourir", "me tuer", "me suicider", "en finir avec la vie",
+        "ich will sterben", "mich umbringen", "mir das leben nehmen",
+        "quero morrer", "me matar", "tirar minha vida",
+        "voglio morire", "uccidermi", "togliermi la vita",
+    ],
+    "self_harm": [
+        "hurt myself", "hurting myself", "harm myself", "harming myself", "self harm", "self-harm",
+        "selfharm", "cut myself", "cutting myself", "burn myself", "burning myself", "starve myself",
+    ],
+}
+# inflections a phrase list can't enumerate; searched alongside the trie
+PATTERNS = {
+    # bare "kms" is also kilometres, so only with a leading verb ("i want to kms")
+    "suicide": [r"suicid\w*", r"su[i1]c[i1]de", r"unalive\w*",
+                r"(?:want\s+to|wanna|gonna|going\s+to|about\s+to|should|might|just)\s+kms"],
+    "self_harm": [r"overdos\w*"],
+}
+
+SUPPORTIVE_LINES = (
+    "You don’t have to carry this alone—please reach out to someone you trust, or a crisis line, right now.",
+    "What you feel matters, and so do you; a caring voice is one call or text away tonight.",
+    "Stay a little longer with us—talk to someone today; you deserve support, not silence.",
+)
+RESOURCES = (
+    "If you are in danger or thinking about ending your life, please contact your local emergency number now. "
+    "In the US you can call or text 988 (Suicide & Crisis Lifeline); elsewhere, findahelpline.com lists free, "
+    "confidential lines in your country."
+)
+
+
+class Verdict(NamedTuple):
+    category: str
+    match: str
+
+
+def _unit(ch: str) -> str:
+    if ch == " ":
+        return r"\s+"
+    if ch in "'’":
+        return "['’]?"
+    if ch == "-":
+        return r"[-\s]?"
+    return re.escape(ch)
+
+
+def trie_pattern(phrases) -> str:
+    """One regex alternation for many phrases, factored into a trie on shared prefixes."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase.casefold():
+            node = node.setdefault(_unit("'" if ch == "’" else ch), {})
+        node[""] = {}
+
+    def build(node) -> str:
+        end = "" in node
+        alts = [unit + build(child) for unit, child in sorted(node.items()) if unit != ""]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if end:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class Safety:
+    def __init__(self, phrases: dict = None, patterns: dict = None, lines=SUPPORTIVE_LINES, resources: str = RESOURCES):
+        phrases = phrases if phrases is not None else PHRASES
+        patterns = patterns if patterns is not None else PATTERNS
+        groups = []
+        for category in sorted(set(phrases) | set(patterns)):
+            alts = [p for p in [trie_pattern(phrases.get(category, ()))] if p] + list(patterns.get(category, ()))
+            if alts:
+                groups.append(f"(?P<{category}>{'|'.join(alts)})")
+        if not groups:
+            raise ValueError("no safety phrases or patterns")
+        self.pattern = r"\b(?:" + "|".join(groups) + r")\b"
+        self._search = re.compile(self.pattern).search  # patterns are lower-case; check() lowers the text
+        self.lines = tuple(lines)
+        self.resources = resources
+        self.size = sum(len(v) for v in phrases.values()) + sum(len(v) for v in patterns.values())
+
+    def check(self, text: str):
+        """Verdict(category, matched text) when text looks like crisis / self-harm content, else None."""
+        m = self._search(text.lower()) if text else None
+        return Verdict(m.lastgroup, m.group()) if m else None
+
+    def supportive(self, thought: str) -> str:
+        # deterministic per thought, like the demo lines
+        return self.lines[crc32((thought or "").encode("utf-8")) % len(self.lines)]
+
+
+def safety_from_config(cfg=None):
+    # cfg mirrors the optional [safety] table in .streamlit/secrets.toml; None when disabled
+    cfg = dict(cfg or {})
+    if not cfg.get("enabled", True):
+        return None
+    phrases = {k: list(v) for k, v in PHRASES.items()}
+    for category, extra in dict(cfg.get("extra_phrases", {})).items():
+        phrases.setdefault(category, []).extend(extra)
+    return Safety(phrases, PATTERNS, lines=cfg.get("lines", SUPPORTIVE_LINES),
+                  resources=cfg.get("resources", RESOURCES))
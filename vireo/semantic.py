@@ -0,0 +1,249 @@
+# vireo/semantic.py — near-duplicate lookup of past thoughts (no network, no model download)
+#
+# Thoughts are embedded with a hashing vectorizer (stemmed word tokens + character
+# n-grams, signed feature hashing, L2-normalized float32). Past (thought, style, line)
+# triples live in a memory-mapped ring of vectors plus an append-only JSONL of their
+# metadata, so every worker process on the host shares one index. Lookup is a single
+# matrix-vector product over the rows of the requested style and scope (the prompt
+# version and model profile that wrote the line, so a hot-reload never serves old
+# lines). Word overlap cannot tell "afraid" from "not afraid": a hit whose negation
+# words differ from the query's is skipped.
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+DEFAULT_PATH = Path(".cache") / "semantic"
+
+_WORD = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)?", re.UNICODE)
+_STOP = frozenset(
+    "i im i'm i’m me my myself a an the so very really just lately today now again still "
+    "and or but is am are was be been being it its this that to of in on at for with".split()
+)
+_SUFFIXES = ("ingly", "edly", "ing", "ed", "ly", "es", "s")
+_NEGATORS = frozenset("not no never nothing nobody none nowhere neither nor cannot without".split())
+
+
+def _stem(word: str) -> str:
+    for suf in _SUFFIXES:
+        if word.endswith(suf) and len(word) - len(suf) >= 3:
+            return word[: -len(suf)]
+    return word
+
+
+def tokens(text: str) -> list:
+    words = [_stem(w) for w in _WORD.findall((text or "").casefold()) if w not in _STOP]
+    feats = [f"w:{w}" for w in words]
+    for w in words:
+        padded = f"<{w}>"
+        feats.extend(f"c:{padded[i:i + 4]}" for i in range(max(1, len(padded) - 3)))
+    return feats
+
+
+def negations(text: str) -> frozenset:
+    """Negation words of a thought, with n't spelled out as not."""
+    found = set()
+    for w in _WORD.findall((text or "").casefold()):
+        if w.endswith(("n't", "n’t")):
+            found.add("not")
+        elif w in _NEGATORS:
+            found.add("not" if w == "cannot" else w)
+    return frozenset(found)
+
+
+class HashingVectorizer:
+    def __init__(self, dim: int = 256, word_weight: float = 2.0):
+        self.dim = int(dim)
+        self.word_weight = float(word_weight)
+
+    def embed(self, text: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        for f in tokens(text):
+            h = zlib.crc32(f.encode("utf-8"))
+            w = self.word_weight if f.startswith("w:") else 1.0
+            v[h % self.dim] += w if (h >> 31) & 1 else -w
+        n = float(np.linalg.norm(v))
+        return v / n if n else v
+
+
+class SemanticIndex:
+    def __init__(self, path=DEFAULT_PATH, dim: int = 256, capacity: int = 50_000, threshold: float = 0.82):
+        self.dir = Path(path)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.capacity = int(capacity)
+        self.threshold = float(threshold)
+        self.vectorizer = HashingVectorizer(dim)
+        self._lock = threading.Lock()
+
+        vec_path = self.dir / f"vectors-{dim}x{self.capacity}.f32"
+        mode = "r+" if vec_path.exists() else "w+"
+        self._vectors = np.memmap(vec_path, dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        self._meta_path = self.dir / f"meta-{dim}x{self.capacity}.jsonl"
+        self._meta_path.touch(exist_ok=True)
+        self._lock_path = self.dir / "index.lock"
+        self._meta = [None] * self.capacity       # row -> (thought, style, line, scope)
+        self._style_ids = np.full(self.capacity, -1, dtype=np.int32)
+        self._style_codes = {}                    # (style, scope) -> id
+        self._total = 0                           # rows ever written (ring position)
+        self._lines = 0                           # records in meta.jsonl (compaction trigger)
+        self._offset = 0                          # bytes of meta.jsonl already applied
+        self._inode = None                        # changes when any process compacts
+
+        self._counters = {"lookups": 0, "hits": 0, "adds": 0}
+        self._lookup_us = deque(maxlen=1024)
+        self._refresh()
+
+    # ---- cross-process sync ----
+    def _style_id(self, style: str, scope: str) -> int:
+        sid = self._style_codes.get((style, scope))
+        if sid is None:
+            sid = self._style_codes[(style, scope)] = len(self._style_codes)
+        return sid
+
+    def _refresh(self):
+        # apply metadata rows appended by any process since our last look
+        st = self._meta_path.stat()
+        if st.st_ino != self._inode:
+            self._inode = st.st_ino
+            self._meta = [None] * self.capacity
+            self._style_ids[:] = -1
+            self._total, self._lines, self._offset = 0, 0, 0
+        size = st.st_size
+        if size <= self._offset:
+            return
+        with open(self._meta_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        end = data.rfind(b"\n") + 1  # ignore a half-written last line
+        for raw in data[:end].splitlines():
+            try:
+                rec = json.loads(raw)
+            except ValueError:
+                continue
+            self._lines += 1
+            if "pos" in rec:  # written by compact(): restores the ring position
+                self._total = rec["pos"]
+                continue
+            row = rec["row"]
+            scope = rec.get("scope", "")
+            self._meta[row] = (rec["thought"], rec["style"], rec["line"], scope)
+            self._style_ids[row] = self._style_id(rec["style"], scope)
+            self._total += 1
+        self._offset += end
+
+    def _file_lock(self):
+        fd = os.open(self._lock_path, os.O_CREAT | os.O_RDWR)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def _file_unlock(self, fd):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    # ---- public API ----
+    def lookup(self, thought: str, style: str, scope: str = ""):
+        """Return (line, similarity) of the closest past thought in this style and scope, or None."""
+        t0 = time.perf_counter()
+        q = self.vectorizer.embed(thought)
+        with self._lock:
+            self._refresh()
+            self._counters["lookups"] += 1
+            sid = self._style_codes.get((style, scope))
+            hit = None
+            if sid is not None and q.any():
+                n = min(self._total, self.capacity)
+                rows = np.flatnonzero(self._style_ids[:n] == sid)
+                if rows.size:
+                    scores = self._vectors[rows] @ q
+                    above = np.flatnonzero(scores >= self.threshold)
+                    if above.size:
+                        neg = negations(thought)
+                        for i in above[np.argsort(-scores[above])]:
+                            past = self._meta[rows[i]]
+                            if negations(past[0]) == neg:
+                                hit = (past[2], float(scores[i]))
+                                self._counters["hits"] += 1
+                                break
+            self._lookup_us.append((time.perf_counter() - t0) * 1e6)
+        return hit
+
+    def add(self, thought: str, style: str, line: str, scope: str = ""):
+        v = self.vectorizer.embed(thought)
+        if not v.any() or not line:
+            return
+        with self._lock:
+            fd = self._file_lock()
+            try:
+                self._refresh()
+                row = self._total % self.capacity
+                self._vectors[row] = v
+                self._vectors.flush()
+                rec = {"row": row, "style": style, "thought": thought, "line": line, "scope": scope}
+                with open(self._meta_path, "ab") as f:
+                    f.write((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+                self._refresh()
+            finally:
+                self._file_unlock(fd)
+            self._counters["adds"] += 1
+        # the JSONL only grows; compact it once it holds several ring generations
+        if self._lines > 4 * self.capacity:
+            self.compact()
+
+    def compact(self):
+        with self._lock:
+            fd = self._file_lock()
+            try:
+                self._refresh()
+                n = min(self._total, self.capacity)
+                pos = self._total % self.capacity + (self.capacity if self._total >= self.capacity else 0)
+                tmp = self._meta_path.with_suffix(".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    for row in range(n):
+                        if self._meta[row] is not None:
+                            thought, style, line, scope = self._meta[row]
+                            f.write(json.dumps({"row": row, "style": style, "thought": thought, "line": line,
+                                                "scope": scope}, ensure_ascii=False) + "\n")
+                    f.write(json.dumps({"pos": pos}) + "\n")
+                os.replace(tmp, self._meta_path)
+                self._refresh()  # new inode: reloads from the compacted file
+            finally:
+                self._file_unlock(fd)
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            samples = sorted(self._lookup_us)
+            s["size"] = min(self._total, self.capacity)
+        s["capacity"] = self.capacity
+        s["hit_rate"] = s["hits"] / s["lookups"] if s["lookups"] else 0.0
+        s["index_bytes"] = int(self._vectors.nbytes)
+        s["lookup_us_p50"] = samples[len(samples) // 2] if samples else None
+        s["lookup_us_p95"] = samples[min(len(samples) - 1, int(0.95 * len(samples)))] if samples else None
+        s["threshold"] = self.threshold
+        return s
+
+
+def semantic_from_config(cfg=None):
+    # cfg mirrors the optional [semantic] table in .streamlit/secrets.toml; None when disabled
+    cfg = dict(cfg or {})
+    if not cfg.get("enabled", True):
+        return None
+    return SemanticIndex(
+        path=cfg.get("path", DEFAULT_PATH),
+        dim=cfg.get("dim", 256),
+        capacity=cfg.get("capacity", 50_000),
+        threshold=cfg.get("threshold", 0.82),
+    )
@@ -0,0 +1,513 @@
+# vireo/server.py — headless HTTP translation service for partner apps
+#
+#   python -m vireo.server --port 8800                       # reads .streamlit/secrets.toml
+#   python -m vireo.server --port 8800 --demo                # no upstream, demo lines only
+#
+#   GET  /v1/styles                      -> {"version", "styles": [{"name", "description"}]}
+#   POST /v1/translate  {"thought", "style", "stream"}
+#   POST /v1/batch      {"items": [{"thought", "style"}], "style", "stream"}
+#   GET  /healthz, GET /metrics (Prometheus text)
+#
+# Same pipeline as the Translate page (vireo.translator.Translator: style registry,
+# cache, near-duplicates, single-flight, resilience, n candidates, local safety check,
+# demo fallback), so both front ends share the SQLite cache. Connections are HTTP/1.1
+# keep-alive. With "stream": true responses are chunked NDJSON: token deltas then a
+# final record for /v1/translate, one record per item in completion order for /v1/batch.
+# Lines from the safety check have source "safety" and carry "resources" (help lines).
+# Deltas are safety-checked before they are sent (the last word is held back until the
+# next one arrives); when the final "line" is not the text the deltas spelled out — the
+# check tripped mid-stream, or the upstream call failed — the final record has
+# "replace": true and clients show "line" instead of what they have typed out so far.
+#
+# Non-streaming translations go through a MicroBatcher: requests arriving within
+# max_wait_ms are resolved together — one exact-cache read for the whole batch,
+# duplicates collapsed, only the misses sent upstream (concurrently).
+#
+# When [paywall] codes are configured every request needs "Authorization: Bearer
+# <code>" and the translations that reach upstream are charged against that code's
+# [quota] (vireo.quota.Charge); without codes the service is open.
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+import tomllib
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from vireo.cache import cache_from_config
+from vireo.cassette import cassette_from_config
+from vireo.candidates import reranker_from_config
+from vireo.clients import registry_from_config
+from vireo.metrics import metrics_from_config
+from vireo.profiles import MAX_TOKENS, MODEL, TEMPERATURE, profiles_from_config
+from vireo.quota import Charge, quota_from_config
+from vireo.registry import StyleRegistry
+from vireo.resilience import CircuitOpenError, resilience_from_config
+from vireo.safety import safety_from_config
+from vireo.semantic import semantic_from_config
+from vireo.shared import shared_from_config
+from vireo.singleflight import SingleFlight
+from vireo.translator import Translator
+
+SECRETS_PATH = Path(".streamlit") / "secrets.toml"
+MAX_BODY = 1 << 20
+MAX_THOUGHT = 2000
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+# -------------------------
+# Micro-batching
+# -------------------------
+class MicroBatcher:
+    def __init__(self, translator, max_batch: int = 32, max_wait_ms: float = 5, workers: int = 16,
+                 demo: bool = False, observe=None):
+        self.translator = translator
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = float(max_wait_ms) / 1000
+        self.demo = demo
+        self.observe = observe  # e.g. Metrics.observe, for batch size summaries
+        self._queue = queue.SimpleQueue()
+        self._pool = ThreadPoolExecutor(max_workers=int(workers), thread_name_prefix="vireo-upstream")
+        self._lock = threading.Lock()
+        self._counters = {"items": 0, "batches": 0, "cache_hits": 0, "deduped": 0,
+                          "upstream": 0, "fallbacks": 0, "safety": 0}
+        threading.Thread(target=self._loop, name="vireo-batcher", daemon=True).start()
+
+    def submit(self, style: str, thought: str, on_usage=None) -> Future:
+        """Future resolving to (line, source); source is cache, upstream, demo or fallback."""
+        future = Future()
+        self._queue.put((style, thought, on_usage, future))
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._dispatch(batch)
+            except Exception as e:  # never let one bad batch kill the dispatcher
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _dispatch(self, batch):
+        if self.observe is not None:
+            self.observe("vireo_batch_size", len(batch))
+        groups = {}  # cache key -> [(style, thought, on_usage, future), ...]
+        for item in batch:
+            groups.setdefault(self.translator.key(item[0], item[1]), []).append(item)
+        with self._lock:
+            self._counters["items"] += len(batch)
+            self._counters["batches"] += 1
+            self._counters["deduped"] += len(batch) - len(groups)
+        for key, items in list(groups.items()):
+            line = self.translator.screened(items[0][0], items[0][1])  # a few µs; skips cache and upstream
+            if line is not None:
+                del groups[key]
+                with self._lock:
+                    self._counters["safety"] += len(items)
+                self._resolve(items, line, "safety")
+        if self.demo:
+            firsts = [items[0] for items in groups.values()]
+            lines = self.translator.registry.current().demo_many([i[1] for i in firsts], [i[0] for i in firsts])
+            for items, line in zip(groups.values(), lines):
+                self._resolve(items, line, "demo")
+            return
+        hits = self.translator.cache.get_many(groups)
+        with self._lock:
+            self._counters["cache_hits"] += sum(len(groups[k]) for k in hits)
+        for key, items in groups.items():
+            if key in hits:
+                self._resolve(items, self.translator.vetted(items[0][0], items[0][1], hits[key])[0], "cache")
+            else:
+                self._pool.submit(self._miss, key, items)
+
+    def _miss(self, key, items):
+        style, thought, on_usage, _ = items[0]
+        try:
+            line = self.translator.near(style, thought, key)
+            source = "cache"
+            if line is not None:
+                line = self.translator.vetted(style, thought, line)[0]
+            else:
+                with self._lock:
+                    self._counters["upstream"] += 1
+                line, source = self.translator.fetch(style, thought, key, on_usage), "upstream"
+        except Exception:  # CircuitOpenError, upstream errors: same demo fallback as the page
+            with self._lock:
+                self._counters["fallbacks"] += 1
+            line, source = self.translator.registry.current().demo(thought, style), "fallback"
+        self._resolve(items, line, source)
+
+    @staticmethod
+    def _resolve(items, line, source):
+        for *_, future in items:
+            future.set_result((line, source))
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+        s["mean_batch"] = round(s["items"] / s["batches"], 2) if s["batches"] else None
+        s["queued"] = self._queue.qsize()
+        return s
+
+
+# -------------------------
+# Service (what the handler needs, built once per process)
+# -------------------------
+def load_config(path=SECRETS_PATH) -> dict:
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _codes(cfg) -> tuple:
+    paywall = cfg.get("paywall", {})
+    if isinstance(paywall.get("codes"), list):
+        return tuple(str(c).strip() for c in paywall["codes"] if str(c).strip())
+    if paywall.get("code"):
+        return (str(paywall["code"]).strip(),)
+    return ()
+
+
+class Service:
+    def __init__(self, cfg=None, demo: bool = False):
+        cfg = dict(cfg or {})
+        server_cfg = cfg.get("server", {})
+        openai_cfg = cfg.get("openai", {})
+        api_key = (openai_cfg.get("api_key") or os.environ.get("OPENAI_API_KEY") or "").strip()
+        base_url = openai_cfg.get("base_url") or None
+        self.cassette = cassette_from_config(cfg.get("cassette", {}))
+        # a replay cassette needs no key: nothing is sent upstream
+        self.demo = demo or not (api_key or (self.cassette is not None and self.cassette.mode == "replay"))
+        self.registry = StyleRegistry()
+        self.metrics = metrics_from_config(dict(cfg.get("metrics", {}), port=0))  # /metrics is served here
+        self.codes = _codes(cfg)
+        # usage counters shared with the Streamlit workers reading the same [shared] table
+        self.shared = shared_from_config(cfg.get("shared", {}))
+        self.quota = quota_from_config(self.codes, cfg.get("quota", {}), state=self.shared) if self.codes else None
+        self.resilience = resilience_from_config(cfg.get("resilience", {}))
+        client = None
+        if not self.demo and api_key:
+            client = registry_from_config(cfg.get("openai_pool", {})).get(api_key, base_url)
+        if not self.demo and self.cassette is not None:
+            client = self.cassette.wrap(client)
+        self.single_flight = SingleFlight()
+        self.safety = safety_from_config(cfg.get("safety", {}))
+        self.translator = Translator(
+            self.registry, cache_from_config(cfg.get("cache", {})),
+            client=client, resilience=self.resilience,
+            model=MODEL, temperature=TEMPERATURE, max_tokens=MAX_TOKENS,
+            semantic=semantic_from_config(cfg.get("semantic", {})),
+            reranker=reranker_from_config(cfg.get("candidates", {})),
+            single_flight=self.single_flight, metrics=self.metrics, fewshot_cfg=cfg.get("fewshot", {}),
+            safety=self.safety, profiles=profiles_from_config(cfg.get("models", {}), MODEL, TEMPERATURE, MAX_TOKENS),
+        )
+        self.batcher = MicroBatcher(
+            self.translator,
+            max_batch=server_cfg.get("max_batch", 32),
+            max_wait_ms=server_cfg.get("max_wait_ms", 5),
+            workers=server_cfg.get("workers", 16),
+            demo=self.demo, observe=self.metrics.observe,
+        )
+        self.max_items = int(server_cfg.get("max_items", 256))
+
+    # ---- request checks ----
+    def authorize(self, header: str, n: int = 1):
+        """Reserve n translations for the bearer code; returns its Charge (None when open)."""
+        if self.quota is None:
+            return None
+        code = header[7:].strip() if header and header.lower().startswith("bearer ") else ""
+        if not self.quota.is_valid(code):
+            raise RequestError(401, "missing or invalid access code")
+        decision = self.quota.acquire(code, n)
+        if not decision.allowed:
+            raise RequestError(429, decision.reason, decision.retry_after)
+        return Charge(self.quota, code, n)
+
+    def result(self, record: dict) -> dict:
+        # lines from the local crisis check carry help resources for the partner app to show
+        if record["source"] == "safety":
+            record["resources"] = self.safety.resources
+        return record
+
+    def item(self, body: dict, default_style=None) -> tuple:
+        if not isinstance(body, dict):
+            raise RequestError(400, "each item must be an object")
+        thought = body.get("thought")
+        style = body.get("style") or default_style
+        if not isinstance(thought, str) or not thought.strip():
+            raise RequestError(400, "thought must be a non-empty string")
+        if len(thought) > MAX_THOUGHT:
+            raise RequestError(400, f"thought is longer than {MAX_THOUGHT} characters")
+        if not isinstance(style, str):
+            raise RequestError(400, "style must be a string (see GET /v1/styles)")
+        if style not in self.registry.current().styles:
+            raise RequestError(400, f"unknown style: {style!r} (see GET /v1/styles)")
+        return style, thought.strip()
+
+    def styles(self) -> dict:
+        snapshot = self.registry.current()
+        return {"version": snapshot.version,
+                "styles": [{"name": name, "description": snapshot.styles[name].description}
+                           for name in snapshot.names]}
+
+    def stats(self) -> dict:
+        return {"demo": self.demo, "batcher": self.batcher.stats(), "cache": self.translator.cache.stats(),
+                "single_flight": self.single_flight.stats(), "resilience": self.resilience.stats(),
+                "cassette": self.cassette.stats() if self.cassette is not None else None,
+                "shared": self.shared.stats() if self.shared is not None else None}
+
+
+# -------------------------
+# HTTP
+# -------------------------
+def make_handler(service: Service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive by default
+        server_version = "vireo"
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        # ---- plumbing ----
+        def _send_json(self, status: int, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _start_stream(self):
+            self.streaming = True  # from here on, errors can only end the stream
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+        def _chunk(self, record):
+            data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _end_stream(self):
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+        def _read_json(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                self.close_connection = True  # can't tell where this body ends
+                raise RequestError(400, "Content-Length must be an integer")
+            if length < 0:
+                self.close_connection = True
+                raise RequestError(400, "Content-Length must not be negative")
+            if length > MAX_BODY:
+                self.close_connection = True
+                raise RequestError(413, "request body too large")
+            try:
+                return json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                raise RequestError(400, "body must be JSON")
+
+        def _route(self, method):
+            path = self.path.split("?")[0]
+            handler = {("GET", "/v1/styles"): self._styles, ("GET", "/healthz"): self._health,
+                       ("GET", "/metrics"): self._metrics, ("POST", "/v1/translate"): self._translate,
+                       ("POST", "/v1/batch"): self._batch}.get((method, path))
+            t0 = time.perf_counter()
+            status = 200
+            self.streaming = False
+            try:
+                if handler is None:
+                    raise RequestError(404, f"no route for {method} {path}")
+                handler()
+            except RequestError as e:
+                status = e.status
+                headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else None
+                self._send_json(e.status, {"error": str(e)}, headers)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+                status = 499
+            except Exception:
+                # a bug, not the client's fault: log it and still answer
+                status = 500
+                traceback.print_exc()
+                self.close_connection = True
+                if not self.streaming:
+                    try:
+                        self._send_json(500, {"error": "internal error"})
+                    except OSError:
+                        pass
+            finally:
+                service.metrics.observe("vireo_http_seconds", time.perf_counter() - t0,
+                                        route=path if handler else "other", status=status)
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def log_message(self, *args):
+            pass
+
+        # ---- endpoints ----
+        def _styles(self):
+            self._send_json(200, service.styles())
+
+        def _health(self):
+            self._send_json(200, service.stats())
+
+        def _metrics(self):
+            body = service.metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _translate(self):
+            body = self._read_json()
+            style, thought = service.item(body)
+            charge = service.authorize(self.headers.get("Authorization"))
+            try:
+                self._translate_charged(body, style, thought, charge.record if charge is not None else None)
+            finally:
+                if charge is not None:
+                    charge.settle()  # only upstream answers count against the quota
+
+        def _translate_charged(self, body, style, thought, on_usage):
+            if not body.get("stream"):
+                line, source = service.batcher.submit(style, thought, on_usage).result()
+                self._send_json(200, service.result({"style": style, "line": line, "source": source}))
+                return
+
+            self._start_stream()
+            line = service.translator.screened(style, thought)
+            if line is not None:
+                self._chunk(service.result({"style": style, "line": line, "source": "safety", "done": True}))
+                self._end_stream()
+                return
+            if service.demo:
+                self._chunk({"style": style, "line": service.registry.current().demo(thought, style), "source": "demo", "done": True})
+                self._end_stream()
+                return
+            sent = [""]
+
+            def delta(text):
+                if len(text) > len(sent[0]):
+                    self._chunk({"delta": text[len(sent[0]):]})
+                    sent[0] = text
+
+            try:
+                out = service.translator.stream(style, thought, on_usage=on_usage, on_text=delta)
+                source = "safety" if out["safety"] else "upstream" if out["ttft"] is not None else "cache"
+                final = {"line": out["line"], "source": source}
+            except CircuitOpenError:
+                final = {"line": service.registry.current().demo(thought, style), "source": "fallback"}
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                final = {"line": service.registry.current().demo(thought, style), "source": "fallback", "error": str(e)}
+            if sent[0] and sent[0].strip() != final["line"]:
+                final["replace"] = True
+            self._chunk(service.result({"style": style, **final, "done": True}))
+            self._end_stream()
+
+        def _batch(self):
+            body = self._read_json()
+            items = body.get("items") if isinstance(body, dict) else None
+            if not isinstance(items, list) or not items:
+                raise RequestError(400, "items must be a non-empty list")
+            if len(items) > service.max_items:
+                raise RequestError(400, f"at most {service.max_items} items per request")
+            pairs = [service.item(item, body.get("style")) for item in items]
+            charge = service.authorize(self.headers.get("Authorization"), len(pairs))
+            try:
+                self._batch_charged(body, pairs, charge.record if charge is not None else None)
+            finally:
+                if charge is not None:
+                    charge.settle()
+
+        def _batch_charged(self, body, pairs, on_usage):
+            futures = {service.batcher.submit(style, thought, on_usage): i for i, (style, thought) in enumerate(pairs)}
+
+            def record(future):
+                i = futures[future]
+                line, source = future.result()
+                return service.result({"index": i, "style": pairs[i][0], "line": line, "source": source})
+
+            if not body.get("stream"):
+                results = [None] * len(pairs)
+                for future in futures:
+                    results[futures[future]] = record(future)
+                self._send_json(200, {"results": results})
+                return
+            self._start_stream()
+            for future in as_completed(futures):
+                self._chunk(record(future))
+            self._end_stream()
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # listen backlog; the default 5 resets bursts of new connections
+
+
+def serve(service: Service, host: str = "127.0.0.1", port: int = 8800) -> ThreadingHTTPServer:
+    return _Server((host, int(port)), make_handler(service))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Headless VIREO translation service.")
+    p.add_argument("--host", default=None)
+    p.add_argument("--port", type=int, default=None)
+    p.add_argument("--secrets", default=str(SECRETS_PATH), help="TOML with the same tables as the app's secrets")
+    p.add_argument("--demo", action="store_true", help="serve demo lines, never call upstream")
+    args = p.parse_args(argv)
+
+    cfg = load_config(args.secrets)
+    server_cfg = cfg.get("server", {})
+    service = Service(cfg, demo=args.demo)
+    host = args.host or server_cfg.get("host", "127.0.0.1")
+    port = args.port if args.port is not None else server_cfg.get("port", 8800)
+    server = serve(service, host, port)
+    mode = "demo" if service.demo else "api"
+    print(f"vireo server on http://{host}:{server.server_address[1]} ({mode}, "
+          f"{len(service.registry.current().names)} styles)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
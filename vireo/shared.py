@@ -0,0 +1,361 @@
+# vireo/shared.py — state every worker process must agree on: usage counters, recent lines
+#
+#   state = SharedState(SQLiteBackend(".cache/shared.sqlite3"))    # or RedisBackend.from_url(...)
+#   state.incr("usage:2026-01-01:abc:r", 1, ttl=172800)
+#   state.get("usage:2026-01-01:abc:r")
+#
+# Behind a load balancer each Streamlit process has its own memory, so quotas and
+# rate limits held there are per-process (N workers admit N times the limit). This
+# keeps them in one place every worker can reach: a SQLite file in WAL mode by default
+# (one host), or any Redis-compatible server (several hosts; python -m vireo.mock_redis
+# is a local stand-in).
+#
+# Round trips are kept off the request path:
+#   - writes are batched: increments are summed per key and appends queued, and a
+#     background thread applies them every flush_ms in one transaction / pipeline;
+#   - reads are read-through: a value fetched from the backend is reused for
+#     read_ttl_ms, plus this process's own unflushed writes.
+# So a reader sees other workers' writes at most flush_ms + read_ttl_ms late, and the
+# backend sees one write per key per flush however many requests there were. flush_ms
+# = 0 writes through (every call is a round trip), for comparison in bench/bench_shared.py.
+import atexit
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(".cache") / "shared.sqlite3"
+BACKENDS = ("sqlite", "redis")
+
+
+# -------------------------
+# Backends: batched primitives, no caching
+# -------------------------
+class SQLiteBackend:
+    name = "sqlite"
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS counters ("
+                   " key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL)")
+        db.execute("CREATE TABLE IF NOT EXISTS items ("
+                   " seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL)")
+        db.execute("CREATE INDEX IF NOT EXISTS items_key ON items(key, seq)")
+        self._db = db
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+    def _write(self, statements):
+        # one IMMEDIATE transaction: takes the write lock up front instead of failing mid-way
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, rows in statements:
+                    self._db.executemany(sql, rows)
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= 256:
+                    self._writes_since_prune = 0
+                    now = time.time()
+                    self._db.execute("DELETE FROM counters WHERE expires_at < ?", (now,))
+                    self._db.execute("DELETE FROM items WHERE expires_at < ?", (now,))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def incr(self, amounts: dict):
+        """{key: (n, ttl seconds or None)}"""
+        now = time.time()
+        self._write([(
+            "INSERT INTO counters (key, value, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(key) DO UPDATE SET value = CASE WHEN counters.expires_at < ? THEN excluded.value"
+            " ELSE counters.value + excluded.value END, expires_at = excluded.expires_at",
+            [(key, n, now + ttl if ttl else None, now) for key, (n, ttl) in amounts.items()],
+        )])
+
+    def get(self, keys) -> dict:
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):  # stay under SQLite's variable limit
+                chunk = keys[i:i + 500]
+                found.update(self._db.execute(
+                    f"SELECT key, value FROM counters WHERE key IN ({','.join('?' * len(chunk))})"
+                    " AND (expires_at IS NULL OR expires_at >= ?)", chunk + [time.time()]).fetchall())
+        return found
+
+    def push(self, lists: dict):
+        """{key: (values oldest first, maxlen, ttl seconds or None)}"""
+        now = time.time()
+        inserts, trims, touches = [], [], []
+        for key, (values, maxlen, ttl) in lists.items():
+            expires_at = now + ttl if ttl else None
+            inserts += [(key, value, expires_at) for value in values]
+            trims.append((key, key, maxlen))
+            touches.append((expires_at, key))
+        self._write([
+            ("INSERT INTO items (key, value, expires_at) VALUES (?, ?, ?)", inserts),
+            ("DELETE FROM items WHERE key = ? AND seq <= (SELECT seq FROM items WHERE key = ?"
+             " ORDER BY seq DESC LIMIT 1 OFFSET ?)", trims),
+            ("UPDATE items SET expires_at = ? WHERE key = ?", touches),
+        ])
+
+    def range(self, key: str, n: int) -> list:
+        """Newest first."""
+        with self._lock:
+            rows = self._db.execute("SELECT value FROM items WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)"
+                                    " ORDER BY seq DESC LIMIT ?", (key, time.time(), n)).fetchall()
+        return [r[0] for r in rows]
+
+    def delete(self, keys):
+        rows = [(k,) for k in keys]
+        self._write([("DELETE FROM counters WHERE key = ?", rows), ("DELETE FROM items WHERE key = ?", rows)])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RedisBackend:
+    """Any Redis-protocol server (Redis, Valkey, KeyDB, ..., python -m vireo.mock_redis)."""
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "vireo:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "vireo:", timeout: float = 2.0):
+        import redis  # optional dependency, only for this backend
+
+        # RESP2: every Redis-protocol server and python -m vireo.mock_redis speak it
+        return cls(redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout, protocol=2),
+                   prefix)
+
+    def incr(self, amounts: dict):
+        pipe = self.client.pipeline(transaction=False)
+        for key, (n, ttl) in amounts.items():
+            pipe.incrby(self.prefix + key, n)
+            if ttl:
+                pipe.expire(self.prefix + key, math.ceil(ttl))
+        pipe.execute()
+
+    def get(self, keys) -> dict:
+        keys = list(keys)
+        values = self.client.mget([self.prefix + k for k in keys]) if keys else []
+        return {k: int(v) for k, v in zip(keys, values) if v is not None}
+
+    def push(self, lists: dict):
+        pipe = self.client.pipeline(transaction=False)
+        for key, (values, maxlen, ttl) in lists.items():
+            pipe.lpush(self.prefix + key, *values)  # the last value ends up first: newest first
+            pipe.ltrim(self.prefix + key, 0, maxlen - 1)
+            if ttl:
+                pipe.expire(self.prefix + key, math.ceil(ttl))
+        pipe.execute()
+
+    def range(self, key: str, n: int) -> list:
+        return [v.decode("utf-8") for v in self.client.lrange(self.prefix + key, 0, n - 1)]
+
+    def delete(self, keys):
+        keys = [self.prefix + k for k in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def close(self):
+        self.client.close()
+
+
+# -------------------------
+# Batched writes + read-through cache in front of a backend
+# -------------------------
+class SharedState:
+    def __init__(self, backend, flush_ms: float = 200, read_ttl_ms: float = 1000, max_batch: int = 1024):
+        self.backend = backend
+        self.flush_s = float(flush_ms) / 1000
+        self.read_ttl = float(read_ttl_ms) / 1000
+        self.max_batch = int(max_batch)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one flush at a time, in order
+        self._incr = {}      # key -> [n, ttl] not yet written
+        self._push = {}      # key -> [values oldest first, maxlen, ttl] not yet written
+        self._pending = 0
+        self._counts = {}    # key -> (backend value incl. our flushed writes, fetched at)
+        self._lists = {}     # key -> (values newest first, fetched at)
+        self._counters = {"writes": 0, "flushes": 0, "flushed_ops": 0, "reads": 0, "read_hits": 0, "errors": 0}
+        self._wake = threading.Event()
+        self._closed = False
+        if self.flush_s > 0:
+            threading.Thread(target=self._flusher, name="vireo-shared-flush", daemon=True).start()
+        atexit.register(self.flush)
+
+    # ---- writes ----
+    def incr(self, key: str, n: int = 1, ttl: float = None):
+        with self._lock:
+            entry = self._incr.get(key)
+            if entry is None:
+                self._incr[key] = [n, ttl]
+            else:
+                entry[0] += n
+                entry[1] = ttl
+            self._counters["writes"] += 1
+            self._pending += 1
+            full = self._pending >= self.max_batch
+        self._after_write(full)
+
+    def append(self, key: str, value: str, maxlen: int, ttl: float = None):
+        with self._lock:
+            entry = self._push.setdefault(key, [[], maxlen, ttl])
+            entry[0].append(value)
+            entry[1], entry[2] = maxlen, ttl
+            cached = self._lists.get(key)
+            if cached is not None:
+                self._lists[key] = (([value] + cached[0])[:maxlen], cached[1])
+            self._counters["writes"] += 1
+            self._pending += 1
+            full = self._pending >= self.max_batch
+        self._after_write(full)
+
+    def delete(self, key: str):
+        self.flush()  # a queued write must not resurrect the key
+        with self._lock:
+            self._counts.pop(key, None)
+            self._lists.pop(key, None)
+        try:
+            self.backend.delete([key])
+        except Exception:
+            self._count_error()
+
+    def _after_write(self, full: bool):
+        if self.flush_s <= 0:
+            self.flush()
+        elif full:
+            self._wake.set()
+
+    def _flusher(self):
+        while not self._closed:
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                incr, push, n = self._incr, self._push, self._pending
+                self._incr, self._push, self._pending = {}, {}, 0
+            try:
+                if incr:
+                    self.backend.incr({k: (v[0], v[1]) for k, v in incr.items()})
+                if push:
+                    self.backend.push({k: (v[0], v[1], v[2]) for k, v in push.items()})
+            except Exception:
+                # keep them for the next flush rather than lose them; reads still count them
+                with self._lock:
+                    for key, (amount, ttl) in incr.items():
+                        self._incr.setdefault(key, [0, ttl])[0] += amount
+                    for key, (values, maxlen, ttl) in push.items():
+                        self._push.setdefault(key, [[], maxlen, ttl])[0][:0] = values
+                    self._pending += n
+                    self._counters["errors"] += 1
+                return
+            with self._lock:
+                for key, (amount, _) in incr.items():
+                    cached = self._counts.get(key)
+                    if cached is not None:
+                        self._counts[key] = (cached[0] + amount, cached[1])
+                self._counters["flushes"] += 1
+                self._counters["flushed_ops"] += n
+
+    # ---- reads ----
+    def get_many(self, keys) -> dict:
+        """{key: value} for every key (0 when unset), this process's unflushed writes included."""
+        keys = list(dict.fromkeys(keys))
+        now = time.monotonic()
+        with self._lock:
+            stale = [k for k in keys if k not in self._counts or now - self._counts[k][1] > self.read_ttl]
+            self._counters["reads"] += len(keys)
+            self._counters["read_hits"] += len(keys) - len(stale)
+        if stale:
+            # not during a flush: the fetched value would or would not include it
+            with self._flush_lock:
+                try:
+                    fetched = self.backend.get(stale)
+                except Exception:
+                    fetched = None
+                    self._count_error()
+                if fetched is not None:
+                    with self._lock:
+                        for k in stale:
+                            self._counts[k] = (fetched.get(k, 0), now)
+        with self._lock:
+            return {k: self._counts.get(k, (0, 0))[0] + self._incr.get(k, (0,))[0] for k in keys}
+
+    def get(self, key: str) -> int:
+        return self.get_many([key])[key]
+
+    def recent(self, key: str, n: int) -> list:
+        """Up to n appended values, newest first."""
+        now = time.monotonic()
+        with self._lock:
+            self._counters["reads"] += 1
+            cached = self._lists.get(key)
+            if cached is not None and now - cached[1] <= self.read_ttl:
+                self._counters["read_hits"] += 1
+                return cached[0][:n]
+        with self._flush_lock:
+            try:
+                values = self.backend.range(key, n)
+            except Exception:
+                self._count_error()
+                values = cached[0] if cached is not None else []
+            with self._lock:
+                queued = self._push.get(key)
+                if queued is not None:
+                    values = (queued[0][::-1] + values)[:queued[1]]
+                self._lists[key] = (values, now)
+        return values[:n]
+
+    def _count_error(self):
+        with self._lock:
+            self._counters["errors"] += 1
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+        self.backend.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["pending"] = self._pending
+            s["cached_keys"] = len(self._counts) + len(self._lists)
+        s["backend"] = self.backend.name
+        s["ops_per_flush"] = round(s["flushed_ops"] / s["flushes"], 1) if s["flushes"] else 0.0
+        s["read_hit_rate"] = s["read_hits"] / s["reads"] if s["reads"] else 0.0
+        s["pid"] = os.getpid()
+        return s
+
+
+def shared_from_config(cfg=None):
+    # cfg mirrors the optional [shared] table in .streamlit/secrets.toml; None when "off"
+    cfg = dict(cfg or {})
+    backend = cfg.get("backend", "sqlite")
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        store = SQLiteBackend(cfg.get("path", DEFAULT_DB_PATH))
+    elif backend == "redis":
+        store = RedisBackend.from_url(cfg.get("url", "redis://127.0.0.1:6379/0"), prefix=cfg.get("prefix", "vireo:"))
+    else:
+        raise ValueError(f"shared backend must be one of {', '.join(BACKENDS)} or off, got {backend!r}")
+    return SharedState(store, flush_ms=cfg.get("flush_ms", 200), read_ttl_ms=cfg.get("read_ttl_ms", 1000),
+                       max_batch=cfg.get("max_batch", 1024))
@@ -0,0 +1,63 @@
+# vireo/singleflight.py — coalesce identical concurrent calls into one
+#
+# All Streamlit sessions of a worker share one process, so when many sessions ask
+# for the same (style, thought) at once, the first caller runs the completion and
+# the rest block on its result instead of firing their own request.
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = {"calls": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        """Run fn() once per key at a time; concurrent callers with the same key
+        get the leader's result (or its exception)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._counters["calls"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._counters)
+            s["in_flight"] = len(self._calls)
+            s["waiting"] = sum(c.waiters for c in self._calls.values())
+        total = s["calls"] + s["coalesced"]
+        s["coalesced_rate"] = s["coalesced"] / total if total else 0.0
+        return s
@@ -0,0 +1,254 @@
+# vireo/translator.py — the translate pipeline shared by the Translate page and vireo.server
+#
+# local safety check -> exact cache -> near-duplicate index -> single-flight -> resilient
+# completion with n candidates -> local rerank -> safety check on the line -> remember.
+# Streamlit-free; each front end builds one
+# per process around its own client, caches and metrics. Demo fallback stays with
+# the caller, which knows whether the user is in Demo mode or over quota.
+import threading
+import time
+from contextlib import nullcontext
+
+from vireo.cache import make_key
+from vireo.completions import CompletionStream, complete_choices
+from vireo.fewshot import fewshot_from_config
+from vireo.profiles import MAX_TOKENS, MODEL, TEMPERATURE, ProfileBook
+from vireo.resilience import EmptyCompletionError
+
+
+class Translator:
+    def __init__(self, registry, cache, client=None, resilience=None, model: str = MODEL,
+                 temperature: float = TEMPERATURE, max_tokens: int = MAX_TOKENS, semantic=None, reranker=None,
+                 single_flight=None, metrics=None, fewshot_cfg=None, safety=None, profiles=None):
+        self.registry = registry
+        self.cache = cache
+        self.client = client
+        self.resilience = resilience
+        # per-style model / temperature / max_tokens; model etc. are the single-profile default
+        self.profiles = profiles or ProfileBook.single(model, temperature, max_tokens)
+        self.semantic = semantic
+        self.reranker = reranker
+        self.single_flight = single_flight
+        self.metrics = metrics
+        self.fewshot_cfg = fewshot_cfg
+        self.safety = safety
+        self._fewshot = (None, None)  # (snapshot version, FewShotIndex or None)
+        self._fewshot_lock = threading.Lock()
+
+    @property
+    def candidates(self) -> int:
+        return self.reranker.n if self.reranker is not None else 1
+
+    def _span(self, stage, **labels):
+        return self.metrics.span(stage, **labels) if self.metrics is not None else nullcontext()
+
+    def _usage(self, style, on_usage):
+        model = self.profiles.for_style(style).model
+
+        def record(usage):
+            if self.metrics is not None:
+                self.metrics.record_usage(usage, style, model)
+            if on_usage is not None:
+                on_usage(usage)
+        return record
+
+    def key(self, style: str, thought: str) -> str:
+        profile = self.profiles.for_style(style)
+        return make_key(style, thought, profile.model, profile.temperature, self.registry.current().version)
+
+    # ---- prompt ----
+    def fewshot_index(self, snapshot):
+        # rebuilt when the style registry hot-reloads
+        if self._fewshot[0] != snapshot.version:
+            with self._fewshot_lock:
+                if self._fewshot[0] != snapshot.version:
+                    self._fewshot = (snapshot.version, fewshot_from_config(snapshot.modes, self.fewshot_cfg))
+        return self._fewshot[1]
+
+    def messages(self, style: str, thought: str) -> list:
+        snapshot = self.registry.current()
+        index = self.fewshot_index(snapshot)
+        examples = index.select(style, thought) if index is not None else None
+        return snapshot.styles[style].messages(thought, examples)
+
+    # ---- safety ----
+    def screened(self, style: str, thought: str):
+        """Supportive line when the local crisis check fires on the thought, else None."""
+        if self.safety is None:
+            return None
+        verdict = self.safety.check(thought)
+        if verdict is None:
+            return None
+        if self.metrics is not None:
+            self.metrics.inc("vireo_safety_overrides_total", stage="input", category=verdict.category, style=style)
+        return self.safety.supportive(thought)
+
+    def vetted(self, style: str, thought: str, line: str):
+        # (line, ok): a generated or cached line that trips the check is replaced, never cached
+        if self.safety is None or line is None:
+            return line, True
+        verdict = self.safety.check(line)
+        if verdict is None:
+            return line, True
+        if self.metrics is not None:
+            self.metrics.inc("vireo_safety_overrides_total", stage="output", category=verdict.category, style=style)
+        return self.safety.supportive(thought), False
+
+    # ---- cache ----
+    def cached(self, style: str, thought: str, key: str = None):
+        """Exact cache, then near-duplicate index; None means we have to ask upstream."""
+        key = key or self.key(style, thought)
+        line = self.cache.get(key)
+        return line if line is not None else self.near(style, thought, key)
+
+    def semantic_scope(self, style: str) -> str:
+        # what the exact key carries besides the thought: prompt version and profile
+        profile = self.profiles.for_style(style)
+        return f"{self.registry.current().version}|{profile.model}|{round(float(profile.temperature), 3)}"
+
+    def near(self, style: str, thought: str, key: str):
+        # near-duplicate index only (callers that already batch-read the exact cache)
+        if self.semantic is None:
+            return None
+        hit = self.semantic.lookup(thought, style, self.semantic_scope(style))
+        if hit is None:
+            return None
+        self.cache.put(key, hit[0])
+        return hit[0]
+
+    def remember(self, style: str, thought: str, key: str, line: str):
+        self.cache.put(key, line)
+        if self.semantic is not None:
+            self.semantic.add(thought, style, line, self.semantic_scope(style))
+
+    def pick(self, style: str, thought: str, lines: list, seconds: float):
+        """Best of the n choices; ok=False when none passed the format checks (not cached then)."""
+        if self.reranker is None:
+            return lines[0], True
+        pick = self.reranker.pick(lines, thought, seconds)
+        if self.metrics is not None:
+            self.metrics.inc("vireo_candidates_total", len(lines), style=style)
+            for reasons in pick.rejected:
+                for reason in reasons:
+                    self.metrics.inc("vireo_candidate_rejects_total", reason=reason, style=style)
+            if pick.reask_avoided:
+                self.metrics.inc("vireo_reasks_avoided_total", style=style)
+                self.metrics.inc("vireo_reask_saved_seconds_total", seconds, style=style)
+        return pick.line, not pick.reasons
+
+    # ---- upstream ----
+    def fetch(self, style: str, thought: str, key: str = None, on_usage=None) -> str:
+        """Ask upstream (no cache lookup); identical concurrent calls share one request."""
+        return self.fetch_vetted(style, thought, key, on_usage)[0]
+
+    def fetch_vetted(self, style: str, thought: str, key: str = None, on_usage=None) -> tuple:
+        """fetch() as (line, safe); safe is False when the safety check replaced the line."""
+        key = key or self.key(style, thought)
+
+        def run():
+            with self._span("build_messages", style=style):
+                messages = self.messages(style, thought)
+            profile = self.profiles.for_style(style)
+            started = time.perf_counter()
+            with self._span("upstream", style=style, model=profile.model):
+                lines = self.resilience.call(
+                    lambda timeout: complete_choices(self.client, messages, profile.model, profile.temperature,
+                                                     profile.max_tokens, n=self.candidates, timeout=timeout,
+                                                     on_usage=self._usage(style, on_usage))
+                )
+            line, ok = self.pick(style, thought, lines, time.perf_counter() - started)
+            line, safe = self.vetted(style, thought, line)
+            if ok and safe:
+                self.remember(style, thought, key, line)
+            return line, safe
+
+        # every single-flight run returns (line, safe): fetch and stream callers share keys
+        return self.single_flight.do(key, run) if self.single_flight is not None else run()
+
+    def translate(self, style: str, thought: str, on_usage=None) -> str:
+        return self.translate_vetted(style, thought, on_usage)[0]
+
+    def translate_vetted(self, style: str, thought: str, on_usage=None) -> tuple:
+        """translate() as (line, safe); safe is False when the line is the supportive one."""
+        line = self.screened(style, thought)
+        if line is not None:
+            return line, False  # no upstream call at all
+        key = self.key(style, thought)
+        line = self.cached(style, thought, key)
+        if line is not None:
+            return self.vetted(style, thought, line)
+        return self.fetch_vetted(style, thought, key, on_usage)
+
+    def stream(self, style: str, thought: str, on_usage=None, on_text=None) -> dict:
+        """Like translate(), streaming one choice; on_text(text_so_far) is called per delta.
+
+        Streams ask for a single choice even with a reranker: the line the user watched
+        type out is the line they get (the reranker still checks it, and a line that
+        fails the format checks is not cached). With a safety check, on_text only sees
+        text that passed it: the last, possibly unfinished word is held back until the
+        next delta, and a hit stops the stream and returns the supportive line.
+        An exception from on_text (a client that hung up) is raised once the completion
+        is done, outside the breaker: it is not an upstream failure.
+        Returns {"line", "ttft", "total", "safety"}; ttft is None when the line came from
+        a cache, from another caller's in-flight request or from the safety check;
+        safety is True when the line is the supportive one.
+        """
+        line = self.screened(style, thought)
+        if line is not None:
+            return {"line": line, "ttft": None, "total": None, "safety": True}
+        key = self.key(style, thought)
+        line = self.cached(style, thought, key)
+        if line is not None:
+            line, safe = self.vetted(style, thought, line)
+            return {"line": line, "ttft": None, "total": None, "safety": not safe}
+        with self._span("build_messages", style=style):
+            messages = self.messages(style, thought)
+        profile = self.profiles.for_style(style)
+        completion = CompletionStream(self.client, messages, profile.model, profile.temperature, profile.max_tokens,
+                                      timeout=self.resilience.timeout, on_usage=self._usage(style, on_usage),
+                                      n=1)
+
+        hung_up = []  # this caller's on_text error; the stream goes on for the cache and followers
+
+        def show(text):
+            if not hung_up:
+                try:
+                    on_text(text)
+                except Exception as e:  # e.g. BrokenPipeError
+                    hung_up.append(e)
+
+        def run():
+            shown = 0
+            with self.resilience.guard(), self._span("upstream", style=style, model=profile.model):
+                deltas = iter(completion)
+                for _ in deltas:
+                    text = "".join(completion.parts)
+                    if self.safety is not None:
+                        if self.safety.check(text) is not None:
+                            deltas.close()  # stop generating; vetted() below swaps the line
+                            break
+                        cut = max(text.rfind(" "), text.rfind("\n"), 0)  # hold back the last word
+                    else:
+                        cut = len(text)
+                    if on_text is not None and cut > shown:
+                        show(text[:cut])
+                        shown = cut
+                if not any(completion.texts):
+                    raise EmptyCompletionError("empty completion")
+            line, ok = self.pick(style, thought, completion.texts, completion.total)
+            line, safe = self.vetted(style, thought, line)
+            text = "".join(completion.parts)
+            if safe and on_text is not None and len(text) > shown:
+                show(text)  # the held-back last word
+            if ok and safe:
+                self.remember(style, thought, key, line)
+            return line, safe
+
+        line, safe = self.single_flight.do(key, run) if self.single_flight is not None else run()
+        if hung_up:
+            raise hung_up[0]
+        if not completion.started:
+            return {"line": line, "ttft": None, "total": None, "safety": not safe}
+        if self.metrics is not None:
+            self.metrics.observe("vireo_ttft_seconds", completion.ttft, style=style, model=profile.model)
+        return {"line": line, "ttft": completion.ttft, "total": completion.total, "safety": not safe}